@@ -1,22 +1,53 @@
-import asyncio
+import os
+import random
+import tempfile
 
 import uvicorn
+from uvicorn.supervisors import Multiprocess
 
 from core.config import core_settings
 
 
-async def main():
-    config = uvicorn.Config(
+def build_config() -> uvicorn.Config:
+    return uvicorn.Config(
         "asgi.app:create_app",
         host="0.0.0.0",
         port=core_settings.BACKEND_PORT,
         factory=True,
+        workers=core_settings.WORKERS,
+        loop=core_settings.SERVER_LOOP,
+        http=core_settings.SERVER_HTTP,
+        limit_max_requests=core_settings.WORKER_MAX_REQUESTS,
+        timeout_graceful_shutdown=core_settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
     )
-    server = uvicorn.Server(config)
-    await server.serve()
+
+
+def run_worker(sockets=None) -> None:
+    config = build_config()
+    if config.limit_max_requests:
+        # Spread recycling so workers do not all restart at the same moment.
+        config.limit_max_requests += random.randint(
+            0,
+            core_settings.WORKER_MAX_REQUESTS_JITTER,
+        )
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+def main() -> None:
+    config = build_config()
+    if config.workers <= 1:
+        run_worker()
+        return
+    # Workers are spawned and re-read their settings from the environment.
+    if core_settings.PROFILER_STORE_DIR is None:
+        os.environ["PROFILER_STORE_DIR"] = tempfile.mkdtemp(prefix="organization-search-profiles-")
+    if core_settings.METRICS_DIR is None:
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="organization-search-metrics-")
+    # The supervisor restarts workers that exit after WORKER_MAX_REQUESTS
+    # and restarts all of them gracefully on SIGHUP.
+    socket = config.bind_socket()
+    Multiprocess(config, target=run_worker, sockets=[socket]).run()
 
 
 if __name__ == "__main__":
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(main())
+    main()
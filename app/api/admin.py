@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette import status
+
+from core import loop_monitor
+from core.config import core_settings
+from core.profiler import SamplingProfiler, profile_store
+from db import slow_queries
+from dependecies.auth import AdminSecurityDependency
+from enums.profile import ProfileFormat
+from schemas.admin import (
+    LoopStallResponseSchema,
+    ProfileResponseSchema,
+    SlowQueryResponseSchema,
+)
+
+# asyncio keeps only weak references to tasks.
+_background_tasks: set[asyncio.Task] = set()
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[AdminSecurityDependency],
+)
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryResponseSchema])
+async def list_slow_queries() -> list[SlowQueryResponseSchema]:
+    if slow_queries.slow_query_log is None:
+        return []
+    return [
+        SlowQueryResponseSchema(
+            statement=entry.statement,
+            parameter_shapes=entry.parameter_shapes,
+            duration_ms=entry.duration_ms,
+            recorded_at=entry.recorded_at,
+            plan=entry.plan,
+        )
+        for entry in reversed(slow_queries.slow_query_log.entries)
+    ]
+
+
+@router.get("/loop-stalls", response_model=list[LoopStallResponseSchema])
+async def list_loop_stalls() -> list[LoopStallResponseSchema]:
+    if loop_monitor.loop_monitor is None:
+        return []
+    return [
+        LoopStallResponseSchema(
+            detected_at=stall.detected_at,
+            duration_seconds=stall.duration_seconds,
+            stack=stall.stack,
+        )
+        for stall in reversed(loop_monitor.loop_monitor.stalls)
+    ]
+
+
+@router.post(
+    "/profiles",
+    response_model=ProfileResponseSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_profile(
+    seconds: Annotated[int, Query(ge=1)] = 10,
+) -> ProfileResponseSchema:
+    seconds = min(seconds, core_settings.PROFILER_MAX_WINDOW_SECONDS)
+    profiler = SamplingProfiler(
+        f"window {seconds}s",
+        interval=core_settings.PROFILER_INTERVAL_SECONDS,
+        thread_id=threading.get_ident(),
+    )
+    if not profile_store.try_start(profiler):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Too many profiles are running",
+        )
+
+    async def finish() -> None:
+        await asyncio.sleep(seconds)
+        profile_store.finish(profiler)
+
+    task = asyncio.create_task(finish())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return _to_profile_schema(profiler)
+
+
+@router.get("/profiles", response_model=list[ProfileResponseSchema])
+async def list_profiles() -> list[ProfileResponseSchema]:
+    return [_to_profile_schema(profiler) for profiler in profile_store.recent()]
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    profile_format: Annotated[ProfileFormat, Query(alias="format")] = ProfileFormat.SPEEDSCOPE,
+):
+    if (profiler := profile_store.get(profile_id)) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found or still running",
+        )
+    if profile_format == ProfileFormat.COLLAPSED:
+        return PlainTextResponse(profiler.to_collapsed())
+    return JSONResponse(profiler.to_speedscope())
+
+
+def _to_profile_schema(profiler: SamplingProfiler) -> ProfileResponseSchema:
+    return ProfileResponseSchema(
+        id=profiler.id,
+        name=profiler.name,
+        started_at=profiler.started_at,
+        duration_seconds=profiler.duration,
+        sample_count=sum(profiler.samples.values()),
+    )
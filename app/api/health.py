@@ -0,0 +1,50 @@
+import asyncio
+
+import asyncpg
+from fastapi import APIRouter, Request, Response
+from starlette import status
+
+from core.config import core_settings
+from db.listener import ChangeListener
+from db.settings import database_settings
+from schemas.health import HealthResponseSchema
+from snapshot.manager import current_snapshot
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live", response_model=HealthResponseSchema, response_model_exclude_none=True)
+async def live() -> HealthResponseSchema:
+    return HealthResponseSchema(status="ok")
+
+
+@router.get("/ready", response_model=HealthResponseSchema, response_model_exclude_none=True)
+async def ready(request: Request, response: Response) -> HealthResponseSchema:
+    listener = getattr(request.app.state, "change_listener", None)
+    checks = {"database": await database_reachable(listener)}
+    if listener is not None:
+        # Without the listener cached results are no longer invalidated.
+        checks["changeListener"] = listener.connected
+    if core_settings.SNAPSHOT_PATH:
+        checks["snapshot"] = current_snapshot() is not None
+    if not all(checks.values()):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthResponseSchema(status="unavailable", checks=checks)
+    return HealthResponseSchema(status="ok", checks=checks)
+
+
+async def database_reachable(listener: ChangeListener | None) -> bool:
+    # The request pool has no overflow, so under load a check through it
+    # would time out waiting for a connection while the database is fine.
+    try:
+        async with asyncio.timeout(core_settings.READINESS_CHECK_TIMEOUT_SECONDS):
+            if listener is not None:
+                return await listener.ping()
+            connection = await asyncpg.connect(database_settings.listen_url)
+            try:
+                await connection.fetchval("SELECT 1")
+            finally:
+                await connection.close()
+    except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError, TimeoutError):
+        return False
+    return True
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+# Not async: reading the other workers' metrics files may wait on a lock.
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    return render_metrics()
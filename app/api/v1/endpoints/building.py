@@ -1,11 +1,18 @@
-
+import hashlib
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from pydantic import TypeAdapter
 
+from core.columnar import COLUMNAR_RESPONSES, ColumnarResponse, encode_buildings
+from core.config import core_settings
 from dependecies.auth import TokenSecurityDependency
 from dependecies.organization import OrganizationServiceDependency
-from schemas.organization import BuildingResponseSchema
+from dependecies.response_format import ResponseFormatDependency
+from enums.response_format import ResponseFormat
+from schemas.organization import BuildingClustersResponseSchema, BuildingResponseSchema
+
+_buildings_adapter = TypeAdapter(list[BuildingResponseSchema])
 
 router = APIRouter(
     prefix="/buildings",
@@ -17,51 +24,123 @@ router = APIRouter(
 @router.get(
     "/",
     response_model=list[BuildingResponseSchema],
+    responses=COLUMNAR_RESPONSES,
 )
 async def list_buildings(
     organization_service: OrganizationServiceDependency,
-) -> list[BuildingResponseSchema]:
-    return await organization_service.list_buildings()
+    response_format: ResponseFormatDependency,
+) -> list[BuildingResponseSchema] | ColumnarResponse:
+    buildings = await organization_service.list_buildings()
+    if response_format == ResponseFormat.COLUMNAR:
+        return ColumnarResponse(encode_buildings(buildings))
+    return buildings
 
 
 @router.get(
     "/within-radius",
     response_model=list[BuildingResponseSchema],
+    responses=COLUMNAR_RESPONSES,
 )
 async def buildings_within_radius(
     organization_service: OrganizationServiceDependency,
+    response_format: ResponseFormatDependency,
     latitude: Annotated[float, Query(ge=-90.0, le=90.0)],
     longitude: Annotated[float, Query(ge=-180.0, le=180.0)],
     radius_meters: Annotated[float, Query(gt=0, alias="radiusMeters")],
-) -> list[BuildingResponseSchema]:
-    return await organization_service.list_buildings_within_radius(
+) -> list[BuildingResponseSchema] | ColumnarResponse:
+    buildings = await organization_service.list_buildings_within_radius(
         latitude=latitude,
         longitude=longitude,
         radius_meters=radius_meters,
     )
+    if response_format == ResponseFormat.COLUMNAR:
+        return ColumnarResponse(encode_buildings(buildings))
+    return buildings
 
 
 @router.get(
     "/within-bounds",
     response_model=list[BuildingResponseSchema],
+    responses=COLUMNAR_RESPONSES,
 )
 async def buildings_within_bounds(
+    organization_service: OrganizationServiceDependency,
+    response_format: ResponseFormatDependency,
+    min_latitude: Annotated[float, Query(alias="minLatitude", ge=-90.0, le=90.0)],
+    max_latitude: Annotated[float, Query(alias="maxLatitude", ge=-90.0, le=90.0)],
+    min_longitude: Annotated[float, Query(alias="minLongitude", ge=-180.0, le=180.0)],
+    max_longitude: Annotated[float, Query(alias="maxLongitude", ge=-180.0, le=180.0)],
+) -> list[BuildingResponseSchema] | ColumnarResponse:
+    if min_latitude > max_latitude:
+        raise HTTPException(status_code=400, detail="minLatitude must be <= maxLatitude")
+    if min_longitude > max_longitude:
+        raise HTTPException(status_code=400, detail="minLongitude must be <= maxLongitude")
+    buildings = await organization_service.list_buildings_within_bounds(
+        min_latitude=min_latitude,
+        max_latitude=max_latitude,
+        min_longitude=min_longitude,
+        max_longitude=max_longitude,
+    )
+    if response_format == ResponseFormat.COLUMNAR:
+        return ColumnarResponse(encode_buildings(buildings))
+    return buildings
+
+
+@router.get(
+    "/clusters",
+    response_model=BuildingClustersResponseSchema,
+)
+async def building_clusters(
     organization_service: OrganizationServiceDependency,
     min_latitude: Annotated[float, Query(alias="minLatitude", ge=-90.0, le=90.0)],
     max_latitude: Annotated[float, Query(alias="maxLatitude", ge=-90.0, le=90.0)],
     min_longitude: Annotated[float, Query(alias="minLongitude", ge=-180.0, le=180.0)],
     max_longitude: Annotated[float, Query(alias="maxLongitude", ge=-180.0, le=180.0)],
-) -> list[BuildingResponseSchema]:
+    zoom: Annotated[int, Query(ge=0, le=22)],
+) -> BuildingClustersResponseSchema:
     if min_latitude > max_latitude:
         raise HTTPException(status_code=400, detail="minLatitude must be <= maxLatitude")
     if min_longitude > max_longitude:
         raise HTTPException(status_code=400, detail="minLongitude must be <= maxLongitude")
-    return await organization_service.list_buildings_within_bounds(
+    return await organization_service.cluster_buildings_within_bounds(
         min_latitude=min_latitude,
         max_latitude=max_latitude,
         min_longitude=min_longitude,
         max_longitude=max_longitude,
+        zoom=zoom,
     )
 
 
+@router.get(
+    "/tiles/{zoom}/{x}/{y}",
+    response_model=list[BuildingResponseSchema],
+    responses=COLUMNAR_RESPONSES,
+)
+async def buildings_in_tile(
+    organization_service: OrganizationServiceDependency,
+    response_format: ResponseFormatDependency,
+    zoom: Annotated[int, Path(ge=0, le=22)],
+    x: Annotated[int, Path(ge=0)],
+    y: Annotated[int, Path(ge=0)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    if x >= 2 ** zoom or y >= 2 ** zoom:
+        raise HTTPException(status_code=404, detail="Tile not found")
+    buildings = await organization_service.list_buildings_in_tile(zoom=zoom, x=x, y=y)
+    if response_format == ResponseFormat.COLUMNAR:
+        content = encode_buildings(buildings)
+    else:
+        content = _buildings_adapter.dump_json(buildings, by_alias=True)
+    headers = {
+        "ETag": f'"{hashlib.sha1(content).hexdigest()}"',
+        "Cache-Control": f"public, max-age={core_settings.TILE_CACHE_MAX_AGE_SECONDS}",
+        "Vary": "Accept",
+    }
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    if response_format == ResponseFormat.COLUMNAR:
+        return ColumnarResponse(content, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
 __all__ = ("router",)
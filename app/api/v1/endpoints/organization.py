@@ -1,13 +1,30 @@
 from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, HTTPException, Query, Response
 
-from dependecies.auth import TokenSecurityDependency
-from dependecies.organization import OrganizationServiceDependency
+from core.columnar import COLUMNAR_RESPONSES, ColumnarResponse
+from core.config import core_settings
+from dependecies.auth import AdminSecurityDependency, TokenSecurityDependency
+from dependecies.organization import (
+    OrganizationFieldsDependency,
+    OrganizationServiceDependency,
+)
+from dependecies.response_format import ResponseFormatDependency
+from enums.organization import NameSearchMode, OrganizationSortOrder
+from enums.phone_number import PhoneMatch, PhoneNumberType
+from enums.response_format import ResponseFormat
 from schemas.organization import (
     OrganizationAreaResponseSchema,
+    OrganizationBulkUpsertResponseSchema,
+    OrganizationBulkUpsertSchema,
+    OrganizationChangesResponseSchema,
+    OrganizationFacetsResponseSchema,
+    OrganizationPhoneMatchResponseSchema,
     OrganizationResponseSchema,
+    OrganizationSearchResponseSchema,
+    OrganizationTextMatchResponseSchema,
 )
+from snapshot.manager import SnapshotUnavailableError
 
 router = APIRouter(
     prefix="/organizations",
@@ -16,15 +33,158 @@ router = APIRouter(
 )
 
 
+@router.get(
+    "/search",
+    response_model=OrganizationSearchResponseSchema,
+    response_model_exclude_unset=True,
+)
+async def search_organizations(
+    organization_service: OrganizationServiceDependency,
+    fields: OrganizationFieldsDependency,
+    query: Annotated[str | None, Query(min_length=1, alias="q")] = None,
+    occupation_id: Annotated[int | None, Query(alias="occupationId")] = None,
+    include_children: Annotated[bool, Query(alias="includeChildren")] = True,
+    latitude: Annotated[float | None, Query(ge=-90.0, le=90.0)] = None,
+    longitude: Annotated[float | None, Query(ge=-180.0, le=180.0)] = None,
+    radius_meters: Annotated[float | None, Query(gt=0, alias="radiusMeters")] = None,
+    min_latitude: Annotated[float | None, Query(alias="minLatitude", ge=-90.0, le=90.0)] = None,
+    max_latitude: Annotated[float | None, Query(alias="maxLatitude", ge=-90.0, le=90.0)] = None,
+    min_longitude: Annotated[float | None, Query(alias="minLongitude", ge=-180.0, le=180.0)] = None,
+    max_longitude: Annotated[float | None, Query(alias="maxLongitude", ge=-180.0, le=180.0)] = None,
+    phone_type: Annotated[PhoneNumberType | None, Query(alias="phoneType")] = None,
+    sort: OrganizationSortOrder = OrganizationSortOrder.NAME,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> OrganizationSearchResponseSchema:
+    center = None
+    if radius_meters is not None or sort == OrganizationSortOrder.DISTANCE:
+        if latitude is None or longitude is None:
+            raise HTTPException(
+                status_code=400,
+                detail="latitude and longitude are required for radius search and distance sort",
+            )
+        center = (latitude, longitude)
+
+    bounds = None
+    bound_values = (min_latitude, max_latitude, min_longitude, max_longitude)
+    if any(value is not None for value in bound_values):
+        if any(value is None for value in bound_values):
+            raise HTTPException(
+                status_code=400,
+                detail="minLatitude, maxLatitude, minLongitude and maxLongitude must be set together",
+            )
+        if min_latitude > max_latitude:
+            raise HTTPException(status_code=400, detail="minLatitude must be <= maxLatitude")
+        if min_longitude > max_longitude:
+            raise HTTPException(status_code=400, detail="minLongitude must be <= maxLongitude")
+        bounds = {
+            "min_latitude": min_latitude,
+            "max_latitude": max_latitude,
+            "min_longitude": min_longitude,
+            "max_longitude": max_longitude,
+        }
+
+    try:
+        return await organization_service.search(
+            query=query,
+            occupation_id=occupation_id,
+            include_children=include_children,
+            bounds=bounds,
+            center=center,
+            radius_meters=radius_meters,
+            phone_type=phone_type,
+            sort=sort,
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.put(
+    "/bulk",
+    response_model=OrganizationBulkUpsertResponseSchema,
+    # Anyone can obtain the read token, so writes need the admin token.
+    dependencies=[AdminSecurityDependency],
+)
+async def bulk_upsert_organizations(
+    organization_service: OrganizationServiceDependency,
+    payload: Annotated[OrganizationBulkUpsertSchema, Body()],
+) -> OrganizationBulkUpsertResponseSchema:
+    try:
+        return await organization_service.bulk_upsert(payload.organizations)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get(
+    "/changes",
+    response_model=OrganizationChangesResponseSchema,
+)
+async def list_organization_changes(
+    organization_service: OrganizationServiceDependency,
+    since: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 500,
+) -> OrganizationChangesResponseSchema:
+    try:
+        return await organization_service.list_changes(cursor=since, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get(
+    "/facets",
+    response_model=OrganizationFacetsResponseSchema,
+)
+async def organization_facets(
+    response: Response,
+    organization_service: OrganizationServiceDependency,
+    query: Annotated[str | None, Query(min_length=1, alias="q")] = None,
+    min_latitude: Annotated[float | None, Query(alias="minLatitude", ge=-90.0, le=90.0)] = None,
+    max_latitude: Annotated[float | None, Query(alias="maxLatitude", ge=-90.0, le=90.0)] = None,
+    min_longitude: Annotated[float | None, Query(alias="minLongitude", ge=-180.0, le=180.0)] = None,
+    max_longitude: Annotated[float | None, Query(alias="maxLongitude", ge=-180.0, le=180.0)] = None,
+) -> OrganizationFacetsResponseSchema:
+    bounds = None
+    bound_values = (min_latitude, max_latitude, min_longitude, max_longitude)
+    if any(value is not None for value in bound_values):
+        if any(value is None for value in bound_values):
+            raise HTTPException(
+                status_code=400,
+                detail="minLatitude, maxLatitude, minLongitude and maxLongitude must be set together",
+            )
+        if min_latitude > max_latitude:
+            raise HTTPException(status_code=400, detail="minLatitude must be <= maxLatitude")
+        if min_longitude > max_longitude:
+            raise HTTPException(status_code=400, detail="minLongitude must be <= maxLongitude")
+        bounds = {
+            "min_latitude": min_latitude,
+            "max_latitude": max_latitude,
+            "min_longitude": min_longitude,
+            "max_longitude": max_longitude,
+        }
+
+    response.headers["Cache-Control"] = (
+        f"private, max-age={core_settings.FACETS_CACHE_TTL_SECONDS}"
+    )
+    return await organization_service.get_facets(query=query, bounds=bounds)
+
+
 @router.get(
     "/{organization_id}",
     response_model=OrganizationResponseSchema,
+    response_model_exclude_unset=True,
 )
 async def get_organization(
     organization_id: int,
     organization_service: OrganizationServiceDependency,
+    fields: OrganizationFieldsDependency,
 ) -> OrganizationResponseSchema:
-    if organization := await organization_service.get_organization(organization_id):
+    if organization := await organization_service.get_organization(
+        organization_id,
+        fields=fields,
+    ):
         return organization
     raise HTTPException(status_code=404, detail="Organization not found")
 
@@ -32,21 +192,25 @@ async def get_organization(
 @router.get(
     "/by-building/{building_id}",
     response_model=list[OrganizationResponseSchema],
+    response_model_exclude_unset=True,
 )
 async def list_by_building(
     building_id: int,
     organization_service: OrganizationServiceDependency,
+    fields: OrganizationFieldsDependency,
 ) -> list[OrganizationResponseSchema]:
-    return await organization_service.list_by_building(building_id)
+    return await organization_service.list_by_building(building_id, fields=fields)
 
 
 @router.get(
     "/by-occupation/{occupation_id}",
     response_model=list[OrganizationResponseSchema],
+    response_model_exclude_unset=True,
 )
 async def list_by_occupation(
     occupation_id: int,
     organization_service: OrganizationServiceDependency,
+    fields: OrganizationFieldsDependency,
     include_children: Annotated[bool, Query(alias="includeChildren")] = True,
     max_depth: Annotated[int | None, Query(alias="maxDepth", ge=1, le=3)] = None,
 ) -> list[OrganizationResponseSchema]:
@@ -54,57 +218,128 @@ async def list_by_occupation(
         return await organization_service.list_by_occupation_tree(
             occupation_id,
             max_depth=max_depth,
+            fields=fields,
         )
-    return await organization_service.list_by_occupation(occupation_id)
+    return await organization_service.list_by_occupation(occupation_id, fields=fields)
 
 
 @router.get(
     "/search/by-name",
     response_model=list[OrganizationResponseSchema],
+    response_model_exclude_unset=True,
 )
 async def search_by_name(
     organization_service: OrganizationServiceDependency,
-    query: Annotated[str, Query(min_length=1, alias="q")],
+    fields: OrganizationFieldsDependency,
+    query: Annotated[str, Query(min_length=1, max_length=200, alias="q")],
     limit: Annotated[int | None, Query(ge=1, le=100)] = None,
+    mode: NameSearchMode = NameSearchMode.SUBSTRING,
 ) -> list[OrganizationResponseSchema]:
-    return await organization_service.search_by_name(query, limit=limit)
+    try:
+        return await organization_service.search_by_name(
+            query,
+            limit=limit,
+            fields=fields,
+            mode=mode,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except SnapshotUnavailableError:
+        raise HTTPException(status_code=503, detail="Fuzzy search unavailable")
+
+
+@router.get(
+    "/search/full-text",
+    response_model=list[OrganizationTextMatchResponseSchema],
+    response_model_exclude_unset=True,
+)
+async def full_text_search(
+    organization_service: OrganizationServiceDependency,
+    fields: OrganizationFieldsDependency,
+    query: Annotated[str, Query(min_length=1, max_length=200, alias="q")],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[OrganizationTextMatchResponseSchema]:
+    return await organization_service.full_text_search(query, limit=limit, fields=fields)
+
+
+@router.get(
+    "/search/by-phone",
+    response_model=list[OrganizationPhoneMatchResponseSchema],
+    response_model_exclude_unset=True,
+)
+async def search_by_phone(
+    organization_service: OrganizationServiceDependency,
+    fields: OrganizationFieldsDependency,
+    number: Annotated[str, Query(min_length=1, max_length=32, alias="q")],
+    match: PhoneMatch | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[OrganizationPhoneMatchResponseSchema]:
+    # Without an explicit match, "+..." is an exact E.164 lookup and
+    # anything else matches on the trailing digits.
+    try:
+        return await organization_service.search_by_phone(
+            number,
+            match=match,
+            limit=limit,
+            fields=fields,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.get(
     "/search/within-radius",
     response_model=OrganizationAreaResponseSchema,
+    response_model_exclude_unset=True,
+    responses=COLUMNAR_RESPONSES,
 )
 async def organizations_within_radius(
     organization_service: OrganizationServiceDependency,
+    response_format: ResponseFormatDependency,
+    fields: OrganizationFieldsDependency,
     latitude: Annotated[float, Query(ge=-90.0, le=90.0)],
     longitude: Annotated[float, Query(ge=-180.0, le=180.0)],
     radius_meters: Annotated[float, Query(gt=0, alias="radiusMeters")],
-) -> OrganizationAreaResponseSchema:
-    return await organization_service.list_organizations_within_radius(
+) -> Response:
+    content = await organization_service.encode_organizations_within_radius(
         latitude=latitude,
         longitude=longitude,
         radius_meters=radius_meters,
+        fields=fields,
+        response_format=response_format,
     )
+    if response_format == ResponseFormat.COLUMNAR:
+        return ColumnarResponse(content)
+    return Response(content, media_type="application/json", headers={"Vary": "Accept"})
 
 
 @router.get(
     "/search/within-bounds",
     response_model=OrganizationAreaResponseSchema,
+    response_model_exclude_unset=True,
+    responses=COLUMNAR_RESPONSES,
 )
 async def organizations_within_bounds(
     organization_service: OrganizationServiceDependency,
+    response_format: ResponseFormatDependency,
+    fields: OrganizationFieldsDependency,
     min_latitude: Annotated[float, Query(alias="minLatitude", ge=-90.0, le=90.0)],
     max_latitude: Annotated[float, Query(alias="maxLatitude", ge=-90.0, le=90.0)],
     min_longitude: Annotated[float, Query(alias="minLongitude", ge=-180.0, le=180.0)],
     max_longitude: Annotated[float, Query(alias="maxLongitude", ge=-180.0, le=180.0)],
-) -> OrganizationAreaResponseSchema:
+) -> Response:
     if min_latitude > max_latitude:
         raise HTTPException(status_code=400, detail="minLatitude must be <= maxLatitude")
     if min_longitude > max_longitude:
         raise HTTPException(status_code=400, detail="minLongitude must be <= maxLongitude")
-    return await organization_service.list_organizations_within_bounds(
+    content = await organization_service.encode_organizations_within_bounds(
         min_latitude=min_latitude,
         max_latitude=max_latitude,
         min_longitude=min_longitude,
         max_longitude=max_longitude,
+        fields=fields,
+        response_format=response_format,
     )
+    if response_format == ResponseFormat.COLUMNAR:
+        return ColumnarResponse(content)
+    return Response(content, media_type="application/json", headers={"Vary": "Accept"})
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import math
+from collections import deque
+from collections.abc import Collection, Mapping
+from time import monotonic
+
+from starlette.routing import Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from asgi.routing import match_route_path
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts to observed latency (AIMD).
+
+    The limit grows by roughly one per window of completed requests while
+    latency stays under the target and is cut multiplicatively, at most
+    once per target interval, when it does not.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        latency_target: float,
+        backoff_ratio: float = 0.9,
+    ) -> None:
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self, timeout: float) -> bool:
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            # The slot may have been granted right as the wait timed out.
+            if waiter.done() and not waiter.cancelled():
+                return True
+            self._discard_waiter(waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake_waiters()
+            else:
+                self._discard_waiter(waiter)
+            raise
+        return True
+
+    def release(self, latency: float, *, failed: bool = False) -> None:
+        now = monotonic()
+        if failed or latency > self.latency_target:
+            if now - self._last_decrease > self.latency_target:
+                self.limit = max(self.limit * self.backoff_ratio, self.min_limit)
+                self._last_decrease = now
+        elif self.in_flight * 2 >= self.limit:
+            self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
+
+    def _discard_waiter(self, waiter: asyncio.Future[None]) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionControlMiddleware:
+    """
+    Per-route admission control with a bounded wait queue.
+
+    Requests over the route's adaptive concurrency limit wait up to
+    ``queue_timeout`` seconds for a slot; once the queue is full or the
+    wait times out they are rejected with 503 and ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        router: Router,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        latency_target: float,
+        route_limits: Mapping[str, int] | None = None,
+        exempt_prefixes: Collection[str] = (),
+    ) -> None:
+        self.app = app
+        self.router = router
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.route_limits = dict(route_limits or {})
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self.limiters: dict[str, AdaptiveLimiter] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        if (route_path := match_route_path(self.router, scope)) is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self._get_limiter(route_path)
+        if not await limiter.acquire(self.queue_timeout):
+            await self._reject(send)
+            return
+
+        status_code = 500
+        started_at = monotonic()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(monotonic() - started_at, failed=status_code >= 500)
+
+    def _get_limiter(self, route_path: str) -> AdaptiveLimiter:
+        if (limiter := self.limiters.get(route_path)) is None:
+            max_limit = self.route_limits.get(route_path, self.max_limit)
+            limiter = self.limiters[route_path] = AdaptiveLimiter(
+                initial_limit=min(self.initial_limit, max_limit),
+                min_limit=min(self.min_limit, max_limit),
+                max_limit=max_limit,
+                queue_size=self.queue_size,
+                latency_target=self.latency_target,
+            )
+        return limiter
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(math.ceil(self.queue_timeout), 1)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
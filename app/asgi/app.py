@@ -1,7 +1,15 @@
 from fastapi import APIRouter, FastAPI
+from sqlalchemy.exc import DBAPIError
 
+from api import admin, health, metrics
 from api.v1.endpoints import auth, building, organization
+from asgi.admission import AdmissionControlMiddleware
+from asgi.deadline import RequestDeadlineMiddleware, deadline_exceeded_handler
+from asgi.lifespan import lifespan
+from asgi.profiling import ProfilingMiddleware
+from asgi.tracing import TracedJSONResponse, TracingMiddleware
 from core.config import core_settings
+from core.deadline import DeadlineExceeded
 
 
 def create_app():
@@ -10,6 +18,8 @@ def create_app():
         openapi_url='/api/openapi.json',
         redoc_url='/api/redoc',
         docs_url="/api/docs",
+        lifespan=lifespan,
+        default_response_class=TracedJSONResponse,
     )
     base_router = APIRouter(prefix="/api")
     v1_router = APIRouter(prefix="/v1", tags=['v1'])
@@ -17,6 +27,43 @@ def create_app():
     v1_router.include_router(organization.router)
     v1_router.include_router(building.router)
 
+    base_router.include_router(health.router)
+    base_router.include_router(admin.router)
+    base_router.include_router(metrics.router)
     base_router.include_router(v1_router)
     app.include_router(base_router)
+
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+    app.add_exception_handler(DBAPIError, deadline_exceeded_handler)
+    # Innermost, so it runs in the request task started by the deadline middleware.
+    app.add_middleware(
+        ProfilingMiddleware,
+        interval=core_settings.PROFILER_INTERVAL_SECONDS,
+    )
+    app.add_middleware(
+        RequestDeadlineMiddleware,
+        router=app.router,
+        default_timeout=core_settings.REQUEST_TIMEOUT_SECONDS,
+        max_timeout=core_settings.REQUEST_MAX_TIMEOUT_SECONDS,
+        route_timeouts=core_settings.REQUEST_ROUTE_TIMEOUTS,
+    )
+
+    if core_settings.ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            router=app.router,
+            initial_limit=core_settings.ADMISSION_INITIAL_LIMIT,
+            min_limit=core_settings.ADMISSION_MIN_LIMIT,
+            max_limit=core_settings.ADMISSION_MAX_LIMIT,
+            queue_size=core_settings.ADMISSION_QUEUE_SIZE,
+            queue_timeout=core_settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            latency_target=core_settings.ADMISSION_LATENCY_TARGET_SECONDS,
+            route_limits=core_settings.ADMISSION_ROUTE_LIMITS,
+            exempt_prefixes=("/api/health", "/api/admin", "/api/metrics"),
+        )
+    app.add_middleware(
+        TracingMiddleware,
+        router=app.router,
+        sample_rate=core_settings.TRACING_SAMPLE_RATE,
+    )
     return app
@@ -0,0 +1,106 @@
+import asyncio
+from collections.abc import Mapping
+from time import monotonic
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
+from starlette.routing import Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from asgi.routing import match_route_path
+from core.deadline import DeadlineExceeded, request_deadline
+
+TIMEOUT_HEADER = b"x-request-timeout"
+QUERY_CANCELED_SQLSTATE = "57014"
+
+
+class RequestDeadlineMiddleware:
+    """
+    Set the request deadline and cancel the request when the client leaves.
+
+    The deadline comes from the ``X-Request-Timeout`` header (seconds),
+    capped by ``max_timeout``, or from the route's default timeout.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        router: Router,
+        default_timeout: float,
+        max_timeout: float,
+        route_timeouts: Mapping[str, float] | None = None,
+    ) -> None:
+        self.app = app
+        self.router = router
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.route_timeouts = dict(route_timeouts or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            timeout = self._get_timeout(scope)
+        except ValueError:
+            response = JSONResponse(
+                {"detail": "X-Request-Timeout must be a positive number of seconds"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        token = request_deadline.set(monotonic() + timeout)
+        try:
+            await self._run_until_disconnect(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+
+    def _get_timeout(self, scope: Scope) -> float:
+        route_path = match_route_path(self.router, scope)
+        timeout = self.route_timeouts.get(route_path, self.default_timeout)
+        for name, value in scope["headers"]:
+            if name == TIMEOUT_HEADER:
+                requested = float(value)
+                if not requested > 0:
+                    raise ValueError(value)
+                timeout = min(requested, self.max_timeout)
+        return timeout
+
+    async def _run_until_disconnect(self, scope: Scope, receive: Receive, send: Send) -> None:
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        app_task = asyncio.create_task(self.app(scope, messages.get, send))
+        disconnected = False
+
+        async def watch_disconnect() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    disconnected = True
+                    app_task.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            current_task = asyncio.current_task()
+            if current_task is not None and current_task.cancelling():
+                app_task.cancel()
+                raise
+            if not disconnected:
+                raise
+        finally:
+            watcher.cancel()
+
+
+async def deadline_exceeded_handler(request: Request, exc: Exception) -> JSONResponse:
+    if isinstance(exc, DBAPIError) and (
+        getattr(exc.orig, "sqlstate", None) != QUERY_CANCELED_SQLSTATE
+    ):
+        raise exc
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
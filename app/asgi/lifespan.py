@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from time import monotonic
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.config import core_settings
+from core.loop_monitor import start_loop_monitor, stop_loop_monitor
+from core.metrics import start_metrics_store, stop_metrics_store
+from core.offload import shutdown_executor
+from core.tracing import configure_tracing, shutdown_tracing
+from db.base import async_engine
+from db.listener import ChangeListener
+from db.settings import database_settings
+from services.organization import OrganizationService
+from snapshot.manager import start_snapshot_manager, stop_snapshot_manager
+
+logger = logging.getLogger(__name__)
+
+
+async def wait_for_database(timeout: float) -> None:
+    deadline = monotonic() + timeout
+    delay = 0.5
+    while True:
+        try:
+            async with async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+            return
+        except (OSError, SQLAlchemyError) as exc:
+            if monotonic() + delay > deadline:
+                raise
+            logger.warning("Database is not ready yet: %s", exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    configure_tracing(
+        export_path=core_settings.TRACING_EXPORT_PATH,
+        otlp_endpoint=core_settings.TRACING_OTLP_ENDPOINT,
+        service_name=core_settings.TRACING_SERVICE_NAME,
+    )
+    await start_metrics_store()
+    await start_loop_monitor(
+        core_settings.LOOP_LAG_INTERVAL_SECONDS,
+        core_settings.LOOP_STALL_THRESHOLD_SECONDS
+        if core_settings.DEBUG or core_settings.LOOP_STALL_DETECTOR_ENABLED
+        else None,
+    )
+    await wait_for_database(core_settings.READINESS_TIMEOUT_SECONDS)
+    if core_settings.SNAPSHOT_PATH:
+        await start_snapshot_manager(
+            Path(core_settings.SNAPSHOT_PATH),
+            core_settings.SNAPSHOT_REFRESH_SECONDS,
+        )
+    listener = None
+    if core_settings.CHANGE_LISTENER_ENABLED:
+        listener = ChangeListener(
+            database_settings.listen_url,
+            on_change=OrganizationService.invalidate,
+            on_reset=OrganizationService.clear_caches,
+        )
+        await listener.start()
+    app.state.change_listener = listener
+    try:
+        yield
+    finally:
+        if listener is not None:
+            await listener.stop()
+        await stop_snapshot_manager()
+        await stop_loop_monitor()
+        await stop_metrics_store()
+        await async_engine.dispose()
+        shutdown_executor()
+        shutdown_tracing()
@@ -0,0 +1,54 @@
+import asyncio
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.profiler import SamplingProfiler, profile_store
+from core.security.admin import is_admin_token
+from core.security.globals import HEADER_ADMIN_TOKEN_KEY
+
+PROFILE_HEADER = "x-profile"
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request that asks for it with ``X-Profile: 1``.
+
+    The request must also carry a valid admin token; the profile id is
+    returned in ``X-Profile-Id`` and the profile is served by the admin API.
+    """
+
+    def __init__(self, app: ASGIApp, *, interval: float) -> None:
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER) != "1" or not is_admin_token(
+            headers.get(HEADER_ADMIN_TOKEN_KEY)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(
+            f"{scope['method']} {scope['path']}",
+            interval=self.interval,
+            loop=asyncio.get_running_loop(),
+            task=asyncio.current_task(),
+        )
+        if not profile_store.try_start(profiler):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["x-profile-id"] = profiler.id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile_store.finish(profiler)
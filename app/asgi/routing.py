@@ -0,0 +1,10 @@
+from starlette.routing import Match, Router
+from starlette.types import Scope
+
+
+def match_route_path(router: Router, scope: Scope) -> str | None:
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
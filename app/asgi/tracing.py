@@ -0,0 +1,85 @@
+import random
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from asgi.routing import match_route_path
+from core import tracing
+from core.tracing import Span, current_span, parse_traceparent, start_span
+
+TRACEPARENT_HEADER = b"traceparent"
+
+
+class TracingMiddleware:
+    """
+    Open the server span of a request, continuing an incoming W3C trace.
+
+    Requests without ``traceparent`` start a new trace with probability
+    ``sample_rate``; an incoming sampling decision is always respected.
+    """
+
+    def __init__(self, app: ASGIApp, *, router: Router, sample_rate: float) -> None:
+        self.app = app
+        self.router = router
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or tracing.exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT_HEADER:
+                parent = parse_traceparent(value.decode("latin-1"))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = None, None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        route_path = match_route_path(self.router, scope) or scope["path"]
+        span = Span(
+            name=f"{scope['method']} {route_path}",
+            trace_id=trace_id or Span.new_trace_id(),
+            parent_id=parent_id,
+            kind="server",
+            attributes={
+                "http.method": scope["method"],
+                "http.route": route_path,
+                "url.path": scope["path"],
+            },
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message)["traceparent"] = span.traceparent
+            await send(message)
+
+        token = current_span.set(span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            span.end(exc)
+            raise
+        else:
+            span.end()
+        finally:
+            current_span.reset(token)
+
+
+class TracedJSONResponse(JSONResponse):
+    """
+    JSON response whose encoding shows up as a span of the request.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with start_span("response.render"):
+            return super().render(content)
@@ -0,0 +1,92 @@
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable, Iterable
+from time import monotonic
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V, frozenset[str]]] = OrderedDict()
+        self._keys_by_tag: defaultdict[str, set[K]] = defaultdict(set)
+        # Generation of the latest invalidation of each tag, oldest first, and
+        # of the latest one dropped from it to keep it within maxsize.
+        self._generation = 0
+        self._invalidated: OrderedDict[str, int] = OrderedDict()
+        self._forgotten = 0
+
+    def get(self, key: K) -> V | None:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= monotonic():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def generation(self) -> int:
+        """
+        Take before reading a value to cache, and pass to set(), which then
+        drops the value if any of its tags were invalidated during the read.
+        """
+        return self._generation
+
+    def set(
+        self,
+        key: K,
+        value: V,
+        tags: Iterable[str] = (),
+        *,
+        generation: int | None = None,
+    ) -> None:
+        tags = frozenset(tags)
+        if generation is not None and self._invalidated_since(tags, generation):
+            return
+        self._discard(key)
+        self._entries[key] = (monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._keys_by_tag[tag].add(key)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        self._generation += 1
+        keys = set()
+        for tag in tags:
+            self._invalidated[tag] = self._generation
+            self._invalidated.move_to_end(tag)
+            keys.update(self._keys_by_tag.get(tag, ()))
+        while len(self._invalidated) > self.maxsize:
+            _, self._forgotten = self._invalidated.popitem(last=False)
+        for key in keys:
+            self._discard(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._forgotten = self._generation
+        self._invalidated.clear()
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def _invalidated_since(self, tags: frozenset[str], generation: int) -> bool:
+        if self._forgotten > generation:
+            return True
+        return any(self._invalidated.get(tag, 0) > generation for tag in tags)
+
+    def _discard(self, key: K) -> None:
+        if (entry := self._entries.pop(key, None)) is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,101 @@
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+
+from fastapi import Response
+
+from schemas.organization import (
+    BuildingResponseSchema,
+    OrganizationAreaResponseSchema,
+    OrganizationResponseSchema,
+)
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.organization-search.columnar"
+COLUMNAR_MAGIC = b"OSCF"
+COLUMNAR_VERSION = 1
+COLUMNAR_RESPONSES = {200: {"content": {COLUMNAR_MEDIA_TYPE: {}}}}
+
+# magic, version, section count
+_HEADER = struct.Struct("<4sHH")
+# section tag, row count
+_SECTION = struct.Struct("<4sI")
+_MISSING_ID = -1
+
+
+class ColumnarResponse(Response):
+    media_type = COLUMNAR_MEDIA_TYPE
+
+    def __init__(self, content: bytes, headers: dict[str, str] | None = None) -> None:
+        super().__init__(content=content, headers={"Vary": "Accept", **(headers or {})})
+
+
+def _column(typecode: str, values: Iterable[int | float]) -> memoryview:
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return memoryview(column)
+
+
+def _string_column(values: Sequence[str]) -> list[bytes | memoryview]:
+    encoded = [value.encode() for value in values]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    blob = b"".join(encoded)
+    padding = b"\0" * (-len(blob) % 4)
+    return [_column("i", offsets), blob, padding]
+
+
+def _buildings_section(buildings: Sequence[BuildingResponseSchema]) -> list[bytes | memoryview]:
+    return [
+        _SECTION.pack(b"BLDG", len(buildings)),
+        _column("i", (building.id for building in buildings)),
+        _column("i", (building.organization_id for building in buildings)),
+        _column("f", (building.latitude for building in buildings)),
+        _column("f", (building.longitude for building in buildings)),
+        *_string_column([building.address for building in buildings]),
+    ]
+
+
+def _organizations_section(
+    organizations: Sequence[OrganizationResponseSchema],
+) -> list[bytes | memoryview]:
+    return [
+        _SECTION.pack(b"ORGS", len(organizations)),
+        _column("i", (organization.id for organization in organizations)),
+        _column("i", (
+            organization.building.id if organization.building else _MISSING_ID
+            for organization in organizations
+        )),
+        *_string_column([organization.name or "" for organization in organizations]),
+    ]
+
+
+def encode_buildings(buildings: Sequence[BuildingResponseSchema]) -> bytes:
+    """
+    Encode buildings as little-endian int32/float32 column buffers.
+
+    Layout: header, then a ``BLDG`` section with ids, organization ids,
+    latitudes, longitudes and an address string column (``n + 1`` int32
+    offsets followed by UTF-8 bytes padded to 4 bytes).
+    """
+    return b"".join([
+        _HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, 1),
+        *_buildings_section(buildings),
+    ])
+
+
+def encode_area(area: OrganizationAreaResponseSchema) -> bytes:
+    """
+    Encode an area response as a ``BLDG`` section followed by an ``ORGS`` section.
+
+    The ``ORGS`` section holds organization ids, building ids (``-1`` when
+    absent) and a name string column; nested phones and occupations are
+    omitted and can be fetched per organization.
+    """
+    return b"".join([
+        _HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, 2),
+        *_buildings_section(area.buildings),
+        *_organizations_section(area.organizations),
+    ])
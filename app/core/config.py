@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 
@@ -6,7 +8,87 @@ class CoreSettings(BaseSettings):
     DEBUG: bool = False
     BACKEND_PORT: int = 5000
 
+    WORKERS: int = 1
+    SERVER_LOOP: str = "uvloop"
+    SERVER_HTTP: str = "httptools"
+    WORKER_MAX_REQUESTS: int | None = None
+    WORKER_MAX_REQUESTS_JITTER: int = 0
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    READINESS_TIMEOUT_SECONDS: float = 30.0
+    READINESS_CHECK_TIMEOUT_SECONDS: float = 2.0
+
     JWT_KEY: SecretStr
+    ADMIN_TOKEN: SecretStr | None = None
+
+    TRACING_SAMPLE_RATE: float = 0.0
+    TRACING_EXPORT_PATH: str | None = None
+    TRACING_OTLP_ENDPOINT: str | None = None
+    TRACING_SERVICE_NAME: str = "organization-search-api"
+
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.25
+    # The stall detector is always on in DEBUG mode.
+    LOOP_STALL_DETECTOR_ENABLED: bool = False
+    LOOP_STALL_THRESHOLD_SECONDS: float = 0.1
+    # Shared by all workers so /metrics reports their sum; the server picks
+    # a temporary directory when WORKERS > 1 and this is unset.
+    METRICS_DIR: str | None = None
+    METRICS_SAVE_INTERVAL_SECONDS: float = 1.0
+
+    PROFILER_INTERVAL_SECONDS: float = 0.005
+    PROFILER_MAX_WINDOW_SECONDS: int = 60
+    PROFILER_MAX_ACTIVE: int = 2
+    PROFILER_STORE_SIZE: int = 20
+    # Shared by all workers so any of them can serve a finished profile;
+    # the server picks a temporary directory when WORKERS > 1 and this is unset.
+    PROFILER_STORE_DIR: str | None = None
+
+    SLOW_QUERY_THRESHOLD_SECONDS: float | None = 0.5
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 60.0
+    SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+
+    REQUEST_TIMEOUT_SECONDS: float = 10.0
+    REQUEST_MAX_TIMEOUT_SECONDS: float = 60.0
+    # Route path template -> default timeout, e.g. {"/api/v1/organizations/bulk": 60}
+    REQUEST_ROUTE_TIMEOUTS: dict[str, float] = {}
+
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_INITIAL_LIMIT: int = 20
+    ADMISSION_MIN_LIMIT: int = 2
+    ADMISSION_MAX_LIMIT: int = 200
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 1.0
+    ADMISSION_LATENCY_TARGET_SECONDS: float = 0.5
+    # Route path template -> max concurrency, e.g. {"/api/v1/organizations/bulk": 2}
+    ADMISSION_ROUTE_LIMITS: dict[str, int] = {}
+
+    FACETS_CACHE_TTL_SECONDS: int = 60
+    FACETS_CACHE_SIZE: int = 1024
+
+    ORGANIZATION_CACHE_TTL_SECONDS: int = 300
+    ORGANIZATION_CACHE_SIZE: int = 10_000
+    CHANGE_LISTENER_ENABLED: bool = True
+
+    BULK_UPSERT_CHUNK_SIZE: int = 1000
+
+    # Shorter suffixes match too many numbers to be useful for caller lookup.
+    PHONE_SUFFIX_MIN_DIGITS: int = 4
+
+    # Area results with at least this many buildings are mapped and encoded
+    # off the event loop; None keeps everything inline.
+    OFFLOAD_THRESHOLD_ROWS: int | None = 2000
+    OFFLOAD_EXECUTOR: Literal["thread", "process"] = "thread"
+    OFFLOAD_WORKERS: int = 2
+
+    CLUSTER_CELLS_PER_TILE: int = 8
+    CLUSTER_POINT_THRESHOLD: int = 500
+    CLUSTER_MAX_CELLS_PER_AXIS: int = 64
+
+    TILE_CACHE_MAX_AGE_SECONDS: int = 300
+
+    # Fuzzy name search needs the snapshot; without it searches match substrings.
+    SNAPSHOT_PATH: str | None = None
+    SNAPSHOT_REFRESH_SECONDS: float = 60.0
 
 
 core_settings = CoreSettings()
@@ -0,0 +1,22 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from typing import Any
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        payload = base64.urlsafe_b64decode(cursor + padding)
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return values
@@ -0,0 +1,17 @@
+from contextvars import ContextVar
+from time import monotonic
+
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def remaining_time() -> float | None:
+    """
+    Seconds left until the current request deadline, or None without one.
+    """
+    if (deadline := request_deadline.get()) is None:
+        return None
+    return deadline - monotonic()
@@ -0,0 +1,106 @@
+"""
+Word normalization, spelling variants and edit distance for fuzzy name search.
+
+Names are indexed under their own words plus the same words typed on the
+other keyboard layout and transliterated to Latin, so "Rjatvfybz" and
+"kofemaniya" both reach "Кофемания".
+"""
+import re
+from collections.abc import Iterator
+
+GRAM_SIZE = 3
+
+_WORD = re.compile(r"\w+")
+_TOKEN = re.compile(r"[\w\[\];',.`]+")
+_QWERTY = "qwertyuiop[]asdfghjkl;'zxcvbnm,.`"
+_JCUKEN = "йцукенгшщзхъфывапролджэячсмитьбюё"
+_QWERTY_KEYS = frozenset(_QWERTY)
+_TO_JCUKEN = str.maketrans(_QWERTY, _JCUKEN)
+_TO_QWERTY = str.maketrans(_JCUKEN, _QWERTY)
+_CYRILLIC = re.compile(r"[а-я]")
+_LATIN = re.compile(r"[a-z]")
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n",
+    "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f",
+    "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+def normalize(text: str) -> str:
+    return text.casefold().replace("ё", "е")
+
+
+def name_words(name: str) -> list[str]:
+    return _WORD.findall(normalize(name))
+
+
+def word_variants(word: str) -> set[str]:
+    variants = {word}
+    if _CYRILLIC.search(word):
+        variants.add(word.translate(_TO_QWERTY))
+        if transliterated := word.translate(_TRANSLIT):
+            variants.add(transliterated)
+    if _LATIN.search(word):
+        variants.add(word.translate(_TO_JCUKEN))
+    return variants
+
+
+def query_words(query: str) -> Iterator[str]:
+    for token in _TOKEN.findall(normalize(query)):
+        # Punctuation keys stand for letters when Cyrillic is typed on the
+        # Latin layout ("[kt," is "хлеб"), so such tokens are kept whole.
+        if _LATIN.search(token) and set(token) <= _QWERTY_KEYS:
+            yield token
+        else:
+            yield from _WORD.findall(token)
+
+
+def max_edits(word: str) -> int:
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 7:
+        return 1
+    return 2
+
+
+def grams(word: str) -> set[int]:
+    """
+    Return the padded trigrams of ``word``, each packed into one integer.
+    """
+    padded = f"\x02{word}\x03"
+    return {
+        (ord(padded[index]) << 42) | (ord(padded[index + 1]) << 21) | ord(padded[index + 2])
+        for index in range(len(padded) - GRAM_SIZE + 1)
+    }
+
+
+def bounded_distance(first: str, second: str, limit: int) -> int:
+    """
+    Return the edit distance between two words, counting an adjacent
+    transposition as one edit, or ``limit + 1`` once it exceeds ``limit``.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    before_previous: list[int] = []
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            distance = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (first_char != second_char),
+            )
+            if (
+                row > 1 and column > 1
+                and first_char == second[column - 2]
+                and first[row - 2] == second_char
+            ):
+                distance = min(distance, before_previous[column - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
@@ -0,0 +1,162 @@
+from math import asin, atan, cos, degrees, floor, pi, radians, sin, sinh, sqrt
+
+METERS_PER_DEGREE_LATITUDE = 111_320.0
+EARTH_RADIUS_METERS = 6_371_000.0
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+# Buildings are partitioned by the geohash cell of this precision.
+GEOHASH_REGION_PRECISION = 1
+
+
+def get_bounding_box(
+    latitude: float,
+    longitude: float,
+    radius_meters: float,
+) -> dict[str, float]:
+    lat_delta = radius_meters / METERS_PER_DEGREE_LATITUDE
+    lon_denominator = max(cos(radians(latitude)), 1e-6)
+    lon_delta = radius_meters / (METERS_PER_DEGREE_LATITUDE * lon_denominator)
+    return {
+        "min_latitude": max(latitude - lat_delta, -90.0),
+        "max_latitude": min(latitude + lat_delta, 90.0),
+        "min_longitude": max(longitude - lon_delta, -180.0),
+        "max_longitude": min(longitude + lon_delta, 180.0),
+    }
+
+
+def distance_between(
+    lat_a: float,
+    lon_a: float,
+    lat_b: float,
+    lon_b: float,
+) -> float:
+    lat_a_rad = radians(lat_a)
+    lat_b_rad = radians(lat_b)
+    delta_lat = radians(lat_b - lat_a)
+    delta_lon = radians(lon_b - lon_a)
+
+    a = (
+        sin(delta_lat / 2) ** 2
+        + cos(lat_a_rad) * cos(lat_b_rad) * sin(delta_lon / 2) ** 2
+    )
+    c = 2 * asin(min(1.0, sqrt(a)))
+    return EARTH_RADIUS_METERS * c
+
+
+def encode_geohash(
+    latitude: float,
+    longitude: float,
+    precision: int = GEOHASH_PRECISION,
+) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit_count = 0
+    index = 0
+    is_lon = True
+    while len(chars) < precision:
+        value, value_range = (longitude, lon_range) if is_lon else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        index <<= 1
+        if value >= middle:
+            index |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        is_lon = not is_lon
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[index])
+            bit_count = 0
+            index = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """
+    Return the (latitude, longitude) size in degrees of a geohash cell.
+    """
+    bits = 5 * precision
+    lat_bits = bits // 2
+    lon_bits = bits - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def geohash_prefix_upper_bound(prefix: str) -> str:
+    """
+    Return the smallest string greater than every string starting with ``prefix``.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def geohash_region(geohash: str) -> str:
+    return geohash[:GEOHASH_REGION_PRECISION]
+
+
+def geohash_cells_covering(
+    bounds: dict[str, float],
+    precision: int,
+) -> list[str]:
+    """
+    Return every geohash cell of ``precision`` that intersects ``bounds``.
+    """
+    lat_cells, lon_cells = _covering_cell_counts(bounds, precision)
+    lat_step, lon_step = geohash_cell_size(precision)
+    return sorted({
+        encode_geohash(
+            min(bounds["min_latitude"] + row * lat_step, bounds["max_latitude"]),
+            min(bounds["min_longitude"] + column * lon_step, bounds["max_longitude"]),
+            precision,
+        )
+        for row in range(lat_cells + 1)
+        for column in range(lon_cells + 1)
+    })
+
+
+def geohash_prefixes_covering(
+    bounds: dict[str, float],
+    max_prefixes: int = 16,
+) -> list[str]:
+    """
+    Return the longest geohash prefixes, at most ``max_prefixes``, whose cells cover ``bounds``.
+    """
+    prefixes = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_cells, lon_cells = _covering_cell_counts(bounds, precision)
+        if lat_cells * lon_cells > max_prefixes:
+            break
+        prefixes = geohash_cells_covering(bounds, precision)
+    return prefixes
+
+
+def _covering_cell_counts(bounds: dict[str, float], precision: int) -> tuple[int, int]:
+    lat_step, lon_step = geohash_cell_size(precision)
+    lat_cells = (
+        floor(bounds["max_latitude"] / lat_step)
+        - floor(bounds["min_latitude"] / lat_step)
+        + 1
+    )
+    lon_cells = (
+        floor(bounds["max_longitude"] / lon_step)
+        - floor(bounds["min_longitude"] / lon_step)
+        + 1
+    )
+    return lat_cells, lon_cells
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> dict[str, float]:
+    """
+    Return the bounds of a Web Mercator (slippy map) tile.
+    """
+    tiles = 2 ** zoom
+
+    def tile_latitude(row: int) -> float:
+        return degrees(atan(sinh(pi * (1 - 2 * row / tiles))))
+
+    return {
+        "min_latitude": tile_latitude(y + 1),
+        "max_latitude": tile_latitude(y),
+        "min_longitude": x / tiles * 360.0 - 180.0,
+        "max_longitude": (x + 1) / tiles * 360.0 - 180.0,
+    }
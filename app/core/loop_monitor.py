@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from time import monotonic
+
+from core.metrics import LOOP_LAG_SECONDS, LOOP_STALLS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoopStall:
+    stack: list[str]
+    detected_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    duration_seconds: float = 0.0
+
+
+class LoopMonitor:
+    """
+    Measure event loop lag and catch the code that blocks the loop.
+
+    A loop task wakes up every ``interval`` seconds and records how late
+    it fired. When ``stall_threshold`` is set, a watchdog thread checks
+    that the task keeps ticking and captures the loop thread's stack
+    while it is blocked for longer than the threshold.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float,
+        stall_threshold: float | None = None,
+        max_stalls: int = 50,
+    ) -> None:
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.stalls: deque[LoopStall] = deque(maxlen=max_stalls)
+        self._heartbeat = monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    async def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = monotonic()
+        self._task = asyncio.create_task(self._measure_lag(), name="loop-monitor")
+        if self.stall_threshold is not None:
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure_lag(self) -> None:
+        while True:
+            expected = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = now = monotonic()
+            LOOP_LAG_SECONDS.observe(max(now - expected, 0.0))
+
+    def _watch(self) -> None:
+        stall = None
+        stalled_since = 0.0
+        while not self._stop.wait(self.stall_threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = monotonic() - heartbeat - self.interval
+            if stall is not None and heartbeat > stalled_since:
+                stall.duration_seconds = heartbeat - stalled_since - self.interval
+                logger.warning(
+                    "Event loop was blocked for %.3fs:\n%s",
+                    stall.duration_seconds,
+                    "".join(stall.stack),
+                )
+                stall = None
+            if stall is None and blocked > self.stall_threshold:
+                if (frame := sys._current_frames().get(self._loop_thread_id)) is None:
+                    continue
+                stall = LoopStall(stack=traceback.format_stack(frame))
+                stalled_since = heartbeat
+                self.stalls.append(stall)
+                LOOP_STALLS_TOTAL.inc()
+
+
+loop_monitor: LoopMonitor | None = None
+
+
+async def start_loop_monitor(interval: float, stall_threshold: float | None) -> LoopMonitor:
+    global loop_monitor
+    loop_monitor = LoopMonitor(interval=interval, stall_threshold=stall_threshold)
+    await loop_monitor.start()
+    return loop_monitor
+
+
+async def stop_loop_monitor() -> None:
+    global loop_monitor
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+        loop_monitor = None
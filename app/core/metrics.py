@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+from core.config import core_settings
+
+logger = logging.getLogger(__name__)
+
+MetricsState = dict[str, list[float]]
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: Sequence[float]) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def state(self) -> list[float]:
+        return [*self.counts, self.total]
+
+    def render(self, state: list[float]) -> str:
+        *counts, total = state
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += int(count)
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += int(counts[-1])
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {total}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter:
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def state(self) -> list[float]:
+        return [self.value]
+
+    def render(self, state: list[float]) -> str:
+        return (
+            f"# HELP {self.name} {self.description}\n"
+            f"# TYPE {self.name} counter\n"
+            f"{self.name} {int(state[0])}\n"
+        )
+
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop timer was due and when it fired.",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+LOOP_STALLS_TOTAL = Counter(
+    "event_loop_stalls_total",
+    "Event loop stalls longer than the stall threshold.",
+)
+METRICS = (LOOP_LAG_SECONDS, LOOP_STALLS_TOTAL)
+
+
+def local_state() -> MetricsState:
+    return {metric.name: metric.state() for metric in METRICS}
+
+
+def merge_states(states: Iterable[MetricsState]) -> MetricsState:
+    merged: MetricsState = {metric.name: [0] * len(metric.state()) for metric in METRICS}
+    for state in states:
+        for name, values in state.items():
+            current = merged.get(name)
+            # Skips metrics that are gone or were saved by a build with other buckets.
+            if current is not None and len(current) == len(values):
+                merged[name] = [first + second for first, second in zip(current, values)]
+    return merged
+
+
+class MetricsStore:
+    """
+    Share metrics between the workers of one server through a directory.
+
+    Workers share one socket, so each scrape reaches one of them at random.
+    Every worker writes its state to ``<pid>.json`` once per ``interval``,
+    any worker renders the sum of all of them, and a worker that exits
+    adds its final state to ``retired.json`` so the sums never go down.
+    """
+
+    def __init__(self, directory: Path, interval: float) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._path = directory / f"{os.getpid()}.json"
+        self._retired_path = directory / "retired.json"
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # A worker that died without retiring may have had this pid.
+        with self._lock(fcntl.LOCK_EX):
+            if (previous := self._read(self._path)) is not None:
+                self._retire(previous)
+        self._task = asyncio.create_task(self._run(), name="metrics-store")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        with self._lock(fcntl.LOCK_EX):
+            self._retire(local_state())
+
+    def collect(self) -> MetricsState:
+        """
+        Sum this worker's current state with the saved states of the others.
+        """
+        with self._lock(fcntl.LOCK_SH):
+            states = [local_state()]
+            for path in self.directory.glob("*.json"):
+                if path != self._path and (state := self._read(path)) is not None:
+                    states.append(state)
+        return merge_states(states)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self._write(self._path, local_state())
+            except OSError:
+                logger.exception("Could not save metrics to %s", self._path)
+
+    def _retire(self, state: MetricsState) -> None:
+        retired = self._read(self._retired_path) or {}
+        self._write(self._retired_path, merge_states([retired, state]))
+        self._path.unlink(missing_ok=True)
+
+    def _write(self, path: Path, state: MetricsState) -> None:
+        tmp_path = self.directory / f".{path.stem}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read(path: Path) -> MetricsState | None:
+        try:
+            return json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @contextlib.contextmanager
+    def _lock(self, operation: int) -> Iterator[None]:
+        # Retiring writes retired.json before removing <pid>.json; the lock
+        # keeps a scrape from counting the worker in both or in neither.
+        with open(self.directory / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            yield
+
+
+metrics_store: MetricsStore | None = None
+
+
+async def start_metrics_store() -> None:
+    global metrics_store
+    if core_settings.METRICS_DIR is None:
+        return
+    metrics_store = MetricsStore(
+        Path(core_settings.METRICS_DIR),
+        core_settings.METRICS_SAVE_INTERVAL_SECONDS,
+    )
+    await metrics_store.start()
+
+
+async def stop_metrics_store() -> None:
+    global metrics_store
+    if metrics_store is not None:
+        await metrics_store.stop()
+        metrics_store = None
+
+
+def render_metrics() -> str:
+    state = metrics_store.collect() if metrics_store is not None else local_state()
+    return "".join(metric.render(state[metric.name]) for metric in METRICS)
@@ -0,0 +1,45 @@
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from core.config import core_settings
+
+T = TypeVar("T")
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if core_settings.OFFLOAD_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=core_settings.OFFLOAD_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=core_settings.OFFLOAD_WORKERS,
+                thread_name_prefix="offload",
+            )
+    return _executor
+
+
+def should_offload(rows: int) -> bool:
+    threshold = core_settings.OFFLOAD_THRESHOLD_ROWS
+    return threshold is not None and rows >= threshold
+
+
+async def run_offloaded(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run ``func`` in the offload pool; with a process pool, ``func`` and its
+    arguments must be picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+from collections import Counter, deque
+from datetime import UTC, datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from core.config import core_settings
+
+_PROFILE_ID = re.compile(r"[0-9a-f]{16}")
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of one thread from a background thread.
+
+    With ``task`` set, only samples taken while that asyncio task is
+    running on ``loop`` are kept, so concurrent requests sharing the event
+    loop do not end up in each other's profiles.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        interval: float,
+        thread_id: int | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        task: asyncio.Task | None = None,
+    ) -> None:
+        self.id = secrets.token_hex(8)
+        self.name = name
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.loop = loop
+        self.task = task
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self.started_at = datetime.now(UTC)
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = (datetime.now(UTC) - self.started_at).total_seconds()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                continue
+            self.samples[_fold(frame)] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "interval": self.interval,
+            "started_at": self.started_at.isoformat(),
+            "duration": self.duration,
+            "samples": [[list(stack), count] for stack, count in self.samples.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SamplingProfiler":
+        profiler = cls(data["name"], interval=data["interval"])
+        profiler.id = data["id"]
+        profiler.started_at = datetime.fromisoformat(data["started_at"])
+        profiler.duration = data["duration"]
+        profiler.samples = Counter({tuple(stack): count for stack, count in data["samples"]})
+        return profiler
+
+    def to_collapsed(self) -> str:
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self.samples.most_common()
+        )
+
+    def to_speedscope(self) -> dict[str, Any]:
+        frame_index: dict[str, int] = {}
+        samples = []
+        weights = []
+        for stack, count in self.samples.items():
+            samples.append([frame_index.setdefault(frame, len(frame_index)) for frame in stack])
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": frame} for frame in frame_index]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": self.name,
+            "exporter": "organization-search-api",
+        }
+
+
+def _fold(frame: FrameType | None) -> tuple[str, ...]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(
+            f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class ProfileStore:
+    """
+    Keep the last ``size`` finished profiles.
+
+    With ``directory`` set, finished profiles are also written there, so
+    any worker sharing the directory can serve them.
+    """
+
+    def __init__(self, size: int, max_active: int, directory: Path | None = None) -> None:
+        self.profiles: deque[SamplingProfiler] = deque(maxlen=size)
+        self.size = size
+        self.max_active = max_active
+        self.directory = directory
+        self.active = 0
+
+    def try_start(self, profiler: SamplingProfiler) -> bool:
+        if self.active >= self.max_active:
+            return False
+        self.active += 1
+        profiler.start()
+        return True
+
+    def finish(self, profiler: SamplingProfiler) -> None:
+        profiler.stop()
+        self.active -= 1
+        self.profiles.append(profiler)
+        if self.directory is not None:
+            self._save(profiler)
+
+    def get(self, profile_id: str) -> SamplingProfiler | None:
+        for profiler in self.profiles:
+            if profiler.id == profile_id:
+                return profiler
+        if self.directory is None or not _PROFILE_ID.fullmatch(profile_id):
+            return None
+        return self._load(self.directory / f"{profile_id}.json")
+
+    def recent(self) -> list[SamplingProfiler]:
+        """
+        Return the finished profiles, newest first.
+        """
+        if self.directory is None:
+            return list(reversed(self.profiles))
+        profiles = (self._load(path) for path in self._saved_paths()[:self.size])
+        return [profiler for profiler in profiles if profiler is not None]
+
+    def _save(self, profiler: SamplingProfiler) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f".{profiler.id}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(profiler.to_dict()))
+        os.replace(tmp_path, self.directory / f"{profiler.id}.json")
+        for path in self._saved_paths()[self.size:]:
+            path.unlink(missing_ok=True)
+
+    def _saved_paths(self) -> list[Path]:
+        paths = []
+        for path in self.directory.glob("*.json"):
+            try:
+                paths.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(paths, reverse=True)]
+
+    @staticmethod
+    def _load(path: Path) -> SamplingProfiler | None:
+        try:
+            return SamplingProfiler.from_dict(json.loads(path.read_text()))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+
+profile_store = ProfileStore(
+    size=core_settings.PROFILER_STORE_SIZE,
+    max_active=core_settings.PROFILER_MAX_ACTIVE,
+    directory=Path(core_settings.PROFILER_STORE_DIR) if core_settings.PROFILER_STORE_DIR else None,
+)
@@ -0,0 +1,30 @@
+import secrets
+from typing import Optional
+
+from fastapi import HTTPException, Security
+from fastapi.security import APIKeyHeader
+from starlette import status
+
+from core.config import core_settings
+from core.security.globals import HEADER_ADMIN_TOKEN_KEY
+
+
+def is_admin_token(token: str | None) -> bool:
+    if core_settings.ADMIN_TOKEN is None or not token:
+        return False
+    return secrets.compare_digest(
+        token.encode(),
+        core_settings.ADMIN_TOKEN.get_secret_value().encode(),
+    )
+
+
+async def verify_admin_token(
+        admin_token: Optional[str] = Security(
+            APIKeyHeader(name=HEADER_ADMIN_TOKEN_KEY, auto_error=False),
+        )
+) -> None:
+    # Admin endpoints do not exist unless an admin token is configured.
+    if core_settings.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if not is_admin_token(admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
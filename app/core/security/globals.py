@@ -3,3 +3,4 @@ from datetime import timedelta
 SESSION_EXPIRE_IN = timedelta(days=1)
 TOKEN_EXPIRES_IN = timedelta(days=1)
 HEADER_TOKEN_KEY = 'Access-Token'
+HEADER_ADMIN_TOKEN_KEY = 'Admin-Token'
@@ -8,6 +8,7 @@ from starlette import status
 
 from core.config import core_settings
 from core.security.globals import HEADER_TOKEN_KEY
+from core.tracing import traced
 from schemas.token import TokenSchema
 
 
@@ -36,6 +37,7 @@ def issue_token(subject: Optional[str] = None) -> tuple[str, TokenSchema]:
     return token, payload
 
 
+@traced("auth.get_token")
 async def get_token(
         access_token: Optional[str] = Security(
             APIKeyHeader(name=HEADER_TOKEN_KEY, auto_error=False),
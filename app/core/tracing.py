@@ -0,0 +1,253 @@
+import functools
+import inspect
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: str | None = None
+    kind: str = "internal"
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return secrets.token_hex(16)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def child(self, name: str, *, kind: str = "internal", **attributes: Any) -> "Span":
+        return Span(
+            name=name,
+            trace_id=self.trace_id,
+            parent_id=self.span_id,
+            kind=kind,
+            attributes=attributes,
+        )
+
+    def end(self, exc: BaseException | None = None) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{type(exc).__name__}: {exc}"
+        if exporter is not None:
+            exporter.export(self)
+
+
+def parse_traceparent(value: str) -> tuple[str, str, bool] | None:
+    parts = value.strip().split("-")
+    if len(parts) != 4 or parts[0] == "ff":
+        return None
+    _, trace_id, parent_id, flags = parts
+    try:
+        sampled = bool(int(flags, 16) & 1)
+        int(trace_id, 16), int(parent_id, 16)
+    except ValueError:
+        return None
+    if len(trace_id) != 32 or len(parent_id) != 16 or not int(trace_id, 16):
+        return None
+    return trace_id, parent_id, sampled
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """
+    Open a child of the current span; a no-op outside a sampled trace.
+    """
+    if (parent := current_span.get()) is None:
+        yield None
+        return
+    span = parent.child(name, **attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.end(exc)
+        raise
+    else:
+        span.end()
+    finally:
+        current_span.reset(token)
+
+
+def traced(name: str) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if current_span.get() is None:
+                return await func(*args, **kwargs)
+            with start_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(cls: type) -> None:
+    """
+    Wrap the public coroutine methods defined on ``cls`` in spans.
+    """
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.iscoroutinefunction(value):
+            continue
+        setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+
+
+class SpanExporter(ABC):
+    """
+    Export finished spans in batches from a background thread.
+    """
+
+    def __init__(self, *, batch_size: int = 512, interval: float = 2.0, max_queue: int = 10_000) -> None:
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=self.interval * 2)
+
+    @abstractmethod
+    def write(self, spans: list[Span]) -> None:
+        pass
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            spans = []
+            deadline = time.monotonic() + self.interval
+            while len(spans) < self.batch_size:
+                try:
+                    span = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if span is None:
+                    running = False
+                    break
+                spans.append(span)
+            if spans:
+                try:
+                    self.write(spans)
+                except Exception:
+                    logger.exception("Could not export %d spans", len(spans))
+
+
+class FileSpanExporter(SpanExporter):
+    def __init__(self, path: Path, **options: Any) -> None:
+        self.path = path
+        super().__init__(**options)
+
+    def write(self, spans: list[Span]) -> None:
+        with self.path.open("a", encoding="utf-8") as file:
+            for span in spans:
+                file.write(json.dumps(span.__dict__, default=str, ensure_ascii=False) + "\n")
+
+
+class OtlpSpanExporter(SpanExporter):
+    """
+    Send spans to an OTLP/HTTP collector using the JSON encoding.
+    """
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str, service_name: str, **options: Any) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        super().__init__(**options)
+
+    def write(self, spans: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "organization-search"},
+                    "spans": [self._to_otlp(span) for span in spans],
+                }],
+            }],
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+
+    def _to_otlp(self, span: Span) -> dict[str, Any]:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self.KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+exporter: SpanExporter | None = None
+
+
+def configure_tracing(
+    *,
+    export_path: str | None,
+    otlp_endpoint: str | None,
+    service_name: str,
+) -> None:
+    global exporter
+    if otlp_endpoint:
+        exporter = OtlpSpanExporter(otlp_endpoint, service_name)
+    elif export_path:
+        exporter = FileSpanExporter(Path(export_path))
+
+
+def shutdown_tracing() -> None:
+    global exporter
+    if exporter is not None:
+        exporter.shutdown()
+        exporter = None
@@ -1,5 +1,28 @@
 from sqlalchemy.ext.asyncio import create_async_engine
 
+from core.config import core_settings
 from db.settings import database_settings
+from db.slow_queries import install_slow_query_log
+from db.tracing import TracedQueuePool, install_query_tracing
 
-async_engine = create_async_engine(database_settings.async_url)
+async_engine = create_async_engine(
+    database_settings.async_url,
+    # One connection per worker stays out of the pool: the change listener's,
+    # which readiness checks share, or else the checks' own.
+    pool_size=database_settings.pool_size(core_settings.WORKERS, reserved=1),
+    max_overflow=0,
+    poolclass=TracedQueuePool,
+    pool_timeout=database_settings.POOL_TIMEOUT_SECONDS,
+    pool_pre_ping=True,
+)
+
+if core_settings.SLOW_QUERY_THRESHOLD_SECONDS is not None:
+    install_slow_query_log(
+        async_engine,
+        threshold=core_settings.SLOW_QUERY_THRESHOLD_SECONDS,
+        size=core_settings.SLOW_QUERY_LOG_SIZE,
+        explain_interval=core_settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+        explain_analyze=core_settings.SLOW_QUERY_EXPLAIN_ANALYZE,
+    )
+
+install_query_tracing(async_engine)
@@ -0,0 +1,205 @@
+"""
+Export the organization directory into compressed shards.
+
+    python -m db.export OUTPUT_DIR [--format ndjson|csv] [--shard-rows N]
+                                   [--since PREVIOUS_MANIFEST | --since XID]
+
+Rows are streamed from a server-side cursor inside one repeatable-read
+transaction, so memory stays bounded by the fetch batch and the current
+shard's compressor. ``manifest.json`` lists every shard with its row
+count and SHA-256; its ``horizon`` passed back as ``--since`` exports only
+organizations changed afterwards, plus the ids deleted in the meantime.
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from db.session import Session
+from repositories import OrganizationRepository
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CSV_COLUMNS = ("id", "name", "address", "latitude", "longitude", "phones", "occupations")
+
+
+class _HashingWriter(io.RawIOBase):
+    def __init__(self, file: BinaryIO) -> None:
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+
+class ShardWriter:
+    """
+    Write rows into gzip shards of at most ``shard_rows`` rows each.
+    """
+
+    def __init__(self, directory: Path, prefix: str, export_format: str, shard_rows: int) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.export_format = export_format
+        self.shard_rows = shard_rows
+        self.shards: list[dict[str, Any]] = []
+        self.columns: Sequence[str] = CSV_COLUMNS
+        self._file: BinaryIO | None = None
+        self._hashing: _HashingWriter | None = None
+        self._gzip: gzip.GzipFile | None = None
+        self._text: io.TextIOWrapper | None = None
+        self._csv = None
+        self._rows = 0
+
+    def write(self, record: dict[str, Any]) -> None:
+        if self._text is None or self._rows >= self.shard_rows:
+            self._open_shard()
+        if self._csv is not None:
+            self._csv.writerow([_csv_value(record[column]) for column in self.columns])
+        else:
+            self._text.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            self._text.write("\n")
+        self._rows += 1
+
+    def close(self) -> None:
+        if self._text is None:
+            return
+        self._text.close()
+        self._gzip.close()
+        self._file.close()
+        self.shards[-1].update(
+            rows=self._rows,
+            bytes=self._hashing.size,
+            sha256=self._hashing.sha256.hexdigest(),
+        )
+        self._text = self._csv = None
+
+    def _open_shard(self) -> None:
+        self.close()
+        name = f"{self.prefix}-{len(self.shards):05d}.{self.export_format}.gz"
+        self.shards.append({"file": name})
+        self._file = open(self.directory / name, "wb")
+        self._hashing = _HashingWriter(self._file)
+        # mtime=0 keeps shards with identical rows byte-identical.
+        self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=self._hashing, mtime=0)
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8", newline="")
+        self._csv = None
+        if self.export_format == "csv":
+            self._csv = csv.writer(self._text)
+            self._csv.writerow(self.columns)
+        self._rows = 0
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return "" if value is None else value
+
+
+def _read_since(value: str) -> int:
+    path = Path(value)
+    if path.is_dir():
+        path = path / MANIFEST_NAME
+    if path.is_file():
+        return int(json.loads(path.read_text())["horizon"])
+    try:
+        return int(value)
+    except ValueError:
+        raise SystemExit(f"--since must be a manifest path or a transaction id: {value}")
+
+
+async def export(
+    output_dir: Path,
+    *,
+    export_format: str,
+    shard_rows: int,
+    since_xid: int | None = None,
+    batch_size: int = 1000,
+) -> dict[str, Any]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    organizations = ShardWriter(output_dir, "organizations", export_format, shard_rows)
+    deletions = ShardWriter(output_dir, "deletions", export_format, shard_rows)
+    deletions.columns = ("id",)
+
+    async with Session() as session:
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        repository = OrganizationRepository(session)
+        # Every transaction below the horizon is visible to this snapshot,
+        # so the next export can start from it without missing commits.
+        horizon = await repository.get_xid_horizon()
+        try:
+            async for rows in repository.iter_export(since_xid=since_xid, batch_size=batch_size):
+                for row in rows:
+                    organizations.write({
+                        "id": row.id,
+                        "name": row.name,
+                        "address": row.address,
+                        "latitude": row.latitude,
+                        "longitude": row.longitude,
+                        "phones": row.phones or [],
+                        "occupations": row.occupations or [],
+                    })
+            if since_xid is not None:
+                async for rows in repository.iter_deleted_ids(since_xid=since_xid):
+                    for row in rows:
+                        deletions.write({"id": row.id})
+        finally:
+            organizations.close()
+            deletions.close()
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "format": export_format,
+        "created_at": datetime.now(UTC).isoformat(),
+        "since": since_xid,
+        "horizon": horizon,
+        "organizations": organizations.shards,
+        "deletions": deletions.shards,
+    }
+    tmp_path = output_dir / f".{MANIFEST_NAME}.{os.getpid()}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, output_dir / MANIFEST_NAME)
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m db.export", description=__doc__.split("\n\n")[0])
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--format", dest="export_format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--shard-rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--since",
+        help="manifest (or its directory) of a previous export, or a transaction id",
+    )
+    args = parser.parse_args()
+    if args.shard_rows < 1 or args.batch_size < 1:
+        parser.error("--shard-rows and --batch-size must be positive")
+
+    manifest = asyncio.run(export(
+        args.output_dir,
+        export_format=args.export_format,
+        shard_rows=args.shard_rows,
+        since_xid=_read_since(args.since) if args.since else None,
+        batch_size=args.batch_size,
+    ))
+    rows = sum(shard["rows"] for shard in manifest["organizations"])
+    print(f"Exported {rows} organizations into {len(manifest['organizations'])} shards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import contextlib
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+CHANGES_CHANNEL = "organization_search_changes"
+
+
+@dataclass(frozen=True, slots=True)
+class DataChange:
+    table: str
+    operation: str
+    # None means any row of the table may have changed.
+    ids: frozenset[int] | None
+
+
+class ChangeListener:
+    """
+    Listen for data change notifications on a dedicated asyncpg connection.
+
+    ``on_reset`` is called after every (re)connect, since notifications
+    sent while the connection was down are lost.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        on_change: Callable[[DataChange], None],
+        on_reset: Callable[[], None],
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self.dsn = dsn
+        self.on_change = on_change
+        self.on_reset = on_reset
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._connection: asyncpg.Connection | None = None
+        self._ping_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="change-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def ping(self) -> bool:
+        """
+        Run a query on the listening connection, which readiness checks use
+        instead of waiting for a connection from a busy request pool.
+        """
+        if self._connection is None or self._connection.is_closed():
+            return False
+        # asyncpg runs one query at a time per connection.
+        async with self._ping_lock:
+            await self._connection.fetchval("SELECT 1")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("Change listener disconnected: %s", exc)
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        try:
+            await connection.add_listener(CHANGES_CHANNEL, self._handle_notification)
+            self._connection = connection
+            self.connected = True
+            self.on_reset()
+            await closed.wait()
+        finally:
+            self.connected = False
+            self._connection = None
+            if not connection.is_closed():
+                await connection.close()
+
+    def _handle_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            ids = data.get("ids")
+            change = DataChange(
+                table=data["table"],
+                operation=data["op"],
+                ids=frozenset(ids) if ids is not None else None,
+            )
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Malformed change notification: %r", payload)
+            return
+        try:
+            self.on_change(change)
+        except Exception:
+            logger.exception("Change handler failed for %s", change)
@@ -1,10 +1,66 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import Annotated
 
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session as SyncSession
+
+from core.deadline import DeadlineExceeded, remaining_time
 from db.base import async_engine
 
-Session = async_sessionmaker(async_engine)
+
+class DeadlineSession(SyncSession):
+    pass
+
+
+@event.listens_for(DeadlineSession, "after_begin")
+def apply_request_deadline(session, transaction, connection) -> None:
+    if (remaining := remaining_time()) is None:
+        return
+    if remaining <= 0:
+        raise DeadlineExceeded()
+    # Transaction-local, so it is reset before the connection returns to the pool.
+    connection.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": f"{max(int(remaining * 1000), 1)}ms"},
+    )
+
+
+Session = async_sessionmaker(async_engine, sync_session_class=DeadlineSession)
+
+
+class SessionProvider:
+    """
+    Create the request's session the first time something asks for it.
+
+    The session itself only checks out a connection when its first
+    statement runs, so requests answered from a cache or that never reach
+    a repository do not touch the pool at all.
+    """
+
+    def __init__(self, factory: async_sessionmaker[AsyncSession] = Session) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+
+async def get_session_provider():
+    provider = SessionProvider()
+    try:
+        yield provider
+    finally:
+        await provider.close()
 
 
-async def get_session():
-    async with Session() as session:
-        yield session
+async def get_session(provider: Annotated[SessionProvider, Depends(get_session_provider)]):
+    yield provider.session
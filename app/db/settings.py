@@ -10,6 +10,9 @@ class DatabaseSettings(BaseSettings):
     POSTGRES_HOST: str = "database"
     ENGINE: str = "postgresql"
 
+    POSTGRES_CONNECTION_BUDGET: int = 20
+    POOL_TIMEOUT_SECONDS: float = 30.0
+
     @property
     def url_template(self) -> str:
         return "{engine}://{user}:{password}@{host}:{port}/{database}"
@@ -36,5 +39,25 @@ class DatabaseSettings(BaseSettings):
             database=self.POSTGRES_DB,
         )
 
+    @property
+    def listen_url(self) -> str:
+        return self.url_template.format(
+            engine="postgresql",
+            user=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD.get_secret_value(),
+            host=self.POSTGRES_HOST,
+            port=self.POSTGRES_PORT,
+            database=self.POSTGRES_DB,
+        )
+
+    def pool_size(self, workers: int, *, reserved: int = 0) -> int:
+        """
+        Split the global connection budget evenly across worker processes.
+
+        ``reserved`` connections per worker are kept out of the pool for
+        dedicated connections such as the change listener.
+        """
+        return max(self.POSTGRES_CONNECTION_BUDGET // max(workers, 1) - reserved, 1)
+
 
 database_settings = DatabaseSettings()
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import re
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from time import monotonic
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger("slow_queries")
+
+SKIP_OPTION = "skip_slow_query_log"
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\$\d+(?:\s*,\s*\$\d+)+")
+
+
+def normalize_statement(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    # Expanded IN lists differ in length from call to call.
+    return _PLACEHOLDER_LIST.sub("$n, ...", statement)
+
+
+def parameter_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, str):
+        return f"str[{len(value)}]"
+    return type(value).__name__
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameter_shapes: list[str]
+    duration_ms: float
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    plan: Any = None
+
+
+class SlowQueryLog:
+    """
+    Keep the most recent slow statements and their plans in memory.
+
+    Plans are captured on a separate connection, at most once per
+    ``explain_interval`` seconds for the same normalized statement and
+    one at a time, so a burst of slow queries cannot flood the database
+    with EXPLAINs.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float,
+        size: int,
+        explain_interval: float,
+        explain_analyze: bool = False,
+    ) -> None:
+        self.threshold = threshold
+        self.explain_interval = explain_interval
+        self.explain_analyze = explain_analyze
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self._engine: AsyncEngine | None = None
+        self._explained_at: dict[str, float] = {}
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def install(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn: Connection, cursor, statement, parameters, context, executemany):
+        context.slow_query_started_at = monotonic()
+
+    def _after_execute(self, conn: Connection, cursor, statement, parameters, context, executemany):
+        duration = monotonic() - context.slow_query_started_at
+        if duration < self.threshold or conn.get_execution_options().get(SKIP_OPTION):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        entry = SlowQuery(
+            statement=normalize_statement(statement),
+            parameter_shapes=[parameter_shape(value) for value in _as_sequence(parameters)],
+            duration_ms=round(duration * 1000, 3),
+        )
+        self.entries.append(entry)
+        logger.warning(json.dumps(asdict(entry), default=str, ensure_ascii=False))
+        if not executemany and self._should_explain(entry):
+            self._schedule_explain(entry, statement, parameters)
+
+    def _should_explain(self, entry: SlowQuery) -> bool:
+        if self._engine is None or self._explaining:
+            return False
+        if not entry.statement.lstrip("( ").upper().startswith(("SELECT", "WITH")):
+            return False
+        now = monotonic()
+        if len(self._explained_at) > 1000:
+            self._explained_at.clear()
+        if now - self._explained_at.get(entry.statement, -self.explain_interval) < self.explain_interval:
+            return False
+        self._explained_at[entry.statement] = now
+        return True
+
+    def _schedule_explain(self, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explaining = True
+        task = loop.create_task(self._explain(entry, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if self.explain_analyze else "FORMAT JSON"
+        try:
+            async with self._engine.connect() as connection:
+                connection = await connection.execution_options(**{SKIP_OPTION: True})
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN ({options}) {statement}",
+                    parameters,
+                )
+                plan = result.scalar_one()
+                await connection.rollback()
+            entry.plan = json.loads(plan) if isinstance(plan, str) else plan
+            logger.warning(json.dumps(asdict(entry), default=str, ensure_ascii=False))
+        except Exception:
+            logger.exception("Could not explain slow query")
+        finally:
+            self._explaining = False
+
+
+def _as_sequence(parameters: Any) -> Sequence[Any]:
+    if isinstance(parameters, dict):
+        return list(parameters.values())
+    return parameters or ()
+
+
+slow_query_log: SlowQueryLog | None = None
+
+
+def install_slow_query_log(engine: AsyncEngine, **options: Any) -> SlowQueryLog:
+    global slow_query_log
+    slow_query_log = SlowQueryLog(**options)
+    slow_query_log.install(engine)
+    return slow_query_log
@@ -0,0 +1,47 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from core.tracing import current_span, start_span
+from db.slow_queries import normalize_statement
+
+MAX_STATEMENT_LENGTH = 2000
+
+
+class TracedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Time connection checkouts, which wait while the pool is exhausted.
+
+    The pool's checkout event fires only once a connection is handed out,
+    so the span wraps connect() instead; it includes the pre-ping.
+    """
+
+    def connect(self) -> PoolProxiedConnection:
+        with start_span("db.pool.checkout", **{"db.pool.checked_out": self.checkedout()}):
+            return super().connect()
+
+
+def install_query_tracing(engine: AsyncEngine) -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_query_span(conn, cursor, statement, parameters, context, executemany):
+        if (parent := current_span.get()) is None:
+            return
+        context.trace_span = parent.child(
+            "db.query",
+            kind="client",
+            **{
+                "db.system": "postgresql",
+                "db.statement": normalize_statement(statement)[:MAX_STATEMENT_LENGTH],
+            },
+        )
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def end_query_span(conn, cursor, statement, parameters, context, executemany):
+        if (span := getattr(context, "trace_span", None)) is not None:
+            span.end()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def fail_query_span(exception_context):
+        context = exception_context.execution_context
+        if (span := getattr(context, "trace_span", None)) is not None:
+            span.end(exception_context.original_exception)
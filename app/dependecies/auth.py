@@ -2,6 +2,7 @@ from typing import Annotated
 
 from fastapi import Depends, Security
 
+from core.security.admin import verify_admin_token
 from core.security.token import get_token
 from schemas.token import TokenSchema
 from services.auth import AuthService
@@ -17,3 +18,5 @@ CurrentTokenDependency = Annotated[
 ]
 
 TokenSecurityDependency = Security(get_token)
+
+AdminSecurityDependency = Security(verify_admin_token)
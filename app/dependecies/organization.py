@@ -1,10 +1,36 @@
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Query
 
+from enums.organization import OrganizationField
 from services.organization import OrganizationService
 
 OrganizationServiceDependency = Annotated[
     OrganizationService,
     Depends(OrganizationService.get_service),
 ]
+
+
+def get_organization_fields(
+    fields: Annotated[
+        str | None,
+        Query(description="Comma-separated subset of: " + ", ".join(OrganizationField)),
+    ] = None,
+) -> frozenset[OrganizationField] | None:
+    if fields is None:
+        return None
+    selected = {OrganizationField.ID}
+    for item in fields.split(","):
+        if not (item := item.strip()):
+            continue
+        try:
+            selected.add(OrganizationField(item))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {item}")
+    return frozenset(selected)
+
+
+OrganizationFieldsDependency = Annotated[
+    frozenset[OrganizationField] | None,
+    Depends(get_organization_fields),
+]
@@ -0,0 +1,26 @@
+from typing import Annotated
+
+from fastapi import Depends, Header, Response
+
+from core.columnar import COLUMNAR_MEDIA_TYPE
+from enums.response_format import ResponseFormat
+
+
+def get_response_format(
+    response: Response,
+    accept: Annotated[str | None, Header()] = None,
+) -> ResponseFormat:
+    response.headers["Vary"] = "Accept"
+    media_types = {
+        item.split(";", 1)[0].strip().lower()
+        for item in (accept or "").split(",")
+    }
+    if COLUMNAR_MEDIA_TYPE in media_types:
+        return ResponseFormat.COLUMNAR
+    return ResponseFormat.JSON
+
+
+ResponseFormatDependency = Annotated[
+    ResponseFormat,
+    Depends(get_response_format),
+]
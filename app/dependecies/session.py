@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.session import get_session
+from db.session import SessionProvider, get_session, get_session_provider
 
 SessionDependency = Annotated[AsyncSession, Depends(get_session)]
+SessionProviderDependency = Annotated[SessionProvider, Depends(get_session_provider)]
@@ -0,0 +1,7 @@
+from enum import auto
+from enums.base import SameCaseStrEnum
+
+
+class ChangeOperation(SameCaseStrEnum):
+    UPSERT = auto()
+    DELETE = auto()
@@ -0,0 +1,21 @@
+from enum import auto
+from enums.base import SameCaseStrEnum
+
+
+class OrganizationSortOrder(SameCaseStrEnum):
+    NAME = auto()
+    ID = auto()
+    DISTANCE = auto()
+
+
+class NameSearchMode(SameCaseStrEnum):
+    SUBSTRING = auto()
+    FUZZY = auto()
+
+
+class OrganizationField(SameCaseStrEnum):
+    ID = "id"
+    NAME = "name"
+    BUILDING = "building"
+    OCCUPATIONS = "occupations"
+    PHONES = "phones"
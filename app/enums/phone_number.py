@@ -6,3 +6,8 @@ class PhoneNumberType(SameCaseStrEnum):
     WORK = auto()
     MOBILE = auto()
     FAX = auto()
+
+
+class PhoneMatch(SameCaseStrEnum):
+    EXACT = auto()
+    SUFFIX = auto()
@@ -0,0 +1,7 @@
+from enum import auto
+from enums.base import SameCaseStrEnum
+
+
+class ProfileFormat(SameCaseStrEnum):
+    COLLAPSED = auto()
+    SPEEDSCOPE = auto()
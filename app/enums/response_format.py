@@ -0,0 +1,7 @@
+from enum import auto
+from enums.base import SameCaseStrEnum
+
+
+class ResponseFormat(SameCaseStrEnum):
+    JSON = auto()
+    COLUMNAR = auto()
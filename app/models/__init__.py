@@ -1 +1 @@
-from . import (organization, occupation, phone_number, assoc, building)
+from . import (organization, occupation, phone_number, assoc, building, tombstone)
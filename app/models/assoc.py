@@ -14,6 +14,7 @@ organization_occupations = Table(
         "occupation_id",
         ForeignKey("occupations.id", ondelete="RESTRICT"),
         primary_key=True,
+        index=True,
     ),
     UniqueConstraint("org_id", "occupation_id", name="uq_org_occ"),
 )
@@ -1,29 +1,43 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, CheckConstraint
+from sqlalchemy import ForeignKey, Index, String, CheckConstraint, UniqueConstraint, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from core.geo import GEOHASH_PRECISION, GEOHASH_REGION_PRECISION, encode_geohash, geohash_region
 from models.base import DBModel
-from models.mixins import CreatedAtMixin
+from models.mixins import CreatedAtMixin, UpdatedAtMixin
 
 if TYPE_CHECKING:
     from models.user import User
 
 
-class Building(DBModel, CreatedAtMixin):
+class Building(DBModel, CreatedAtMixin, UpdatedAtMixin):
     __tablename__ = "buildings"
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     address: Mapped[str] = mapped_column(String(200), nullable=False)
 
     latitude:  Mapped[float] = mapped_column(nullable=False)
     longitude: Mapped[float] = mapped_column(nullable=False)
+    geohash: Mapped[str] = mapped_column(
+        String(GEOHASH_PRECISION, collation="C"),
+        nullable=False,
+        index=True,
+    )
+    # Partition key when the buildings table is partitioned by region, so
+    # it is part of every unique key, the primary key included.
+    region: Mapped[str] = mapped_column(
+        String(GEOHASH_REGION_PRECISION, collation="C"),
+        primary_key=True,
+    )
 
+    # One building per organization: uq_buildings_organization_region holds
+    # within a region, and the primary key of building_organizations, kept in
+    # step by triggers, rejects a second region. An unpartitioned table keeps
+    # its unique ix_buildings_organization_id instead.
     organization_id: Mapped[int] = mapped_column(
         ForeignKey("organizations.id", ondelete="CASCADE"),
         nullable=False,
-        unique=True,
-        index=True,
     )
 
     organization: Mapped["Organization"] = relationship(back_populates="building")
@@ -31,4 +45,17 @@ class Building(DBModel, CreatedAtMixin):
     __table_args__ = (
         CheckConstraint("latitude  >= -90  AND latitude  <= 90",  name="ck_lat_range"),
         CheckConstraint("longitude >= -180 AND longitude <= 180", name="ck_lon_range"),
+        CheckConstraint(
+            f"region = left(geohash, {GEOHASH_REGION_PRECISION})",
+            name="ck_buildings_region",
+        ),
+        Index("ix_buildings_latitude_longitude", "latitude", "longitude"),
+        UniqueConstraint("organization_id", "region", name="uq_buildings_organization_region"),
     )
+
+
+@event.listens_for(Building, "before_insert")
+@event.listens_for(Building, "before_update")
+def set_geohash(mapper, connection, target: Building) -> None:
+    target.geohash = encode_geohash(target.latitude, target.longitude)
+    target.region = geohash_region(target.geohash)
@@ -4,14 +4,14 @@ from sqlalchemy import ForeignKey, String, UniqueConstraint, CheckConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base import DBModel
-from models.mixins import CreatedAtMixin
+from models.mixins import CreatedAtMixin, UpdatedAtMixin
 from models.assoc import organization_occupations
 
 if TYPE_CHECKING:
     from models.organization import Organization
 
 
-class Occupation(DBModel, CreatedAtMixin):
+class Occupation(DBModel, CreatedAtMixin, UpdatedAtMixin):
     __tablename__ = "occupations"
     name: Mapped[str] = mapped_column(String(200))
 
@@ -1,22 +1,48 @@
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import (BigInteger, event, ForeignKey, String,
-                        CheckConstraint, UniqueConstraint, Table)
+from sqlalchemy import (BigInteger, Computed, event, ForeignKey, Index, String,
+                        CheckConstraint, UniqueConstraint, Table, Text, text)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base import DBModel
-from models.mixins import CreatedAtMixin
+from models.mixins import CreatedAtMixin, UpdatedAtMixin
 from models.assoc import organization_occupations
 
+SEARCH_CONFIG = "russian"
+
 if TYPE_CHECKING:
     from models.occupation import Occupation
     from models.phone_number import PhoneNumber
     from models.building import Building
 
 
-class Organization(DBModel, CreatedAtMixin):
+class Organization(DBModel, CreatedAtMixin, UpdatedAtMixin):
     __tablename__ = "organizations"
 
     name: Mapped[str] = mapped_column(String(200), unique=True)
+    # Id of the last transaction that touched the organization or its
+    # building, phones or occupations; maintained by database triggers.
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger(),
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        index=True,
+    )
+    # Building address and occupation names, kept up to date by database
+    # triggers so they can feed the generated search_vector column.
+    search_context: Mapped[str] = mapped_column(
+        Text(),
+        server_default="",
+        deferred=True,
+    )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR(),
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A')"
+            f" || setweight(to_tsvector('{SEARCH_CONFIG}', search_context), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
     occupations: Mapped[list["Occupation"]] = relationship(
         "Occupation",
         secondary=organization_occupations,
@@ -32,3 +58,13 @@ class Organization(DBModel, CreatedAtMixin):
         back_populates="organization",
         uselist=False,
     )
+
+    __table_args__ = (
+        Index("ix_organizations_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_organizations_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
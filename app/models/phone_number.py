@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String, UniqueConstraint, CheckConstraint, Boolean
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint, CheckConstraint, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base import DBModel
@@ -14,7 +14,7 @@ if TYPE_CHECKING:
 class PhoneNumber(DBModel, CreatedAtMixin, UpdatedAtMixin):
     __tablename__ = "phone_numbers"
 
-    value: Mapped[str] = mapped_column(String(16), nullable=False)
+    value: Mapped[str] = mapped_column(String(16), nullable=False, index=True)
     is_primary: Mapped[bool] = mapped_column(Boolean(), default=False)
 
     type: Mapped[PhoneNumberType] = mapped_column(
@@ -33,4 +33,6 @@ class PhoneNumber(DBModel, CreatedAtMixin, UpdatedAtMixin):
     __table_args__ = (
         UniqueConstraint("organization_id", "value", name="uq_org_phone"),
         CheckConstraint(r"value ~ '^\+[0-9]{1,15}$'", name="ck_phone_e164_format"),
+        # Suffix lookups become prefix range scans over the reversed value.
+        Index("ix_phone_numbers_value_reversed", text('reverse(value) COLLATE "C"')),
     )
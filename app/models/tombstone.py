@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from models.base import Base
+
+
+class OrganizationTombstone(Base):
+    __tablename__ = "organization_tombstones"
+
+    organization_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    change_xid: Mapped[int] = mapped_column(BigInteger(), nullable=False, index=True)
+    deleted_at: Mapped[datetime] = mapped_column(
+        default=func.now(),
+        server_default=func.now(),
+    )
@@ -1,10 +1,14 @@
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from typing import Any, Generic, Optional, Type, TypeVar
 
-from sqlalchemy import exists, select
+from sqlalchemy import BigInteger, Text, bindparam, cast, exists, func, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.base import ExecutableOption
+from sqlalchemy.sql.selectable import TableValuedAlias
+from sqlalchemy.types import TypeEngine
 
+from core.tracing import trace_methods
 from dependecies.session import SessionDependency
 from models.base import DBModel
 
@@ -16,6 +20,10 @@ class BaseRepository(Generic[T]):
         self.session = session
         self.model = model
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+
     async def get(self, target_id: int, options: Sequence[ExecutableOption] = None) -> Optional[T]:
         options = options or []
         stmt = select(self.model).options(*options).where(self.model.id == target_id)
@@ -33,6 +41,32 @@ class BaseRepository(Generic[T]):
         scalar = await self.session.scalars(stmt)
         return scalar.one()
 
+    async def count_and_xmin_sum(self) -> tuple[int, int]:
+        # Every insert or update writes a row version with a new xmin, so the
+        # sum moves even when the commit began before the previous check.
+        xmin = cast(cast(literal_column("xmin"), Text), BigInteger)
+        stmt = select(func.count(), func.coalesce(func.sum(xmin), 0)).select_from(self.model)
+        result = await self.session.execute(stmt)
+        count, xmin_sum = result.one()
+        return count, int(xmin_sum)
+
+    @staticmethod
+    def _unnest(columns: Mapping[str, tuple[TypeEngine, Sequence[Any]]]) -> TableValuedAlias:
+        """
+        Turn equally long arrays into rows with one column per array.
+
+        Bulk writes select from this instead of using executemany, so their
+        statement-level triggers fire once per batch rather than per row.
+        """
+        return (
+            func.unnest(*(
+                bindparam(f"{name}_values", list(values), type_=ARRAY(type_))
+                for name, (type_, values) in columns.items()
+            ))
+            .table_valued(*columns)
+            .render_derived()
+        )
+
     async def create(self, obj_in: dict[str, Any]) -> T:
         obj = self.model(**obj_in)
         self.session.add(obj)
@@ -47,11 +81,6 @@ class BaseRepository(Generic[T]):
         await self.session.refresh(obj)
         return obj
 
-    async def put(self, target_id: int, obj_in: dict[str, Any]) -> T:
-        if not (obj := await self.get(target_id)):
-            return await self.create(obj_in)
-        return await self.update(obj, obj_in)
-
     async def delete(self, target_id: int) -> None:
         obj = await self.get(target_id)
         if obj:
@@ -59,6 +88,15 @@ class BaseRepository(Generic[T]):
             await self.session.commit()
         return obj
 
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
+
     @classmethod
     def get_repository(cls: Any, session: SessionDependency):
         return cls(session)
+
+
+trace_methods(BaseRepository)
@@ -1,9 +1,31 @@
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any
 
-from sqlalchemy import and_, select
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Integer,
+    Row,
+    String,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    func,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from core.geo import (
+    GEOHASH_REGION_PRECISION,
+    encode_geohash,
+    geohash_cells_covering,
+    geohash_prefix_upper_bound,
+    geohash_region,
+)
 from models.building import Building
 from repositories.base import BaseRepository
 
@@ -12,6 +34,65 @@ class BuildingRepository(BaseRepository[Building]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(Building, session)
 
+    async def upsert_many(self, buildings: Sequence[Mapping[str, Any]]) -> None:
+        if not buildings:
+            return
+        # One building per organization; the last one given wins.
+        rows = {}
+        for building in buildings:
+            geohash = encode_geohash(building["latitude"], building["longitude"])
+            rows[building["organization_id"]] = {
+                **building,
+                "geohash": geohash,
+                "region": geohash_region(geohash),
+            }
+        values = self._unnest({
+            "organization_id": (Integer, [row["organization_id"] for row in rows.values()]),
+            "address": (String, [row["address"] for row in rows.values()]),
+            "latitude": (Float, [row["latitude"] for row in rows.values()]),
+            "longitude": (Float, [row["longitude"] for row in rows.values()]),
+            "geohash": (String, [row["geohash"] for row in rows.values()]),
+            "region": (String, [row["region"] for row in rows.values()]),
+        })
+
+        # A building that moved to another region lives in another partition,
+        # where ON CONFLICT (organization_id, region) would not find it.
+        await self.session.execute(
+            delete(self.model).where(
+                self.model.organization_id == values.c.organization_id,
+                self.model.region != values.c.region,
+            )
+        )
+
+        stmt = insert(self.model).from_select(list(values.c.keys()), select(values))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.organization_id, self.model.region],
+            set_={
+                "address": stmt.excluded.address,
+                "latitude": stmt.excluded.latitude,
+                "longitude": stmt.excluded.longitude,
+                "geohash": stmt.excluded.geohash,
+            },
+            # Unchanged buildings keep their row version; geohash follows
+            # from the coordinates.
+            where=or_(
+                self.model.address.is_distinct_from(stmt.excluded.address),
+                self.model.latitude.is_distinct_from(stmt.excluded.latitude),
+                self.model.longitude.is_distinct_from(stmt.excluded.longitude),
+            ),
+        )
+        await self.session.execute(stmt)
+
+    async def delete_by_organization_ids(self, organization_ids: Sequence[int]) -> None:
+        if not organization_ids:
+            return
+        stmt = delete(self.model).where(
+            self.model.organization_id == any_(
+                bindparam("organization_ids", list(organization_ids), type_=ARRAY(Integer))
+            )
+        )
+        await self.session.execute(stmt)
+
     async def list_all(self) -> Sequence[Building]:
         stmt = select(self.model).options(selectinload(self.model.organization))
         result = await self.session.scalars(stmt)
@@ -40,14 +121,129 @@ class BuildingRepository(BaseRepository[Building]):
         stmt = (
             select(self.model)
             .where(
-                and_(
-                    self.model.latitude >= min_latitude,
-                    self.model.latitude <= max_latitude,
-                    self.model.longitude >= min_longitude,
-                    self.model.longitude <= max_longitude,
+                self._within_bounds(
+                    min_latitude=min_latitude,
+                    max_latitude=max_latitude,
+                    min_longitude=min_longitude,
+                    max_longitude=max_longitude,
                 )
             )
             .options(selectinload(self.model.organization))
         )
         result = await self.session.scalars(stmt)
         return result.unique().all()
+
+    async def list_by_geohash_prefixes(
+        self,
+        prefixes: Iterable[str],
+        *,
+        min_latitude: float,
+        max_latitude: float,
+        min_longitude: float,
+        max_longitude: float,
+    ) -> Sequence[Building]:
+        prefixes = sorted(set(prefixes))
+        stmt = (
+            select(self.model)
+            .where(
+                self._within_bounds(
+                    min_latitude=min_latitude,
+                    max_latitude=max_latitude,
+                    min_longitude=min_longitude,
+                    max_longitude=max_longitude,
+                )
+            )
+            .order_by(self.model.geohash)
+        )
+        if "" not in prefixes:
+            stmt = stmt.where(
+                or_(*(
+                    and_(
+                        self.model.geohash >= prefix,
+                        self.model.geohash < geohash_prefix_upper_bound(prefix),
+                    )
+                    for prefix in prefixes
+                ))
+            )
+        result = await self.session.scalars(stmt)
+        return result.all()
+
+    async def count_within_bounds(
+        self,
+        *,
+        min_latitude: float,
+        max_latitude: float,
+        min_longitude: float,
+        max_longitude: float,
+    ) -> int:
+        stmt = (
+            select(func.count())
+            .select_from(self.model)
+            .where(
+                self._within_bounds(
+                    min_latitude=min_latitude,
+                    max_latitude=max_latitude,
+                    min_longitude=min_longitude,
+                    max_longitude=max_longitude,
+                )
+            )
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    async def cluster_within_bounds(
+        self,
+        *,
+        min_latitude: float,
+        max_latitude: float,
+        min_longitude: float,
+        max_longitude: float,
+        cell_size: float,
+    ) -> Sequence[Row[tuple[float, float, int, int]]]:
+        cell_row = func.floor(self.model.latitude / cell_size)
+        cell_column = func.floor(self.model.longitude / cell_size)
+        stmt = (
+            select(
+                func.avg(self.model.latitude).label("latitude"),
+                func.avg(self.model.longitude).label("longitude"),
+                func.count().label("building_count"),
+                func.min(self.model.organization_id).label("sample_organization_id"),
+            )
+            .where(
+                self._within_bounds(
+                    min_latitude=min_latitude,
+                    max_latitude=max_latitude,
+                    min_longitude=min_longitude,
+                    max_longitude=max_longitude,
+                )
+            )
+            .group_by(cell_row, cell_column)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    def _within_bounds(
+        self,
+        *,
+        min_latitude: float,
+        max_latitude: float,
+        min_longitude: float,
+        max_longitude: float,
+    ) -> ColumnElement[bool]:
+        regions = geohash_cells_covering(
+            {
+                "min_latitude": min_latitude,
+                "max_latitude": max_latitude,
+                "min_longitude": min_longitude,
+                "max_longitude": max_longitude,
+            },
+            GEOHASH_REGION_PRECISION,
+        )
+        return and_(
+            # Lets Postgres prune region partitions the viewport cannot touch.
+            self.model.region.in_(regions),
+            self.model.latitude >= min_latitude,
+            self.model.latitude <= max_latitude,
+            self.model.longitude >= min_longitude,
+            self.model.longitude <= max_longitude,
+        )
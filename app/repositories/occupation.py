@@ -1,9 +1,11 @@
 from collections.abc import Sequence
 
-from sqlalchemy import literal, select
+from sqlalchemy import Row, func, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
 
+from models.assoc import organization_occupations
 from models.occupation import Occupation
 from repositories.base import BaseRepository
 
@@ -12,13 +14,13 @@ class OccupationRepository(BaseRepository[Occupation]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(Occupation, session)
 
-    async def get_descendant_ids(
+    def descendant_ids_select(
         self,
         occupation_id: int,
         *,
         max_depth: int | None = None,
         include_self: bool = True,
-    ) -> Sequence[int]:
+    ) -> Select[tuple[int]]:
         base_query = (
             select(
                 self.model.id.label("id"),
@@ -44,10 +46,74 @@ class OccupationRepository(BaseRepository[Occupation]):
 
         descendants_cte = descendants_cte.union_all(recursive_query)
 
-        stmt = select(descendants_cte.c.id, descendants_cte.c.depth)
+        stmt = select(descendants_cte.c.id)
         if not include_self:
             stmt = stmt.where(descendants_cte.c.depth > 0)
+        return stmt
 
+    async def get_descendant_ids(
+        self,
+        occupation_id: int,
+        *,
+        max_depth: int | None = None,
+        include_self: bool = True,
+    ) -> Sequence[int]:
+        stmt = self.descendant_ids_select(
+            occupation_id,
+            max_depth=max_depth,
+            include_self=include_self,
+        )
         result = await self.session.execute(stmt)
         rows = result.all()
         return [row.id for row in rows]
+
+    async def list_parent_links(self) -> Sequence[Row[tuple[int, int | None]]]:
+        stmt = select(self.model.id, self.model.parent_id).order_by(self.model.id)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def count_organizations(
+        self,
+        organization_ids: Select[tuple[int]] | None = None,
+    ) -> Sequence[Row[tuple[int, str, int | None, int]]]:
+        """
+        Count distinct organizations per occupation, rolled up to every ancestor.
+        """
+        closure_cte = (
+            select(
+                self.model.id.label("occupation_id"),
+                self.model.id.label("ancestor_id"),
+            )
+            .cte(name="occupation_ancestors", recursive=True)
+        )
+        occupation_alias = aliased(self.model)
+        closure_cte = closure_cte.union_all(
+            select(
+                closure_cte.c.occupation_id,
+                occupation_alias.parent_id,
+            )
+            .join(occupation_alias, occupation_alias.id == closure_cte.c.ancestor_id)
+            .where(occupation_alias.parent_id.is_not(None))
+        )
+
+        org_count = func.count(organization_occupations.c.org_id.distinct())
+        stmt = (
+            select(
+                self.model.id,
+                self.model.name,
+                self.model.parent_id,
+                org_count.label("organization_count"),
+            )
+            .select_from(organization_occupations)
+            .join(
+                closure_cte,
+                closure_cte.c.occupation_id == organization_occupations.c.occupation_id,
+            )
+            .join(self.model, self.model.id == closure_cte.c.ancestor_id)
+            .group_by(self.model.id)
+            .order_by(org_count.desc(), self.model.id)
+        )
+        if organization_ids is not None:
+            stmt = stmt.where(organization_occupations.c.org_id.in_(organization_ids))
+        result = await self.session.execute(stmt)
+        return result.all()
@@ -1,13 +1,42 @@
-from collections.abc import Iterable, Sequence
+from collections.abc import AsyncIterator, Collection, Iterable, Sequence
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    ColumnElement,
+    Integer,
+    Row,
+    String,
+    Text,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    exists,
+    false,
+    func,
+    literal_column,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
 from sqlalchemy.sql import Select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, raiseload, selectinload
 
+from core.geo import EARTH_RADIUS_METERS
+from enums.organization import OrganizationField, OrganizationSortOrder
+from enums.phone_number import PhoneNumberType
+from models.assoc import organization_occupations
 from models.building import Building
 from models.occupation import Occupation
-from models.organization import Organization
+from models.organization import SEARCH_CONFIG, Organization
+from models.phone_number import PhoneNumber
+from models.tombstone import OrganizationTombstone
 from repositories.base import BaseRepository
 
 
@@ -15,43 +44,75 @@ class OrganizationRepository(BaseRepository[Organization]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(Organization, session)
 
-    def _base_select(self) -> Select[tuple[Organization]]:
+    def _base_select(
+        self,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Select[tuple[Organization]]:
+        if fields is None:
+            fields = frozenset(OrganizationField)
+        columns = [self.model.id]
+        if OrganizationField.NAME in fields:
+            columns.append(self.model.name)
+        relationships = {
+            OrganizationField.BUILDING: self.model.building,
+            OrganizationField.OCCUPATIONS: self.model.occupations,
+            OrganizationField.PHONES: self.model.phones,
+        }
         return (
             select(self.model)
             .options(
-                selectinload(self.model.building),
-                selectinload(self.model.occupations),
-                selectinload(self.model.phones),
+                load_only(*columns),
+                *(
+                    selectinload(relationship)
+                    if field in fields
+                    else raiseload(relationship)
+                    for field, relationship in relationships.items()
+                ),
             )
         )
 
-    async def list_by_building_id(self, building_id: int) -> Sequence[Organization]:
+    async def list_by_building_id(
+        self,
+        building_id: int,
+        *,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Sequence[Organization]:
         stmt = (
-            self._base_select()
+            self._base_select(fields)
             .join(self.model.building)
             .where(Building.id == building_id)
         )
         result = await self.session.scalars(stmt)
         return result.unique().all()
 
-    async def list_by_building_ids(self, building_ids: Iterable[int]) -> Sequence[Organization]:
+    async def list_by_building_ids(
+        self,
+        building_ids: Iterable[int],
+        *,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Sequence[Organization]:
         building_ids = list(set(building_ids))
         if not building_ids:
             return []
         stmt = (
-            self._base_select()
+            self._base_select(fields)
             .join(self.model.building)
             .where(Building.id.in_(building_ids))
         )
         result = await self.session.scalars(stmt)
         return result.unique().all()
 
-    async def list_by_occupation_ids(self, occupation_ids: Iterable[int]) -> Sequence[Organization]:
+    async def list_by_occupation_ids(
+        self,
+        occupation_ids: Iterable[int],
+        *,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Sequence[Organization]:
         occupation_ids = list(set(occupation_ids))
         if not occupation_ids:
             return []
         stmt = (
-            self._base_select()
+            self._base_select(fields)
             .join(self.model.occupations)
             .where(Occupation.id.in_(occupation_ids))
             .distinct()
@@ -59,10 +120,16 @@ class OrganizationRepository(BaseRepository[Organization]):
         result = await self.session.scalars(stmt)
         return result.unique().all()
 
-    async def search_by_name(self, query: str, *, limit: int | None = None) -> Sequence[Organization]:
+    async def search_by_name(
+        self,
+        query: str,
+        *,
+        limit: int | None = None,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Sequence[Organization]:
         pattern = f"%{query.strip()}%"
         stmt = (
-            self._base_select()
+            self._base_select(fields)
             .where(self.model.name.ilike(pattern))
             .order_by(self.model.name.asc())
         )
@@ -71,7 +138,411 @@ class OrganizationRepository(BaseRepository[Organization]):
         result = await self.session.scalars(stmt)
         return result.unique().all()
 
-    async def get_with_details(self, organization_id: int) -> Organization | None:
-        stmt = self._base_select().where(self.model.id == organization_id)
+    async def full_text_search(
+        self,
+        query: str,
+        *,
+        limit: int,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Sequence[Row[tuple[Organization, float, str]]]:
+        """
+        Match ``query`` against name, address and occupation names.
+
+        Rows are ranked on the search_vector GIN index first; headlines are
+        only built for the ``limit`` rows that are returned.
+        """
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        tsquery = func.websearch_to_tsquery(config, query)
+        rank = func.ts_rank(self.model.search_vector, tsquery)
+        ranked = (
+            select(self.model.id, rank.label("rank"))
+            .where(self.model.search_vector.bool_op("@@")(tsquery))
+            .order_by(rank.desc(), self.model.id)
+            .limit(limit)
+            .subquery()
+        )
+        headline = func.ts_headline(
+            config,
+            func.concat_ws(" · ", self.model.name, func.nullif(self.model.search_context, "")),
+            tsquery,
+            "MaxFragments=2, MinWords=3, MaxWords=12",
+        )
+        stmt = (
+            self._base_select(fields)
+            .add_columns(ranked.c.rank, headline.label("headline"))
+            .join(ranked, ranked.c.id == self.model.id)
+            .order_by(ranked.c.rank.desc(), self.model.id)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def search(
+        self,
+        *,
+        query: str | None = None,
+        occupation_ids: Select[tuple[int]] | Iterable[int] | None = None,
+        bounds: dict[str, float] | None = None,
+        center: tuple[float, float] | None = None,
+        radius_meters: float | None = None,
+        phone_type: PhoneNumberType | None = None,
+        sort: OrganizationSortOrder = OrganizationSortOrder.NAME,
+        after: Sequence[Any] | None = None,
+        limit: int,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> list[tuple[Organization, tuple[Any, ...]]]:
+        distance = None
+        if center is not None:
+            distance = self._distance_expression(*center)
+
+        stmt = self._base_select(fields)
+        if bounds is not None or distance is not None:
+            stmt = stmt.join(self.model.building)
+
+        predicates = self._filter_predicates(
+            query=query,
+            occupation_ids=occupation_ids,
+            bounds=bounds,
+            phone_type=phone_type,
+        )
+        if distance is not None and radius_meters is not None:
+            predicates.append(distance <= radius_meters)
+
+        sort_columns = self._sort_columns(sort, distance)
+        if after is not None:
+            predicates.append(tuple_(*sort_columns) > tuple_(*after))
+
+        stmt = (
+            stmt.add_columns(*sort_columns)
+            .where(*predicates)
+            .order_by(*(column.asc() for column in sort_columns))
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return [(row[0], tuple(row[1:])) for row in result.all()]
+
+    def filtered_ids_select(
+        self,
+        *,
+        query: str | None = None,
+        bounds: dict[str, float] | None = None,
+    ) -> Select[tuple[int]]:
+        stmt = select(self.model.id)
+        if bounds is not None:
+            stmt = stmt.join(self.model.building)
+        return stmt.where(*self._filter_predicates(query=query, bounds=bounds))
+
+    async def count_filtered(
+        self,
+        *,
+        query: str | None = None,
+        bounds: dict[str, float] | None = None,
+    ) -> int:
+        subquery = self.filtered_ids_select(query=query, bounds=bounds).subquery()
+        stmt = select(func.count()).select_from(subquery)
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    def _filter_predicates(
+        self,
+        *,
+        query: str | None = None,
+        occupation_ids: Select[tuple[int]] | Iterable[int] | None = None,
+        bounds: dict[str, float] | None = None,
+        phone_type: PhoneNumberType | None = None,
+    ) -> list[ColumnElement[bool]]:
+        predicates: list[ColumnElement[bool]] = []
+        if query is not None:
+            predicates.append(self.model.name.ilike(f"%{query.strip()}%"))
+        if occupation_ids is not None:
+            if not isinstance(occupation_ids, Select):
+                occupation_ids = list(set(occupation_ids))
+            predicates.append(
+                exists()
+                .where(organization_occupations.c.org_id == self.model.id)
+                .where(organization_occupations.c.occupation_id.in_(occupation_ids))
+            )
+        if phone_type is not None:
+            predicates.append(
+                exists()
+                .where(PhoneNumber.organization_id == self.model.id)
+                .where(PhoneNumber.type == phone_type)
+            )
+        if bounds is not None:
+            predicates.append(
+                and_(
+                    Building.latitude >= bounds["min_latitude"],
+                    Building.latitude <= bounds["max_latitude"],
+                    Building.longitude >= bounds["min_longitude"],
+                    Building.longitude <= bounds["max_longitude"],
+                )
+            )
+        return predicates
+
+    def _sort_columns(
+        self,
+        sort: OrganizationSortOrder,
+        distance: ColumnElement[float] | None,
+    ) -> list[ColumnElement[Any]]:
+        if sort == OrganizationSortOrder.ID:
+            return [self.model.id]
+        if sort == OrganizationSortOrder.DISTANCE:
+            if distance is None:
+                raise ValueError("Distance sort requires a center point")
+            return [distance.label("distance"), self.model.id]
+        return [self.model.name, self.model.id]
+
+    @staticmethod
+    def _distance_expression(latitude: float, longitude: float) -> ColumnElement[float]:
+        delta_lat = func.radians(Building.latitude - latitude)
+        delta_lon = func.radians(Building.longitude - longitude)
+        a = (
+            func.power(func.sin(delta_lat * 0.5), 2)
+            + func.cos(func.radians(latitude))
+            * func.cos(func.radians(Building.latitude))
+            * func.power(func.sin(delta_lon * 0.5), 2)
+        )
+        return 2 * EARTH_RADIUS_METERS * func.asin(func.least(1.0, func.sqrt(a)))
+
+    async def upsert_many(self, names: Sequence[str]) -> list[int]:
+        if not names:
+            return []
+        values = self._unnest({"name": (String, names)})
+        # DO NOTHING writes no row version for names that already exist,
+        # so re-sent organizations do not show up as changed.
+        stmt = (
+            insert(self.model)
+            .from_select(["name"], select(values.c.name))
+            .on_conflict_do_nothing(index_elements=[self.model.name])
+        )
+        await self.session.execute(stmt)
+        stmt = select(self.model.id, self.model.name).where(
+            self.model.name == any_(bindparam("names", list(names), type_=ARRAY(String)))
+        )
+        ids = {row.name: row.id for row in await self.session.execute(stmt)}
+        return [ids[name] for name in names]
+
+    async def replace_occupation_links(
+        self,
+        organization_ids: Sequence[int],
+        links: Sequence[tuple[int, int]],
+    ) -> None:
+        values = self._unnest({
+            "org_id": (Integer, [link[0] for link in links]),
+            "occupation_id": (Integer, [link[1] for link in links]),
+        })
+        if links:
+            stmt = (
+                insert(organization_occupations)
+                .from_select(["org_id", "occupation_id"], select(values))
+                .on_conflict_do_nothing()
+            )
+            await self.session.execute(stmt)
+        stmt = delete(organization_occupations).where(
+            and_(
+                organization_occupations.c.org_id == any_(
+                    bindparam("organization_ids", list(organization_ids), type_=ARRAY(Integer))
+                ),
+                tuple_(
+                    organization_occupations.c.org_id,
+                    organization_occupations.c.occupation_id,
+                ).not_in(select(values)),
+            )
+        )
+        await self.session.execute(stmt)
+
+    async def list_changes(
+        self,
+        *,
+        after: Sequence[int] | None = None,
+        limit: int,
+    ) -> Sequence[Row]:
+        # Only transactions older than the oldest running one are returned:
+        # they have all finished, so no row with a smaller change_xid can
+        # become visible after a client has moved its cursor past it.
+        horizon = self._xid_horizon()
+        branches = []
+        for id_column, change_xid, deleted in (
+            (self.model.id, self.model.change_xid, false()),
+            (OrganizationTombstone.organization_id, OrganizationTombstone.change_xid, true()),
+        ):
+            stmt = (
+                select(
+                    id_column.label("id"),
+                    change_xid.label("change_xid"),
+                    deleted.label("deleted"),
+                )
+                .where(change_xid < horizon)
+                .order_by(change_xid, id_column)
+                .limit(limit)
+            )
+            if after is not None:
+                stmt = stmt.where(tuple_(change_xid, id_column) > tuple_(*after))
+            branches.append(stmt.subquery().select())
+        changes = union_all(*branches).subquery()
+        stmt = (
+            select(changes)
+            .order_by(changes.c.change_xid, changes.c.id)
+            .limit(limit)
+        )
+        return (await self.session.execute(stmt)).all()
+
+    @staticmethod
+    def _xid_horizon() -> ColumnElement[int]:
+        return cast(
+            cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text),
+            BigInteger,
+        )
+
+    async def get_xid_horizon(self) -> int:
+        return (await self.session.execute(select(self._xid_horizon()))).scalar_one()
+
+    async def get_change_version(self) -> tuple[int, int]:
+        """
+        Return the newest change_xid of organizations and tombstones, and
+        the oldest running transaction when it is older than that.
+
+        A transaction that commits after the check can carry a smaller xid
+        than one already seen, leaving the maximum unchanged; while it runs
+        it holds the horizon back, so the horizon moves once it commits.
+        Both maxima are read from the end of their change_xid indexes.
+        """
+        change_xid = func.greatest(
+            select(func.max(self.model.change_xid)).scalar_subquery(),
+            select(func.max(OrganizationTombstone.change_xid)).scalar_subquery(),
+        )
+        stmt = select(change_xid, self._xid_horizon())
+        change_xid, horizon = (await self.session.execute(stmt)).one()
+        change_xid = change_xid or 0
+        return change_xid, min(horizon, change_xid + 1)
+
+    async def iter_export(
+        self,
+        *,
+        since_xid: int | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream organizations with their building, phones and occupations,
+        optionally only those changed by transactions from ``since_xid`` on.
+        """
+        phones = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        _json_object(
+                            value=PhoneNumber.value,
+                            is_primary=PhoneNumber.is_primary,
+                            type=PhoneNumber.type,
+                            comment=PhoneNumber.comment,
+                        ),
+                        PhoneNumber.id,
+                    ),
+                    type_=JSON,
+                )
+            )
+            .where(PhoneNumber.organization_id == self.model.id)
+            .scalar_subquery()
+        )
+        occupations = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        _json_object(id=Occupation.id, name=Occupation.name),
+                        Occupation.id,
+                    ),
+                    type_=JSON,
+                )
+            )
+            .join(
+                organization_occupations,
+                organization_occupations.c.occupation_id == Occupation.id,
+            )
+            .where(organization_occupations.c.org_id == self.model.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                self.model.id,
+                self.model.name,
+                Building.address,
+                Building.latitude,
+                Building.longitude,
+                phones.label("phones"),
+                occupations.label("occupations"),
+            )
+            .outerjoin(Building, Building.organization_id == self.model.id)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if since_xid is not None:
+            stmt = stmt.where(self.model.change_xid >= since_xid)
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def iter_deleted_ids(
+        self,
+        *,
+        since_xid: int,
+        batch_size: int = 10_000,
+    ) -> AsyncIterator[Sequence[Row[tuple[int]]]]:
+        stmt = (
+            select(OrganizationTombstone.organization_id.label("id"))
+            .where(OrganizationTombstone.change_xid >= since_xid)
+            .order_by(OrganizationTombstone.organization_id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def iter_names(
+        self,
+        *,
+        batch_size: int = 10_000,
+    ) -> AsyncIterator[Sequence[Row[tuple[int, str]]]]:
+        stmt = (
+            select(self.model.id, self.model.name)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def list_by_ids(
+        self,
+        organization_ids: Iterable[int],
+        *,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Sequence[Organization]:
+        organization_ids = list(set(organization_ids))
+        if not organization_ids:
+            return []
+        stmt = (
+            self._base_select(fields)
+            .where(self.model.id.in_(organization_ids))
+            .order_by(self.model.id)
+        )
+        result = await self.session.scalars(stmt)
+        return result.unique().all()
+
+    async def get_with_details(
+        self,
+        organization_id: int,
+        *,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> Organization | None:
+        stmt = self._base_select(fields).where(self.model.id == organization_id)
         result = await self.session.scalars(stmt)
         return result.unique().one_or_none()
+
+
+def _json_object(**columns: ColumnElement) -> ColumnElement:
+    # Keys are inlined: json_build_object takes "any" arguments, whose
+    # parameter types Postgres cannot infer.
+    return func.json_build_object(*(
+        argument
+        for key, column in columns.items()
+        for argument in (literal_column(f"'{key}'"), column)
+    ))
@@ -1,5 +1,27 @@
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from sqlalchemy import (
+    Boolean,
+    Integer,
+    Row,
+    String,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    func,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
 
+from core.geo import geohash_prefix_upper_bound
+from enums.phone_number import PhoneNumberType
 from models.phone_number import PhoneNumber
 from repositories.base import BaseRepository
 
@@ -7,3 +29,109 @@ from repositories.base import BaseRepository
 class PhoneNumberRepository(BaseRepository[PhoneNumber]):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(PhoneNumber, session)
+
+    async def replace_for_organizations(
+        self,
+        organization_ids: Sequence[int],
+        phones: Sequence[Mapping[str, Any]],
+    ) -> None:
+        # One row per number; the last one given wins.
+        phones = list({
+            (phone["organization_id"], phone["value"]): phone for phone in phones
+        }.values())
+        values = self._unnest({
+            "organization_id": (Integer, [phone["organization_id"] for phone in phones]),
+            "value": (String, [phone["value"] for phone in phones]),
+            "is_primary": (Boolean, [phone["is_primary"] for phone in phones]),
+            "type": (String, [str(phone["type"]) for phone in phones]),
+            "comment": (String, [phone["comment"] for phone in phones]),
+        })
+        if phones:
+            rows = select(
+                values.c.organization_id,
+                values.c.value,
+                values.c.is_primary,
+                cast(values.c.type, self.model.type.type),
+                values.c.comment,
+            )
+            stmt = insert(self.model).from_select(list(values.c.keys()), rows)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_org_phone",
+                set_={
+                    "is_primary": stmt.excluded.is_primary,
+                    "type": stmt.excluded.type,
+                    "comment": stmt.excluded.comment,
+                },
+                # Unchanged numbers keep their row version.
+                where=or_(
+                    self.model.is_primary.is_distinct_from(stmt.excluded.is_primary),
+                    self.model.type.is_distinct_from(stmt.excluded.type),
+                    self.model.comment.is_distinct_from(stmt.excluded.comment),
+                ),
+            )
+            await self.session.execute(stmt)
+        kept = select(values.c.organization_id, values.c.value)
+        stmt = delete(self.model).where(
+            and_(
+                self.model.organization_id == any_(
+                    bindparam("organization_ids", list(organization_ids), type_=ARRAY(Integer))
+                ),
+                tuple_(self.model.organization_id, self.model.value).not_in(kept),
+            )
+        )
+        await self.session.execute(stmt)
+
+    async def find_matches(
+        self,
+        *,
+        value: str | None = None,
+        suffix: str | None = None,
+        limit: int,
+    ) -> Sequence[PhoneNumber]:
+        """
+        Return the numbers equal to ``value`` or ending with the digits
+        ``suffix``, for at most ``limit`` organizations.
+        """
+        if value is not None:
+            predicate = self.model.value == value
+        else:
+            predicate = self._suffix_predicate(suffix)
+        organization_ids = (
+            select(self.model.organization_id)
+            .where(predicate)
+            .group_by(self.model.organization_id)
+            .order_by(self.model.organization_id)
+            .limit(limit)
+        )
+        stmt = (
+            select(self.model)
+            .where(predicate, self.model.organization_id.in_(organization_ids))
+            .order_by(self.model.organization_id, self.model.id)
+        )
+        result = await self.session.scalars(stmt)
+        return result.all()
+
+    def _suffix_predicate(self, suffix: str) -> ColumnElement[bool]:
+        # Matches the ix_phone_numbers_value_reversed expression, so the
+        # suffix turns into a range over the index.
+        reversed_value = func.reverse(self.model.value).collate("C")
+        prefix = suffix[::-1]
+        return and_(
+            reversed_value >= prefix,
+            reversed_value < geohash_prefix_upper_bound(prefix),
+        )
+
+    async def count_organizations_by_type(
+        self,
+        organization_ids: Select[tuple[int]] | None = None,
+    ) -> Sequence[Row[tuple[PhoneNumberType, int]]]:
+        org_count = func.count(self.model.organization_id.distinct())
+        stmt = (
+            select(self.model.type, org_count.label("organization_count"))
+            .group_by(self.model.type)
+            .order_by(org_count.desc())
+        )
+        if organization_ids is not None:
+            stmt = stmt.where(self.model.organization_id.in_(organization_ids))
+        result = await self.session.execute(stmt)
+        return result.all()
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from schemas.base import ResponseModel
+
+
+class SlowQueryResponseSchema(ResponseModel):
+    statement: str
+    parameter_shapes: list[str]
+    duration_ms: float
+    recorded_at: datetime
+    plan: Optional[Any]
+
+
+class LoopStallResponseSchema(ResponseModel):
+    detected_at: datetime
+    duration_seconds: float
+    stack: list[str]
+
+
+class ProfileResponseSchema(ResponseModel):
+    id: str
+    name: str
+    started_at: datetime
+    duration_seconds: float
+    sample_count: int
@@ -0,0 +1,6 @@
+from schemas.base import ResponseModel
+
+
+class HealthResponseSchema(ResponseModel):
+    status: str
+    checks: dict[str, bool] | None = None
@@ -1,15 +1,49 @@
+from .request import (
+    BuildingUpsertSchema,
+    OrganizationBulkUpsertSchema,
+    OrganizationUpsertSchema,
+    PhoneNumberUpsertSchema,
+)
 from .response import (
+    BoundsResponseSchema,
+    BuildingClusterResponseSchema,
+    BuildingClustersResponseSchema,
     BuildingResponseSchema,
+    OccupationFacetResponseSchema,
     OrganizationAreaResponseSchema,
+    OrganizationBulkUpsertResponseSchema,
+    OrganizationChangeResponseSchema,
+    OrganizationChangesResponseSchema,
+    OrganizationFacetsResponseSchema,
+    OrganizationPhoneMatchResponseSchema,
     OrganizationResponseSchema,
+    OrganizationSearchResponseSchema,
+    OrganizationTextMatchResponseSchema,
     OccupationResponseSchema,
     PhoneNumberResponseSchema,
+    PhoneTypeFacetResponseSchema,
 )
 
 __all__ = [
+    "BoundsResponseSchema",
+    "BuildingClusterResponseSchema",
+    "BuildingClustersResponseSchema",
     "BuildingResponseSchema",
+    "BuildingUpsertSchema",
+    "OccupationFacetResponseSchema",
     "OrganizationAreaResponseSchema",
+    "OrganizationBulkUpsertResponseSchema",
+    "OrganizationBulkUpsertSchema",
+    "OrganizationChangeResponseSchema",
+    "OrganizationChangesResponseSchema",
+    "OrganizationFacetsResponseSchema",
+    "OrganizationPhoneMatchResponseSchema",
     "OrganizationResponseSchema",
+    "OrganizationSearchResponseSchema",
+    "OrganizationTextMatchResponseSchema",
+    "OrganizationUpsertSchema",
     "OccupationResponseSchema",
     "PhoneNumberResponseSchema",
+    "PhoneNumberUpsertSchema",
+    "PhoneTypeFacetResponseSchema",
 ]
@@ -0,0 +1,55 @@
+from typing import Optional
+
+from pydantic import Field, field_validator
+
+from enums.phone_number import PhoneNumberType
+from schemas.base import FormModel
+
+
+class BuildingUpsertSchema(FormModel):
+    address: str = Field(min_length=1, max_length=200)
+    latitude: float = Field(ge=-90.0, le=90.0)
+    longitude: float = Field(ge=-180.0, le=180.0)
+
+
+class PhoneNumberUpsertSchema(FormModel):
+    value: str = Field(pattern=r"^\+[0-9]{1,15}$")
+    is_primary: bool = False
+    type: PhoneNumberType = PhoneNumberType.WORK
+    comment: Optional[str] = Field(default=None, max_length=200)
+
+
+class OrganizationUpsertSchema(FormModel):
+    name: str = Field(min_length=1, max_length=200)
+    building: Optional[BuildingUpsertSchema] = None
+    phones: list[PhoneNumberUpsertSchema] = Field(default_factory=list, max_length=50)
+    occupation_ids: list[int] = Field(default_factory=list, max_length=50)
+
+    @field_validator("phones")
+    @classmethod
+    def check_unique_phones(
+        cls,
+        phones: list[PhoneNumberUpsertSchema],
+    ) -> list[PhoneNumberUpsertSchema]:
+        if len({phone.value for phone in phones}) != len(phones):
+            raise ValueError("Phone numbers must be unique within an organization")
+        return phones
+
+    @field_validator("occupation_ids")
+    @classmethod
+    def deduplicate_occupations(cls, occupation_ids: list[int]) -> list[int]:
+        return list(dict.fromkeys(occupation_ids))
+
+
+class OrganizationBulkUpsertSchema(FormModel):
+    organizations: list[OrganizationUpsertSchema] = Field(min_length=1, max_length=50_000)
+
+    @field_validator("organizations")
+    @classmethod
+    def check_unique_names(
+        cls,
+        organizations: list[OrganizationUpsertSchema],
+    ) -> list[OrganizationUpsertSchema]:
+        if len({organization.name for organization in organizations}) != len(organizations):
+            raise ValueError("Organization names must be unique within a request")
+        return organizations
@@ -1,5 +1,6 @@
 from typing import Optional
 
+from enums.change import ChangeOperation
 from enums.phone_number import PhoneNumberType
 from schemas.base import ResponseModel
 
@@ -28,12 +29,84 @@ class PhoneNumberResponseSchema(ResponseModel):
 
 class OrganizationResponseSchema(ResponseModel):
     id: int
-    name: str
-    building: Optional[BuildingResponseSchema]
-    occupations: list[OccupationResponseSchema]
-    phones: list[PhoneNumberResponseSchema]
+    name: Optional[str] = None
+    building: Optional[BuildingResponseSchema] = None
+    occupations: list[OccupationResponseSchema] = []
+    phones: list[PhoneNumberResponseSchema] = []
+
+
+class OrganizationPhoneMatchResponseSchema(ResponseModel):
+    organization: OrganizationResponseSchema
+    matched_phones: list[PhoneNumberResponseSchema]
+
+
+class OrganizationTextMatchResponseSchema(ResponseModel):
+    organization: OrganizationResponseSchema
+    rank: float
+    # Matched words are wrapped in <b></b>.
+    headline: str
 
 
 class OrganizationAreaResponseSchema(ResponseModel):
     organizations: list[OrganizationResponseSchema]
     buildings: list[BuildingResponseSchema]
+
+
+class OrganizationSearchResponseSchema(ResponseModel):
+    organizations: list[OrganizationResponseSchema]
+    next_cursor: Optional[str]
+
+
+class OrganizationBulkUpsertResponseSchema(ResponseModel):
+    # Ids in the order of the submitted organizations.
+    ids: list[int]
+
+
+class OrganizationChangeResponseSchema(ResponseModel):
+    id: int
+    operation: ChangeOperation
+
+
+class OrganizationChangesResponseSchema(ResponseModel):
+    changes: list[OrganizationChangeResponseSchema]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+class BoundsResponseSchema(ResponseModel):
+    min_latitude: float
+    max_latitude: float
+    min_longitude: float
+    max_longitude: float
+
+
+class OccupationFacetResponseSchema(ResponseModel):
+    id: int
+    name: str
+    parent_id: Optional[int]
+    count: int
+
+
+class PhoneTypeFacetResponseSchema(ResponseModel):
+    type: PhoneNumberType
+    count: int
+
+
+class OrganizationFacetsResponseSchema(ResponseModel):
+    total: int
+    bounds: Optional[BoundsResponseSchema]
+    occupations: list[OccupationFacetResponseSchema]
+    phone_types: list[PhoneTypeFacetResponseSchema]
+
+
+class BuildingClusterResponseSchema(ResponseModel):
+    latitude: float
+    longitude: float
+    count: int
+    sample_organization_id: int
+
+
+class BuildingClustersResponseSchema(ResponseModel):
+    zoom: int
+    clusters: list[BuildingClusterResponseSchema]
+    buildings: list[BuildingResponseSchema]
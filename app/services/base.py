@@ -1,12 +1,17 @@
 from abc import ABC, abstractmethod
 from typing import Self, TypeVar
 
+from core.tracing import trace_methods
 from repositories.base import BaseRepository
 
 R = TypeVar('R', bound=BaseRepository)
 
 
 class BaseService(ABC):
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+
     @classmethod
     @abstractmethod
     def get_service(cls, *args, **kwargs) -> Self:
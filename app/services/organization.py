@@ -1,89 +1,169 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, Sequence
-from math import asin, cos, radians, sin, sqrt
+from collections.abc import Collection, Iterable, Sequence
+from functools import cached_property
+from typing import Any
 
-from dependecies.repository import (
-    BuildingRepositoryDependency,
-    OccupationRepositoryDependency,
-    OrganizationRepositoryDependency,
+from sqlalchemy.exc import IntegrityError
+
+from core.cache import TTLCache
+from core.config import core_settings
+from core.cursor import decode_cursor, encode_cursor
+from core.fuzzy import query_words
+from core.geo import (
+    distance_between,
+    geohash_prefixes_covering,
+    get_bounding_box,
+    tile_bounds,
 )
+from core.offload import run_offloaded, should_offload
+from core.tracing import start_span
+from db.listener import DataChange
+from db.session import SessionProvider
+from dependecies.session import SessionProviderDependency
+from enums.change import ChangeOperation
+from enums.organization import NameSearchMode, OrganizationField, OrganizationSortOrder
+from enums.phone_number import PhoneMatch, PhoneNumberType
+from enums.response_format import ResponseFormat
 from models.building import Building
-from models.occupation import Occupation
 from models.organization import Organization
-from models.phone_number import PhoneNumber
 from repositories.building import BuildingRepository
 from repositories.occupation import OccupationRepository
 from repositories.organization import OrganizationRepository
+from repositories.phone_number import PhoneNumberRepository
 from schemas.organization import (
+    BoundsResponseSchema,
+    BuildingClusterResponseSchema,
+    BuildingClustersResponseSchema,
     BuildingResponseSchema,
-    OrganizationAreaResponseSchema,
+    OccupationFacetResponseSchema,
+    OrganizationBulkUpsertResponseSchema,
+    OrganizationChangeResponseSchema,
+    OrganizationChangesResponseSchema,
+    OrganizationFacetsResponseSchema,
+    OrganizationPhoneMatchResponseSchema,
     OrganizationResponseSchema,
-    OccupationResponseSchema,
+    OrganizationSearchResponseSchema,
+    OrganizationTextMatchResponseSchema,
+    OrganizationUpsertSchema,
     PhoneNumberResponseSchema,
+    PhoneTypeFacetResponseSchema,
 )
 from services.base import BaseService
+from services.rows import (
+    ALL_FIELDS,
+    building_row,
+    building_schema,
+    encode_area_rows,
+    organization_row,
+    organization_schema,
+)
+from snapshot.manager import current_snapshot, request_snapshot_rebuild, require_snapshot
 
 
 class OrganizationService(BaseService):
     MAX_OCCUPATION_DEPTH = 3
-    _METERS_PER_DEGREE_LATITUDE = 111_320.0
-    _EARTH_RADIUS_METERS = 6_371_000.0
+    FUZZY_SEARCH_LIMIT = 20
+    FUZZY_MAX_QUERY_WORDS = 5
+    _SEARCH_CURSOR_TYPES: dict[OrganizationSortOrder, tuple[type | tuple[type, ...], ...]] = {
+        OrganizationSortOrder.NAME: (str, int),
+        OrganizationSortOrder.ID: (int,),
+        OrganizationSortOrder.DISTANCE: ((int, float), int),
+    }
+    _facets_cache: TTLCache[tuple, OrganizationFacetsResponseSchema] = TTLCache(
+        maxsize=core_settings.FACETS_CACHE_SIZE,
+        ttl=core_settings.FACETS_CACHE_TTL_SECONDS,
+    )
+    _organization_cache: TTLCache[tuple, OrganizationResponseSchema] = TTLCache(
+        maxsize=core_settings.ORGANIZATION_CACHE_SIZE,
+        ttl=core_settings.ORGANIZATION_CACHE_TTL_SECONDS,
+    )
 
-    def __init__(
-        self,
-        organization_repository: OrganizationRepository,
-        building_repository: BuildingRepository,
-        occupation_repository: OccupationRepository,
-    ) -> None:
-        self.organization_repository = organization_repository
-        self.building_repository = building_repository
-        self.occupation_repository = occupation_repository
+    def __init__(self, session_provider: SessionProvider) -> None:
+        self.session_provider = session_provider
+
+    # Repositories are built on first use, so a request served from a cache
+    # or the snapshot never creates a session.
+    @cached_property
+    def organization_repository(self) -> OrganizationRepository:
+        return OrganizationRepository(self.session_provider.session)
+
+    @cached_property
+    def building_repository(self) -> BuildingRepository:
+        return BuildingRepository(self.session_provider.session)
+
+    @cached_property
+    def occupation_repository(self) -> OccupationRepository:
+        return OccupationRepository(self.session_provider.session)
+
+    @cached_property
+    def phone_number_repository(self) -> PhoneNumberRepository:
+        return PhoneNumberRepository(self.session_provider.session)
 
     async def get_organization(
         self,
         organization_id: int,
+        *,
+        fields: Collection[OrganizationField] | None = None,
     ) -> OrganizationResponseSchema | None:
+        cache_key = (organization_id, frozenset(fields) if fields is not None else None)
+        if (cached := self._organization_cache.get(cache_key)) is not None:
+            return cached
+        generation = self._organization_cache.generation()
         if not (
             organization := await self.organization_repository
-            .get_with_details(organization_id)
+            .get_with_details(organization_id, fields=fields)
         ):
             return None
-        return self._to_organization_schema(organization)
+        schema = self._to_organization_schema(organization, fields)
+        tags = [f"organization:{organization_id}"]
+        if fields is None or OrganizationField.OCCUPATIONS in fields:
+            tags.append("occupations")
+        self._organization_cache.set(cache_key, schema, tags, generation=generation)
+        return schema
 
     async def list_by_building(
         self,
         building_id: int,
+        *,
+        fields: Collection[OrganizationField] | None = None,
     ) -> list[OrganizationResponseSchema]:
         organizations = await (self.organization_repository
-                               .list_by_building_id(building_id))
-        return self._map_organizations(organizations)
+                               .list_by_building_id(building_id, fields=fields))
+        return self._map_organizations(organizations, fields)
 
     async def list_by_occupation(
         self,
         occupation_id: int,
+        *,
+        fields: Collection[OrganizationField] | None = None,
     ) -> list[OrganizationResponseSchema]:
         organizations = await (self.organization_repository
-                               .list_by_occupation_ids([occupation_id]))
-        return self._map_organizations(organizations)
+                               .list_by_occupation_ids([occupation_id], fields=fields))
+        return self._map_organizations(organizations, fields)
 
     async def list_by_occupation_tree(
         self,
         occupation_id: int,
         *,
         max_depth: int | None = None,
+        fields: Collection[OrganizationField] | None = None,
     ) -> list[OrganizationResponseSchema]:
         depth = self.MAX_OCCUPATION_DEPTH
         if max_depth is not None:
             depth = min(max_depth, self.MAX_OCCUPATION_DEPTH)
-        occupation_ids = await self.occupation_repository.get_descendant_ids(
-            occupation_id,
-            max_depth=depth,
-            include_self=True,
-        )
+        occupation_ids = None
+        if snapshot := current_snapshot():
+            occupation_ids = snapshot.descendant_ids(occupation_id, max_depth=depth)
+        if occupation_ids is None:
+            occupation_ids = await self.occupation_repository.get_descendant_ids(
+                occupation_id,
+                max_depth=depth,
+                include_self=True,
+            )
         organizations = await (self.organization_repository
-                               .list_by_occupation_ids(occupation_ids))
-        return self._map_organizations(organizations)
+                               .list_by_occupation_ids(occupation_ids, fields=fields))
+        return self._map_organizations(organizations, fields)
 
     async def search_by_occupation_hierarchy(
         self,
@@ -99,10 +179,288 @@ class OrganizationService(BaseService):
         query: str,
         *,
         limit: int | None = None,
+        fields: Collection[OrganizationField] | None = None,
+        mode: NameSearchMode = NameSearchMode.SUBSTRING,
     ) -> list[OrganizationResponseSchema]:
-        organizations = await (self.organization_repository
-                               .search_by_name(query, limit=limit))
-        return self._map_organizations(organizations)
+        if mode == NameSearchMode.FUZZY:
+            # Every word is matched separately and on the event loop.
+            if len(list(query_words(query))) > self.FUZZY_MAX_QUERY_WORDS:
+                raise ValueError(
+                    f"Fuzzy search takes at most {self.FUZZY_MAX_QUERY_WORDS} words"
+                )
+            # Only the snapshot has the word index; ILIKE would silently
+            # return different results.
+            organization_ids = require_snapshot().fuzzy_name_matches(
+                query,
+                limit=limit or self.FUZZY_SEARCH_LIMIT,
+            )
+            organizations = await self.organization_repository.list_by_ids(
+                organization_ids,
+                fields=fields,
+            )
+            positions = {
+                organization_id: index
+                for index, organization_id in enumerate(organization_ids)
+            }
+            organizations = sorted(organizations, key=lambda organization: positions[organization.id])
+        else:
+            organizations = await (self.organization_repository
+                                   .search_by_name(query, limit=limit, fields=fields))
+        return self._map_organizations(organizations, fields)
+
+    async def full_text_search(
+        self,
+        query: str,
+        *,
+        limit: int,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> list[OrganizationTextMatchResponseSchema]:
+        rows = await self.organization_repository.full_text_search(
+            query,
+            limit=limit,
+            fields=fields,
+        )
+        return [
+            OrganizationTextMatchResponseSchema(
+                organization=self._to_organization_schema(organization, fields),
+                rank=rank,
+                headline=headline,
+            )
+            for organization, rank, headline in rows
+        ]
+
+    async def search_by_phone(
+        self,
+        number: str,
+        *,
+        match: PhoneMatch | None = None,
+        limit: int,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> list[OrganizationPhoneMatchResponseSchema]:
+        number = number.strip()
+        digits = "".join(char for char in number if char.isdigit())
+        if match is None:
+            match = PhoneMatch.EXACT if number.startswith("+") else PhoneMatch.SUFFIX
+        if not 1 <= len(digits) <= 15:
+            raise ValueError("Phone number must contain between 1 and 15 digits")
+        if match == PhoneMatch.SUFFIX:
+            if len(digits) < core_settings.PHONE_SUFFIX_MIN_DIGITS:
+                raise ValueError(
+                    f"Suffix search needs at least {core_settings.PHONE_SUFFIX_MIN_DIGITS} digits"
+                )
+            phones = await self.phone_number_repository.find_matches(suffix=digits, limit=limit)
+        else:
+            phones = await self.phone_number_repository.find_matches(value=f"+{digits}", limit=limit)
+
+        matched_phones: dict[int, list[PhoneNumberResponseSchema]] = {}
+        for phone in phones:
+            matched_phones.setdefault(phone.organization_id, []).append(
+                PhoneNumberResponseSchema(
+                    id=phone.id,
+                    value=phone.value,
+                    is_primary=phone.is_primary,
+                    type=phone.type,
+                    comment=phone.comment,
+                )
+            )
+        organizations = await self.organization_repository.list_by_ids(
+            matched_phones,
+            fields=fields,
+        )
+        return [
+            OrganizationPhoneMatchResponseSchema(
+                organization=self._to_organization_schema(organization, fields),
+                matched_phones=matched_phones[organization.id],
+            )
+            for organization in organizations
+        ]
+
+    async def search(
+        self,
+        *,
+        query: str | None = None,
+        occupation_id: int | None = None,
+        include_children: bool = True,
+        bounds: dict[str, float] | None = None,
+        center: tuple[float, float] | None = None,
+        radius_meters: float | None = None,
+        phone_type: PhoneNumberType | None = None,
+        sort: OrganizationSortOrder = OrganizationSortOrder.NAME,
+        cursor: str | None = None,
+        limit: int,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> OrganizationSearchResponseSchema:
+        if sort == OrganizationSortOrder.DISTANCE and center is None:
+            raise ValueError("Distance sort requires latitude and longitude")
+        after = self._decode_search_cursor(cursor, sort) if cursor else None
+
+        if center is not None and radius_meters is not None:
+            radius_bounds = get_bounding_box(*center, radius_meters)
+            bounds = (
+                self._intersect_bounds(bounds, radius_bounds)
+                if bounds is not None
+                else radius_bounds
+            )
+
+        occupation_ids = None
+        if occupation_id is not None:
+            occupation_ids = self.occupation_repository.descendant_ids_select(
+                occupation_id,
+                max_depth=self.MAX_OCCUPATION_DEPTH if include_children else 0,
+                include_self=True,
+            )
+
+        rows = await self.organization_repository.search(
+            query=query,
+            occupation_ids=occupation_ids,
+            bounds=bounds,
+            center=center,
+            radius_meters=radius_meters,
+            phone_type=phone_type,
+            sort=sort,
+            after=after,
+            limit=limit + 1,
+            fields=fields,
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([sort, *rows[-1][1]])
+        return OrganizationSearchResponseSchema(
+            organizations=self._map_organizations(
+                (organization for organization, _ in rows),
+                fields,
+            ),
+            next_cursor=next_cursor,
+        )
+
+    async def bulk_upsert(
+        self,
+        organizations: Sequence[OrganizationUpsertSchema],
+    ) -> OrganizationBulkUpsertResponseSchema:
+        ids = []
+        chunk_size = core_settings.BULK_UPSERT_CHUNK_SIZE
+        for offset in range(0, len(organizations), chunk_size):
+            chunk = organizations[offset:offset + chunk_size]
+            try:
+                ids.extend(await self._upsert_chunk(chunk))
+                await self.organization_repository.commit()
+            except IntegrityError as exc:
+                await self.organization_repository.rollback()
+                raise ValueError(
+                    f"Organizations {offset}..{offset + len(chunk) - 1} were rejected, "
+                    f"{offset} earlier organizations were saved: {exc.orig}"
+                ) from exc
+        return OrganizationBulkUpsertResponseSchema(ids=ids)
+
+    async def _upsert_chunk(
+        self,
+        organizations: Sequence[OrganizationUpsertSchema],
+    ) -> list[int]:
+        ids = await self.organization_repository.upsert_many(
+            [organization.name for organization in organizations],
+        )
+        buildings = []
+        without_building = []
+        phones = []
+        links = []
+        for organization_id, organization in zip(ids, organizations):
+            if organization.building is not None:
+                buildings.append({
+                    **organization.building.model_dump(),
+                    "organization_id": organization_id,
+                })
+            else:
+                without_building.append(organization_id)
+            phones.extend(
+                {**phone.model_dump(), "organization_id": organization_id}
+                for phone in organization.phones
+            )
+            links.extend(
+                (organization_id, occupation_id)
+                for occupation_id in organization.occupation_ids
+            )
+        await self.building_repository.upsert_many(buildings)
+        await self.building_repository.delete_by_organization_ids(without_building)
+        await self.phone_number_repository.replace_for_organizations(ids, phones)
+        await self.organization_repository.replace_occupation_links(ids, links)
+        return ids
+
+    async def list_changes(
+        self,
+        *,
+        cursor: str | None = None,
+        limit: int,
+    ) -> OrganizationChangesResponseSchema:
+        after = self._decode_changes_cursor(cursor) if cursor else None
+        rows = await self.organization_repository.list_changes(
+            after=after,
+            limit=limit + 1,
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return OrganizationChangesResponseSchema(
+            changes=[
+                OrganizationChangeResponseSchema(
+                    id=row.id,
+                    operation=ChangeOperation.DELETE if row.deleted else ChangeOperation.UPSERT,
+                )
+                for row in rows
+            ],
+            next_cursor=encode_cursor([rows[-1].change_xid, rows[-1].id]) if rows else cursor,
+            has_more=has_more,
+        )
+
+    async def get_facets(
+        self,
+        *,
+        query: str | None = None,
+        bounds: dict[str, float] | None = None,
+    ) -> OrganizationFacetsResponseSchema:
+        if query is not None:
+            query = query.strip().lower()
+        # Counted over the exact bounds, so only the same viewport hits the
+        # cache; snapping bounds to a grid would count organizations outside it.
+        cache_key = (query, tuple(bounds.values()) if bounds is not None else None)
+        if (facets := self._facets_cache.get(cache_key)) is not None:
+            return facets
+
+        generation = self._facets_cache.generation()
+        organization_ids = None
+        if query is not None or bounds is not None:
+            organization_ids = self.organization_repository.filtered_ids_select(
+                query=query,
+                bounds=bounds,
+            )
+        total = await self.organization_repository.count_filtered(
+            query=query,
+            bounds=bounds,
+        )
+        occupation_counts = await self.occupation_repository.count_organizations(
+            organization_ids,
+        )
+        phone_type_counts = await (self.phone_number_repository
+                                   .count_organizations_by_type(organization_ids))
+
+        facets = OrganizationFacetsResponseSchema(
+            total=total,
+            bounds=BoundsResponseSchema(**bounds) if bounds is not None else None,
+            occupations=[
+                OccupationFacetResponseSchema(
+                    id=row.id,
+                    name=row.name,
+                    parent_id=row.parent_id,
+                    count=row.organization_count,
+                )
+                for row in occupation_counts
+            ],
+            phone_types=[
+                PhoneTypeFacetResponseSchema(type=row.type, count=row.organization_count)
+                for row in phone_type_counts
+            ],
+        )
+        self._facets_cache.set(cache_key, facets, ["aggregates"], generation=generation)
+        return facets
 
     async def list_buildings(self) -> list[BuildingResponseSchema]:
         buildings = await self.building_repository.list_all()
@@ -138,43 +496,132 @@ class OrganizationService(BaseService):
         )
         return self._map_buildings(buildings)
 
-    async def list_organizations_within_radius(
+    async def list_buildings_in_tile(
+        self,
+        *,
+        zoom: int,
+        x: int,
+        y: int,
+    ) -> list[BuildingResponseSchema]:
+        bounds = tile_bounds(zoom, x, y)
+        buildings = await self.building_repository.list_by_geohash_prefixes(
+            geohash_prefixes_covering(bounds),
+            **bounds,
+        )
+        return self._map_buildings(buildings)
+
+    async def cluster_buildings_within_bounds(
+        self,
+        *,
+        min_latitude: float,
+        max_latitude: float,
+        min_longitude: float,
+        max_longitude: float,
+        zoom: int,
+    ) -> BuildingClustersResponseSchema:
+        bounds = {
+            "min_latitude": min_latitude,
+            "max_latitude": max_latitude,
+            "min_longitude": min_longitude,
+            "max_longitude": max_longitude,
+        }
+        total = await self.building_repository.count_within_bounds(**bounds)
+        if total <= core_settings.CLUSTER_POINT_THRESHOLD:
+            buildings = await self._fetch_buildings_within_bounds(**bounds)
+            return BuildingClustersResponseSchema(
+                zoom=zoom,
+                clusters=[],
+                buildings=self._map_buildings(buildings),
+            )
+
+        # zoom is chosen independently of the bounds, so the cell is widened
+        # until the bounds span at most CLUSTER_MAX_CELLS_PER_AXIS cells.
+        cell_size = max(
+            360.0 / (2 ** zoom) / core_settings.CLUSTER_CELLS_PER_TILE,
+            max(max_latitude - min_latitude, max_longitude - min_longitude)
+            / core_settings.CLUSTER_MAX_CELLS_PER_AXIS,
+        )
+        clusters = await self.building_repository.cluster_within_bounds(
+            **bounds,
+            cell_size=cell_size,
+        )
+        return BuildingClustersResponseSchema(
+            zoom=zoom,
+            clusters=[
+                BuildingClusterResponseSchema(
+                    latitude=cluster.latitude,
+                    longitude=cluster.longitude,
+                    count=cluster.building_count,
+                    sample_organization_id=cluster.sample_organization_id,
+                )
+                for cluster in clusters
+            ],
+            buildings=[],
+        )
+
+    async def encode_organizations_within_radius(
         self,
         *,
         latitude: float,
         longitude: float,
         radius_meters: float,
-    ) -> OrganizationAreaResponseSchema:
+        fields: Collection[OrganizationField] | None = None,
+        response_format: ResponseFormat = ResponseFormat.JSON,
+    ) -> bytes:
         buildings = await self._fetch_buildings_within_radius(
             latitude=latitude,
             longitude=longitude,
             radius_meters=radius_meters,
         )
-        organizations = await self._fetch_organizations_for_buildings(buildings)
-        return OrganizationAreaResponseSchema(
-            organizations=self._map_organizations(organizations),
-            buildings=self._map_buildings(buildings),
-        )
+        organizations = await self._fetch_organizations_for_buildings(buildings, fields)
+        return await self._encode_area(organizations, buildings, fields, response_format)
 
-    async def list_organizations_within_bounds(
+    async def encode_organizations_within_bounds(
         self,
         *,
         min_latitude: float,
         max_latitude: float,
         min_longitude: float,
         max_longitude: float,
-    ) -> OrganizationAreaResponseSchema:
+        fields: Collection[OrganizationField] | None = None,
+        response_format: ResponseFormat = ResponseFormat.JSON,
+    ) -> bytes:
         buildings = await self._fetch_buildings_within_bounds(
             min_latitude=min_latitude,
             max_latitude=max_latitude,
             min_longitude=min_longitude,
             max_longitude=max_longitude,
         )
-        organizations = await self._fetch_organizations_for_buildings(buildings)
-        return OrganizationAreaResponseSchema(
-            organizations=self._map_organizations(organizations),
-            buildings=self._map_buildings(buildings),
-        )
+        organizations = await self._fetch_organizations_for_buildings(buildings, fields)
+        return await self._encode_area(organizations, buildings, fields, response_format)
+
+    async def _encode_area(
+        self,
+        organizations: Sequence[Organization],
+        buildings: Sequence[Building],
+        fields: Collection[OrganizationField] | None,
+        response_format: ResponseFormat,
+    ) -> bytes:
+        fields = frozenset(fields) if fields is not None else ALL_FIELDS
+        organization_rows = [organization_row(organization, fields) for organization in organizations]
+        building_rows = [building_row(building) for building in buildings]
+        offload = should_offload(len(building_rows))
+        # Spanned here, since offloaded work does not see the current span.
+        with start_span(
+            "encode_area_rows",
+            organizations=len(organization_rows),
+            buildings=len(building_rows),
+            offloaded=offload,
+        ):
+            if offload:
+                return await run_offloaded(
+                    encode_area_rows,
+                    organization_rows,
+                    building_rows,
+                    fields,
+                    response_format,
+                )
+            return encode_area_rows(organization_rows, building_rows, fields, response_format)
 
     async def _fetch_buildings_within_radius(
         self,
@@ -183,12 +630,12 @@ class OrganizationService(BaseService):
         longitude: float,
         radius_meters: float,
     ) -> list[Building]:
-        bounds = self._get_bounding_box(latitude, longitude, radius_meters)
+        bounds = get_bounding_box(latitude, longitude, radius_meters)
         buildings = await self.building_repository.list_within_bounds(**bounds)
         return [
             building
             for building in buildings
-            if self._distance_between(
+            if distance_between(
                 latitude,
                 longitude,
                 building.latitude,
@@ -216,11 +663,15 @@ class OrganizationService(BaseService):
     async def _fetch_organizations_for_buildings(
         self,
         buildings: Iterable[Building],
+        fields: Collection[OrganizationField] | None = None,
     ) -> Sequence[Organization]:
         building_ids = {building.id for building in buildings}
         if not building_ids:
             return []
-        return await self.organization_repository.list_by_building_ids(building_ids)
+        return await self.organization_repository.list_by_building_ids(
+            building_ids,
+            fields=fields,
+        )
 
     def _map_buildings(
         self,
@@ -231,99 +682,84 @@ class OrganizationService(BaseService):
     def _map_organizations(
         self,
         organizations: Iterable[Organization],
+        fields: Collection[OrganizationField] | None = None,
     ) -> list[OrganizationResponseSchema]:
-        return [
-            self._to_organization_schema(organization)
-            for organization in organizations
-        ]
+        with start_span("OrganizationService._map_organizations"):
+            return [
+                self._to_organization_schema(organization, fields)
+                for organization in organizations
+            ]
 
     def _to_building_schema(self, building: Building) -> BuildingResponseSchema:
-        return BuildingResponseSchema(
-            id=building.id,
-            address=building.address,
-            latitude=building.latitude,
-            longitude=building.longitude,
-            organization_id=building.organization_id,
-        )
+        return building_schema(building_row(building))
 
-    def _to_occupation_schema(self, occupation: Occupation) -> OccupationResponseSchema:
-        return OccupationResponseSchema(
-            id=occupation.id,
-            name=occupation.name,
-            parent_id=occupation.parent_id,
-        )
+    def _to_organization_schema(
+        self,
+        organization: Organization,
+        fields: Collection[OrganizationField] | None = None,
+    ) -> OrganizationResponseSchema:
+        if fields is None:
+            fields = ALL_FIELDS
+        return organization_schema(organization_row(organization, fields), fields)
 
-    def _to_phone_schema(self, phone: PhoneNumber) -> PhoneNumberResponseSchema:
-        return PhoneNumberResponseSchema(
-            id=phone.id,
-            value=phone.value,
-            is_primary=phone.is_primary,
-            type=phone.type,
-            comment=phone.comment,
-        )
+    @classmethod
+    def invalidate(cls, change: DataChange) -> None:
+        if change.ids is None:
+            cls.clear_caches()
+            return
+        if change.table == "occupations":
+            cls._organization_cache.invalidate(["occupations"])
+        else:
+            cls._organization_cache.invalidate(
+                f"organization:{organization_id}" for organization_id in change.ids
+            )
+        cls._facets_cache.invalidate(["aggregates"])
+        request_snapshot_rebuild()
 
-    def _to_organization_schema(self, organization: Organization) -> OrganizationResponseSchema:
-        building = organization.building
-        occupations = sorted(
-            organization.occupations,
-            key=lambda item: (item.parent_id or 0, item.id),
-        )
-        phones = sorted(
-            organization.phones,
-            key=lambda item: (not item.is_primary, item.id),
-        )
-        return OrganizationResponseSchema(
-            id=organization.id,
-            name=organization.name,
-            building=self._to_building_schema(building) if building else None,
-            occupations=[self._to_occupation_schema(occupation) for occupation in occupations],
-            phones=[self._to_phone_schema(phone) for phone in phones],
-        )
+    @classmethod
+    def clear_caches(cls) -> None:
+        cls._organization_cache.clear()
+        cls._facets_cache.clear()
+        request_snapshot_rebuild()
 
-    def _get_bounding_box(
+    def _decode_search_cursor(
         self,
-        latitude: float,
-        longitude: float,
-        radius_meters: float,
+        cursor: str,
+        sort: OrganizationSortOrder,
+    ) -> list[Any]:
+        values = decode_cursor(cursor)
+        if not values or values[0] != sort:
+            raise ValueError("Cursor does not match the sort order")
+        key = values[1:]
+        expected_types = self._SEARCH_CURSOR_TYPES[sort]
+        if len(key) != len(expected_types) or not all(
+            isinstance(value, expected) and not isinstance(value, bool)
+            for value, expected in zip(key, expected_types)
+        ):
+            raise ValueError("Malformed cursor")
+        return key
+
+    def _decode_changes_cursor(self, cursor: str) -> list[int]:
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not all(
+            isinstance(value, int) and not isinstance(value, bool)
+            for value in values
+        ):
+            raise ValueError("Malformed cursor")
+        return values
+
+    def _intersect_bounds(
+        self,
+        first: dict[str, float],
+        second: dict[str, float],
     ) -> dict[str, float]:
-        lat_delta = radius_meters / self._METERS_PER_DEGREE_LATITUDE
-        lon_denominator = max(cos(radians(latitude)), 1e-6)
-        lon_delta = radius_meters / (self._METERS_PER_DEGREE_LATITUDE * lon_denominator)
         return {
-            "min_latitude": max(latitude - lat_delta, -90.0),
-            "max_latitude": min(latitude + lat_delta, 90.0),
-            "min_longitude": max(longitude - lon_delta, -180.0),
-            "max_longitude": min(longitude + lon_delta, 180.0),
+            "min_latitude": max(first["min_latitude"], second["min_latitude"]),
+            "max_latitude": min(first["max_latitude"], second["max_latitude"]),
+            "min_longitude": max(first["min_longitude"], second["min_longitude"]),
+            "max_longitude": min(first["max_longitude"], second["max_longitude"]),
         }
 
-    def _distance_between(
-        self,
-        lat_a: float,
-        lon_a: float,
-        lat_b: float,
-        lon_b: float,
-    ) -> float:
-        lat_a_rad = radians(lat_a)
-        lat_b_rad = radians(lat_b)
-        delta_lat = radians(lat_b - lat_a)
-        delta_lon = radians(lon_b - lon_a)
-
-        a = (
-            sin(delta_lat / 2) ** 2
-            + cos(lat_a_rad) * cos(lat_b_rad) * sin(delta_lon / 2) ** 2
-        )
-        c = 2 * asin(min(1.0, sqrt(a)))
-        return self._EARTH_RADIUS_METERS * c
-
     @classmethod
-    def get_service(
-        cls,
-        organization_repository: OrganizationRepositoryDependency,
-        building_repository: BuildingRepositoryDependency,
-        occupation_repository: OccupationRepositoryDependency,
-    ) -> "OrganizationService":
-        return cls(
-            organization_repository=organization_repository,
-            building_repository=building_repository,
-            occupation_repository=occupation_repository,
-        )
+    def get_service(cls, session_provider: SessionProviderDependency) -> "OrganizationService":
+        return cls(session_provider)
@@ -0,0 +1,137 @@
+"""
+Plain-tuple snapshots of ORM rows and their conversion to response schemas.
+
+Rows are cheap to take on the event loop and picklable, so large result
+sets can be mapped and encoded in a worker thread or process.
+"""
+from collections.abc import Collection, Sequence
+from typing import Optional
+
+from core.columnar import encode_area
+from enums.organization import OrganizationField
+from enums.response_format import ResponseFormat
+from models.building import Building
+from models.organization import Organization
+from schemas.organization import (
+    BuildingResponseSchema,
+    OccupationResponseSchema,
+    OrganizationAreaResponseSchema,
+    OrganizationResponseSchema,
+    PhoneNumberResponseSchema,
+)
+
+# id, address, latitude, longitude, organization_id
+BuildingRow = tuple[int, str, float, float, int]
+# id, name, parent_id
+OccupationRow = tuple[int, str, Optional[int]]
+# id, value, is_primary, type, comment
+PhoneRow = tuple[int, str, bool, str, Optional[str]]
+# id, name, building, occupations, phones; fields that were not requested are None
+OrganizationRow = tuple[
+    int,
+    Optional[str],
+    Optional[BuildingRow],
+    Optional[tuple[OccupationRow, ...]],
+    Optional[tuple[PhoneRow, ...]],
+]
+
+ALL_FIELDS = frozenset(OrganizationField)
+
+
+def building_row(building: Building) -> BuildingRow:
+    return (
+        building.id,
+        building.address,
+        building.latitude,
+        building.longitude,
+        building.organization_id,
+    )
+
+
+def organization_row(
+    organization: Organization,
+    fields: Collection[OrganizationField] = ALL_FIELDS,
+) -> OrganizationRow:
+    building = None
+    if OrganizationField.BUILDING in fields and organization.building is not None:
+        building = building_row(organization.building)
+    occupations = None
+    if OrganizationField.OCCUPATIONS in fields:
+        occupations = tuple(
+            (occupation.id, occupation.name, occupation.parent_id)
+            for occupation in organization.occupations
+        )
+    phones = None
+    if OrganizationField.PHONES in fields:
+        phones = tuple(
+            (phone.id, phone.value, phone.is_primary, phone.type, phone.comment)
+            for phone in organization.phones
+        )
+    return (
+        organization.id,
+        organization.name if OrganizationField.NAME in fields else None,
+        building,
+        occupations,
+        phones,
+    )
+
+
+def building_schema(row: BuildingRow) -> BuildingResponseSchema:
+    id_, address, latitude, longitude, organization_id = row
+    return BuildingResponseSchema(
+        id=id_,
+        address=address,
+        latitude=latitude,
+        longitude=longitude,
+        organization_id=organization_id,
+    )
+
+
+def organization_schema(
+    row: OrganizationRow,
+    fields: Collection[OrganizationField] = ALL_FIELDS,
+) -> OrganizationResponseSchema:
+    id_, name, building, occupations, phones = row
+    values = {}
+    if OrganizationField.NAME in fields:
+        values["name"] = name
+    if OrganizationField.BUILDING in fields:
+        values["building"] = building_schema(building) if building else None
+    if OrganizationField.OCCUPATIONS in fields:
+        values["occupations"] = [
+            OccupationResponseSchema(id=occupation_id, name=name, parent_id=parent_id)
+            for occupation_id, name, parent_id in sorted(
+                occupations,
+                key=lambda item: (item[2] or 0, item[0]),
+            )
+        ]
+    if OrganizationField.PHONES in fields:
+        values["phones"] = [
+            PhoneNumberResponseSchema(
+                id=phone_id,
+                value=value,
+                is_primary=is_primary,
+                type=phone_type,
+                comment=comment,
+            )
+            for phone_id, value, is_primary, phone_type, comment in sorted(
+                phones,
+                key=lambda item: (not item[2], item[0]),
+            )
+        ]
+    return OrganizationResponseSchema(id=id_, **values)
+
+
+def encode_area_rows(
+    organizations: Sequence[OrganizationRow],
+    buildings: Sequence[BuildingRow],
+    fields: Collection[OrganizationField],
+    response_format: ResponseFormat,
+) -> bytes:
+    area = OrganizationAreaResponseSchema(
+        organizations=[organization_schema(row, fields) for row in organizations],
+        buildings=[building_schema(row) for row in buildings],
+    )
+    if response_format == ResponseFormat.COLUMNAR:
+        return encode_area(area)
+    return area.model_dump_json(by_alias=True, exclude_unset=True).encode()
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+from array import array
+from collections import defaultdict
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.fuzzy import grams, name_words, word_variants
+from repositories import OccupationRepository, OrganizationRepository
+from snapshot import format as snapshot_format
+
+
+async def fetch_data_version(session: AsyncSession) -> int:
+    """
+    Fingerprint the data the snapshot is built from.
+
+    Name changes and deletions stamp organizations and tombstones with the
+    writing transaction, so their indexed change_xid maxima replace a scan
+    of the large tables; occupations are few enough to fingerprint whole.
+    """
+    change_xid, horizon = await OrganizationRepository(session).get_change_version()
+    count, xmin_sum = await OccupationRepository(session).count_and_xmin_sum()
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{change_xid}:{horizon}:{count}:{xmin_sum}".encode())
+    return int.from_bytes(digest.digest(), "little")
+
+
+async def build_snapshot(session: AsyncSession, path: Path, data_version: int) -> None:
+    columns: dict[bytes, array] = {}
+    links = await OccupationRepository(session).list_parent_links()
+    columns.update(_occupation_columns([(row.id, row.parent_id) for row in links]))
+
+    names: list[tuple[str, int]] = []
+    async for rows in OrganizationRepository(session).iter_names():
+        names.extend((row.name.casefold(), row.id) for row in rows)
+
+    def finish() -> None:
+        columns.update(_fuzzy_columns(names))
+        snapshot_format.write_snapshot(path, data_version, columns)
+
+    await asyncio.to_thread(finish)
+
+
+def _occupation_columns(links: list[tuple[int, int | None]]) -> dict[bytes, array]:
+    children: dict[int, list[int]] = defaultdict(list)
+    for occupation_id, parent_id in links:
+        if parent_id is not None:
+            children[parent_id].append(occupation_id)
+
+    occupation_ids = array("i")
+    offsets = array("i", [0])
+    descendants = array("i")
+    depths = array("i")
+    for occupation_id, _ in sorted(links):
+        stack = [(occupation_id, 0)]
+        visited = set()
+        while stack:
+            current_id, depth = stack.pop()
+            if current_id in visited:
+                continue
+            visited.add(current_id)
+            descendants.append(current_id)
+            depths.append(depth)
+            stack.extend((child_id, depth + 1) for child_id in children[current_id])
+        occupation_ids.append(occupation_id)
+        offsets.append(len(descendants))
+    return {
+        snapshot_format.OCCUPATION_IDS: occupation_ids,
+        snapshot_format.OCCUPATION_OFFSETS: offsets,
+        snapshot_format.OCCUPATION_DESCENDANTS: descendants,
+        snapshot_format.OCCUPATION_DEPTHS: depths,
+    }
+
+
+def _fuzzy_columns(names: list[tuple[str, int]]) -> dict[bytes, array]:
+    word_organizations: dict[str, list[int]] = defaultdict(list)
+    for name, organization_id in names:
+        variants = {
+            variant
+            for word in name_words(name)
+            for variant in word_variants(word)
+        }
+        for variant in variants:
+            word_organizations[variant].append(organization_id)
+
+    word_offsets = array("i", [0])
+    word_text = bytearray()
+    posting_offsets = array("i", [0])
+    organization_ids = array("i")
+    # length_offsets[n] is the id of the first word at least n characters long.
+    length_offsets = array("i")
+    gram_words: dict[int, array] = defaultdict(lambda: array("i"))
+    words = sorted(word_organizations, key=lambda word: (len(word), word))
+    for word_id, word in enumerate(words):
+        while len(length_offsets) <= len(word):
+            length_offsets.append(word_id)
+        word_text.extend(word.encode())
+        word_offsets.append(len(word_text))
+        organization_ids.extend(sorted(word_organizations[word]))
+        posting_offsets.append(len(organization_ids))
+        for gram in grams(word):
+            gram_words[gram].append(word_id)
+    length_offsets.append(len(words))
+
+    gram_keys = array("q")
+    gram_offsets = array("i", [0])
+    gram_word_ids = array("i")
+    for gram in sorted(gram_words):
+        gram_keys.append(gram)
+        gram_word_ids.extend(gram_words[gram])
+        gram_offsets.append(len(gram_word_ids))
+    return {
+        snapshot_format.FUZZY_WORD_TEXT: array("B", word_text),
+        snapshot_format.FUZZY_WORD_OFFSETS: word_offsets,
+        snapshot_format.FUZZY_WORD_POSTING_OFFSETS: posting_offsets,
+        snapshot_format.FUZZY_WORD_ORGANIZATION_IDS: organization_ids,
+        snapshot_format.FUZZY_LENGTH_OFFSETS: length_offsets,
+        snapshot_format.FUZZY_GRAM_KEYS: gram_keys,
+        snapshot_format.FUZZY_GRAM_OFFSETS: gram_offsets,
+        snapshot_format.FUZZY_GRAM_WORD_IDS: gram_word_ids,
+    }
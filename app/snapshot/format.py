@@ -0,0 +1,227 @@
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from pathlib import Path
+
+from core.fuzzy import GRAM_SIZE, bounded_distance, grams, max_edits, query_words
+
+MAGIC = b"OSSN"
+FORMAT_VERSION = 4
+ALIGNMENT = 8
+
+# magic, format version, data version, section count
+_HEADER = struct.Struct("<4sIQI4x")
+# tag, array typecode, byte offset, item count
+_SECTION = struct.Struct("<4s1s3xQQ")
+
+OCCUPATION_IDS = b"OCID"
+OCCUPATION_OFFSETS = b"OCOF"
+OCCUPATION_DESCENDANTS = b"OCDS"
+OCCUPATION_DEPTHS = b"OCDP"
+FUZZY_WORD_TEXT = b"FWTX"
+FUZZY_WORD_OFFSETS = b"FWOF"
+FUZZY_WORD_POSTING_OFFSETS = b"FWPO"
+FUZZY_WORD_ORGANIZATION_IDS = b"FWOR"
+FUZZY_LENGTH_OFFSETS = b"FWLN"
+FUZZY_GRAM_KEYS = b"FGKY"
+FUZZY_GRAM_OFFSETS = b"FGOF"
+FUZZY_GRAM_WORD_IDS = b"FGWD"
+
+
+def write_snapshot(
+    path: Path,
+    data_version: int,
+    columns: Mapping[bytes, array],
+) -> None:
+    """
+    Write columns into a new snapshot file and atomically move it over ``path``.
+
+    Occupations are sorted by id, fuzzy words by length and text and grams
+    by key, so readers can bisect without building any index.
+    """
+    table_size = _HEADER.size + _SECTION.size * len(columns)
+    offset = table_size + (-table_size % ALIGNMENT)
+    sections = []
+    for tag, column in columns.items():
+        sections.append((tag, column, offset))
+        size = len(column) * column.itemsize
+        offset += size + (-size % ALIGNMENT)
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, data_version, len(columns)))
+        for tag, column, section_offset in sections:
+            file.write(_SECTION.pack(tag, column.typecode.encode(), section_offset, len(column)))
+        for tag, column, section_offset in sections:
+            file.write(b"\0" * (section_offset - file.tell()))
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            file.write(memoryview(column))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """
+    Read-only view over a memory-mapped snapshot file.
+
+    Columns are memoryviews into the shared mapping, so every worker that
+    opens the same file shares its physical pages.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file_id = (stat.st_ino, stat.st_mtime_ns)
+
+        buffer = memoryview(self._mmap)
+        magic, format_version, self.data_version, section_count = _HEADER.unpack_from(buffer)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot file: {path}")
+
+        self._columns: dict[bytes, memoryview | array] = {}
+        for index in range(section_count):
+            tag, typecode, offset, count = _SECTION.unpack_from(
+                buffer,
+                _HEADER.size + index * _SECTION.size,
+            )
+            typecode = typecode.decode()
+            itemsize = array(typecode).itemsize
+            column = buffer[offset:offset + count * itemsize]
+            if sys.byteorder == "big":
+                column = array(typecode, column.tobytes())
+                column.byteswap()
+            else:
+                column = column.cast(typecode)
+            self._columns[tag] = column
+
+    def descendant_ids(
+        self,
+        occupation_id: int,
+        *,
+        max_depth: int | None = None,
+    ) -> list[int] | None:
+        occupation_ids = self._columns[OCCUPATION_IDS]
+        index = bisect_left(occupation_ids, occupation_id)
+        if index == len(occupation_ids) or occupation_ids[index] != occupation_id:
+            return None
+        offsets = self._columns[OCCUPATION_OFFSETS]
+        start, end = offsets[index], offsets[index + 1]
+        descendants = self._columns[OCCUPATION_DESCENDANTS][start:end]
+        if max_depth is None:
+            return descendants.tolist()
+        depths = self._columns[OCCUPATION_DEPTHS][start:end]
+        return [
+            descendant
+            for descendant, depth in zip(descendants, depths)
+            if depth <= max_depth
+        ]
+
+    def fuzzy_name_matches(self, query: str, *, limit: int) -> list[int]:
+        """
+        Return ids of organizations with a close match for every word of
+        ``query``, fewest total edits first.
+        """
+        scores: dict[int, int] | None = None
+        for word in query_words(query):
+            distances = self._fuzzy_word_distances(word)
+            if scores is None:
+                scores = distances
+            else:
+                scores = {
+                    organization_id: score + distances[organization_id]
+                    for organization_id, score in scores.items()
+                    if organization_id in distances
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [organization_id for organization_id, _ in best]
+
+    def _fuzzy_word_distances(self, word: str) -> dict[int, int]:
+        limit = max_edits(word)
+        posting_offsets = self._columns[FUZZY_WORD_POSTING_OFFSETS]
+        organization_ids = self._columns[FUZZY_WORD_ORGANIZATION_IDS]
+        distances: dict[int, int] = {}
+        for word_id in self._fuzzy_candidates(word, limit):
+            distance = bounded_distance(word, self.fuzzy_word_at(word_id), limit)
+            if distance > limit:
+                continue
+            start, end = posting_offsets[word_id], posting_offsets[word_id + 1]
+            for organization_id in organization_ids[start:end]:
+                if distance < distances.get(organization_id, limit + 1):
+                    distances[organization_id] = distance
+        return distances
+
+    def _fuzzy_candidates(self, word: str, limit: int) -> set[int]:
+        """
+        Return ids of words that may be within ``limit`` edits of ``word``.
+
+        An insertion, deletion or substitution destroys at most GRAM_SIZE
+        grams and an adjacent transposition one more, so such a word shares
+        at least one of any (GRAM_SIZE + 1) * limit + 1 grams of ``word``.
+        """
+        word_grams = grams(word)
+        if len(word_grams) > (GRAM_SIZE + 1) * limit:
+            return self._gram_candidates(word_grams, (GRAM_SIZE + 1) * limit + 1)
+        if len(word_grams) > GRAM_SIZE * limit:
+            # Too short to bound transpositions by grams: matches without
+            # one still share a gram, and each transposition is undone on
+            # the query, which leaves one edit less to search for.
+            candidates = self._gram_candidates(word_grams, GRAM_SIZE * limit + 1)
+            swapped_words = {
+                word[:index] + word[index + 1] + word[index] + word[index + 2:]
+                for index in range(len(word) - 1)
+            }
+            swapped_words.discard(word)
+            for swapped in swapped_words:
+                candidates |= self._fuzzy_candidates(swapped, limit - 1)
+            return candidates
+        # Repetitive words have too few distinct grams to bound the search;
+        # comparing them with every word of similar length takes seconds on
+        # large snapshots, so they only match exactly.
+        word_id = self._fuzzy_word_id(word)
+        return set() if word_id is None else {word_id}
+
+    def _fuzzy_word_id(self, word: str) -> int | None:
+        # Words are sorted by length, then text.
+        length_offsets = self._columns[FUZZY_LENGTH_OFFSETS]
+        if len(word) + 1 >= len(length_offsets):
+            return None
+        start, end = length_offsets[len(word)], length_offsets[len(word) + 1]
+        word_id = bisect_left(range(start, end), word, key=self.fuzzy_word_at) + start
+        if word_id < end and self.fuzzy_word_at(word_id) == word:
+            return word_id
+        return None
+
+    def _gram_candidates(self, word_grams: set[int], count: int) -> set[int]:
+        gram_keys = self._columns[FUZZY_GRAM_KEYS]
+        gram_offsets = self._columns[FUZZY_GRAM_OFFSETS]
+        gram_word_ids = self._columns[FUZZY_GRAM_WORD_IDS]
+        postings = []
+        for gram in word_grams:
+            index = bisect_left(gram_keys, gram)
+            if index < len(gram_keys) and gram_keys[index] == gram:
+                postings.append(gram_word_ids[gram_offsets[index]:gram_offsets[index + 1]])
+            else:
+                postings.append(())
+        # The rarest grams give the fewest candidates.
+        postings.sort(key=len)
+        candidates = set()
+        for posting in postings[:count]:
+            candidates.update(posting)
+        return candidates
+
+    def fuzzy_word_at(self, index: int) -> str:
+        offsets = self._columns[FUZZY_WORD_OFFSETS]
+        return bytes(self._columns[FUZZY_WORD_TEXT][offsets[index]:offsets[index + 1]]).decode()
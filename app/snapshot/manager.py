@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import fcntl
+import logging
+import os
+from pathlib import Path
+
+from db.session import Session
+from snapshot.builder import build_snapshot, fetch_data_version
+from snapshot.format import Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotUnavailableError(RuntimeError):
+    pass
+
+
+class SnapshotManager:
+    """
+    Keep a memory-mapped snapshot of the read indexes current in this worker.
+
+    One worker at a time, chosen by an exclusive lock on ``<path>.lock``,
+    rebuilds the file when the data fingerprint changes; every worker
+    remaps the file when it is replaced.
+    """
+
+    def __init__(self, path: Path, refresh_interval: float) -> None:
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.snapshot: Snapshot | None = None
+        self._rebuild_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._reload_if_replaced()
+        self._rebuild_requested.set()
+        self._task = asyncio.create_task(self._run(), name="snapshot-manager")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def request_rebuild(self) -> None:
+        self._rebuild_requested.set()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._rebuild_requested.wait(),
+                    timeout=self.refresh_interval,
+                )
+            self._rebuild_requested.clear()
+            try:
+                await self._rebuild_if_leader()
+                self._reload_if_replaced()
+            except Exception:
+                logger.exception("Snapshot refresh failed")
+
+    async def _rebuild_if_leader(self) -> None:
+        lock_fd = os.open(f"{self.path}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            async with Session() as session:
+                data_version = await fetch_data_version(session)
+                current = self._read_current()
+                if current is not None and current.data_version == data_version:
+                    return
+                await build_snapshot(session, self.path, data_version)
+            logger.info("Snapshot %s rebuilt (version %x)", self.path, data_version)
+        finally:
+            os.close(lock_fd)
+
+    def _read_current(self) -> Snapshot | None:
+        self._reload_if_replaced()
+        return self.snapshot
+
+    def _reload_if_replaced(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if self.snapshot is not None and self.snapshot.file_id == file_id:
+            return
+        try:
+            self.snapshot = Snapshot(self.path)
+        except ValueError:
+            # Written by another format version; the leader rebuilds it.
+            logger.warning("Ignoring unsupported snapshot %s", self.path)
+
+
+snapshot_manager: SnapshotManager | None = None
+
+
+async def start_snapshot_manager(path: Path, refresh_interval: float) -> SnapshotManager:
+    global snapshot_manager
+    snapshot_manager = SnapshotManager(path, refresh_interval)
+    await snapshot_manager.start()
+    return snapshot_manager
+
+
+async def stop_snapshot_manager() -> None:
+    global snapshot_manager
+    if snapshot_manager is not None:
+        await snapshot_manager.stop()
+        snapshot_manager = None
+
+
+def request_snapshot_rebuild() -> None:
+    if snapshot_manager is not None:
+        snapshot_manager.request_rebuild()
+
+
+def current_snapshot() -> Snapshot | None:
+    if snapshot_manager is None:
+        return None
+    return snapshot_manager.snapshot
+
+
+def require_snapshot() -> Snapshot:
+    if (snapshot := current_snapshot()) is None:
+        raise SnapshotUnavailableError("Snapshot is not loaded")
+    return snapshot
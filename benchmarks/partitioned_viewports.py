@@ -0,0 +1,213 @@
+"""
+Check that viewport latency stays flat as regions are added to buildings.
+
+Point the POSTGRES_* settings at an empty scratch database migrated with
+partitioning (``alembic -x partition_buildings=true upgrade head``), then
+run from the repository root:
+
+    PYTHONPATH=app python benchmarks/partitioned_viewports.py --per-region 50000
+
+Each step seeds one more city in its own geohash region and times the same
+Moscow viewport through BuildingRepository.list_within_bounds, printing the
+seconds spent seeding the city and the buildings partitions the plan still
+reads. The run exits non-zero when the median with every region loaded is
+more than --max-slowdown times the median with one. Run it again on a
+database migrated without partitioning for a baseline, and not alongside
+other load, which skews the medians.
+
+With ``--layout world`` the cities are spread over the globe, and only
+Новосибирск shares the viewport's latitudes, so the latitude/longitude
+index already skips the other cities of an unpartitioned table. ``--layout
+band`` moves one city of each northern region onto the viewport's latitude,
+where only partition pruning can skip them.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from sqlalchemy import event, text
+
+from core.geo import encode_geohash, geohash_region, get_bounding_box
+from db.base import async_engine
+from db.seed import database_has_data
+from db.session import Session
+from db.slow_queries import SKIP_OPTION
+from repositories import BuildingRepository, OrganizationRepository
+
+BATCH_SIZE = 5000
+# One city per geohash region; the viewport is always in the first one.
+CITIES = (
+    ("Москва", 55.75, 37.62),
+    ("Нью-Йорк", 40.71, -74.01),
+    ("Лондон", 51.51, -0.13),
+    ("Токио", 35.68, 139.69),
+    ("Сидней", -33.87, 151.21),
+    ("Сан-Паулу", -23.55, -46.63),
+    ("Кейптаун", -33.92, 18.42),
+    ("Дели", 28.61, 77.21),
+    ("Лос-Анджелес", 34.05, -118.24),
+    ("Сингапур", 1.35, 103.82),
+    ("Каир", 30.04, 31.24),
+    ("Новосибирск", 55.01, 82.93),
+    ("Анкоридж", 61.22, -149.90),
+    ("Джакарта", -6.21, 106.85),
+    ("Якутск", 62.03, 129.73),
+)
+# One city per region of the viewport's latitude band, each moved onto the
+# viewport's latitude.
+BAND_CITIES = (
+    ("Москва", 55.75, 37.62),
+    ("Новосибирск", 55.75, 82.93),
+    ("Красноярск", 55.75, 92.87),
+    ("Усть-Камчатск", 55.75, 162.47),
+    ("Кодьяк", 55.75, -152.41),
+    ("Кетчикан", 55.75, -131.64),
+    ("Гус-Бей", 55.75, -60.42),
+    ("Эдинбург", 55.75, -3.19),
+)
+LAYOUTS = {"world": CITIES, "band": BAND_CITIES}
+
+
+def relations(plan: dict[str, Any]) -> Iterator[str]:
+    if "Relation Name" in plan:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from relations(child)
+
+
+async def seed_city(
+    city: str,
+    latitude: float,
+    longitude: float,
+    count: int,
+    rng: random.Random,
+) -> None:
+    async with Session() as session:
+        organizations = OrganizationRepository(session)
+        buildings = BuildingRepository(session)
+        for start in range(0, count, BATCH_SIZE):
+            end = min(start + BATCH_SIZE, count)
+            ids = await organizations.upsert_many([
+                f"{city} №{index}" for index in range(start, end)
+            ])
+            await buildings.upsert_many([
+                {
+                    "organization_id": organization_id,
+                    "address": f"г. {city}, {rng.randint(1, 200)}",
+                    "latitude": latitude + rng.uniform(-1.0, 1.0),
+                    "longitude": longitude + rng.uniform(-1.0, 1.0),
+                }
+                for organization_id in ids
+            ])
+            await session.commit()
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("ANALYZE buildings"))
+        await connection.execute(text("ANALYZE organizations"))
+
+
+async def time_viewport(bounds: dict[str, float], repeats: int) -> tuple[list[float], set[str]]:
+    statements: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not conn.get_execution_options().get(SKIP_OPTION):
+            statements.append((statement, parameters))
+
+    timings = []
+    async with Session() as session:
+        repository = BuildingRepository(session)
+        # Warm up the connection and the statement cache before timing.
+        await repository.list_within_bounds(**bounds)
+        for _ in range(repeats):
+            session.expunge_all()
+            started = time.perf_counter()
+            await repository.list_within_bounds(**bounds)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            await repository.list_within_bounds(**bounds)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(**{SKIP_OPTION: True})
+        statement, parameters = statements[0]
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar_one()
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+    return timings, {relation for relation in relations(plan) if relation.startswith("buildings")}
+
+
+async def run(args: argparse.Namespace) -> bool:
+    rng = random.Random(args.seed)
+    cities = LAYOUTS[args.layout][:args.regions]
+    _, latitude, longitude = cities[0]
+    bounds = get_bounding_box(latitude, longitude, args.radius)
+    try:
+        async with Session() as session:
+            if await database_has_data(session):
+                print("The benchmark needs an empty database")
+                return False
+            partitioned = await session.scalar(
+                text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'buildings'::regclass")
+            )
+        if not partitioned:
+            print("buildings is not partitioned, every viewport reads the whole table")
+
+        medians = []
+        print(
+            f"{'regions':>7}  {'buildings':>10}  {'seed s':>7}  {'median ms':>9}  {'p95 ms':>8}"
+            f"  relations read"
+        )
+        for index, (city, city_latitude, city_longitude) in enumerate(cities, 1):
+            started = time.perf_counter()
+            await seed_city(city, city_latitude, city_longitude, args.per_region, rng)
+            seeded = time.perf_counter() - started
+            timings, read = await time_viewport(bounds, args.repeats)
+            median = statistics.median(timings)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            medians.append(median)
+            region = geohash_region(encode_geohash(city_latitude, city_longitude))
+            print(
+                f"{index:>7}  {index * args.per_region:>10}  {seeded:>7.1f}  {median:>9.2f}"
+                f"  {p95:>8.2f}"
+                f"  {', '.join(sorted(read))}  (+{city}, region {region})"
+            )
+    finally:
+        await async_engine.dispose()
+
+    slowdown = medians[-1] / medians[0]
+    print(f"Median with {len(medians)} regions is {slowdown:.2f}x the median with one")
+    return slowdown <= args.max_slowdown
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--layout", choices=LAYOUTS, default="world")
+    parser.add_argument("--regions", type=int, help="default: every city of the layout")
+    parser.add_argument("--per-region", type=int, default=50_000)
+    parser.add_argument("--radius", type=float, default=1000.0, help="viewport radius in meters")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--max-slowdown", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    cities = LAYOUTS[args.layout]
+    if args.regions is None:
+        args.regions = len(cities)
+    if not 2 <= args.regions <= len(cities):
+        parser.error(f"--regions must be between 2 and {len(cities)} for --layout {args.layout}")
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
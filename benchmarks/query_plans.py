@@ -0,0 +1,391 @@
+"""
+Seed a scaled dataset and audit the plans of the repository read queries.
+
+Point the POSTGRES_* settings at a scratch database migrated to head
+(``alembic upgrade head``), then run from the repository root:
+
+    PYTHONPATH=app python benchmarks/query_plans.py --organizations 200000
+
+Every statement a case runs, including selectin loads, is EXPLAINed with
+its real parameters. The run exits non-zero when a hot query plans a
+sequential scan over a table with more than --seq-scan-rows rows, or when
+a plan's total cost exceeds the case's budget. Plans of the other cases
+are only reported, marked "info".
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+
+from sqlalchemy import event, func, select, text
+
+from core.geo import get_bounding_box
+from db.base import async_engine
+from db.seed import database_has_data
+from db.session import Session
+from db.slow_queries import SKIP_OPTION
+from enums.organization import OrganizationSortOrder
+from enums.phone_number import PhoneNumberType
+from models.building import Building
+from models.occupation import Occupation
+from models.organization import Organization
+from models.phone_number import PhoneNumber
+from repositories import (
+    BuildingRepository,
+    OccupationRepository,
+    OrganizationRepository,
+    PhoneNumberRepository,
+)
+
+BATCH_SIZE = 5000
+WORDS = (
+    "Кофейня", "Аптека", "Клиника", "Пекарня", "Ресторан", "Музей", "Кинотеатр",
+    "Столовая", "Цветы", "Книги", "Оптика", "Салон", "Мастерская", "Ателье",
+)
+CITIES = (
+    ("Москва", 55.75, 37.62),
+    ("Санкт-Петербург", 59.94, 30.31),
+    ("Казань", 55.79, 49.12),
+    ("Новосибирск", 55.01, 82.93),
+    ("Екатеринбург", 56.84, 60.61),
+)
+
+
+@dataclass
+class PlanCase:
+    name: str
+    run: Callable[[SimpleNamespace, SimpleNamespace], Awaitable[Any]]
+    # Hot queries serve interactive endpoints and must stay index-backed.
+    hot: bool = True
+    max_cost: float | None = None
+
+
+CASES = [
+    PlanCase(
+        "organization.get_with_details",
+        lambda r, s: r.organization.get_with_details(s.organization_id),
+    ),
+    PlanCase(
+        "organization.list_by_ids",
+        lambda r, s: r.organization.list_by_ids(s.organization_ids),
+    ),
+    PlanCase(
+        "organization.list_by_building_id",
+        lambda r, s: r.organization.list_by_building_id(s.building_id),
+    ),
+    PlanCase(
+        "organization.list_by_occupation_ids",
+        lambda r, s: r.organization.list_by_occupation_ids([s.leaf_occupation_id]),
+    ),
+    PlanCase(
+        "organization.search_by_name",
+        lambda r, s: r.organization.search_by_name(s.name_query, limit=20),
+    ),
+    # Ranking scores every match, so the cost follows how common the terms
+    # are. A selective query must stay on the search_vector index; with one
+    # name in seven matching a common term no index plan is cheaper, so
+    # that case is only reported.
+    PlanCase(
+        "organization.full_text_search[selective]",
+        lambda r, s: r.organization.full_text_search(s.rare_name, limit=20),
+    ),
+    PlanCase(
+        "organization.full_text_search[common]",
+        lambda r, s: r.organization.full_text_search(s.name_query, limit=20),
+        hot=False,
+    ),
+    PlanCase(
+        "organization.search[query]",
+        lambda r, s: r.organization.search(query=s.name_query, limit=20),
+    ),
+    PlanCase(
+        "organization.search[bounds]",
+        lambda r, s: r.organization.search(
+            bounds=s.viewport,
+            sort=OrganizationSortOrder.ID,
+            limit=50,
+        ),
+    ),
+    PlanCase(
+        "organization.search[radius]",
+        lambda r, s: r.organization.search(
+            bounds=get_bounding_box(*s.center, 1000),
+            center=s.center,
+            radius_meters=1000,
+            sort=OrganizationSortOrder.DISTANCE,
+            limit=50,
+        ),
+    ),
+    PlanCase(
+        "organization.search[occupation]",
+        lambda r, s: r.organization.search(
+            occupation_ids=r.occupation.descendant_ids_select(s.root_occupation_id),
+            sort=OrganizationSortOrder.ID,
+            limit=50,
+        ),
+    ),
+    PlanCase(
+        "organization.list_changes",
+        lambda r, s: r.organization.list_changes(limit=500),
+    ),
+    PlanCase(
+        "building.list_within_bounds",
+        lambda r, s: r.building.list_within_bounds(**s.viewport),
+    ),
+    PlanCase(
+        "building.list_by_geohash_prefixes",
+        lambda r, s: r.building.list_by_geohash_prefixes(s.geohash_prefixes, **s.viewport),
+    ),
+    PlanCase(
+        "building.count_within_bounds",
+        lambda r, s: r.building.count_within_bounds(**s.viewport),
+    ),
+    PlanCase(
+        "building.cluster_within_bounds",
+        lambda r, s: r.building.cluster_within_bounds(**s.viewport, cell_size=0.005),
+    ),
+    PlanCase(
+        "occupation.get_descendant_ids",
+        lambda r, s: r.occupation.get_descendant_ids(s.root_occupation_id),
+    ),
+    PlanCase(
+        "phone_number.find_matches[exact]",
+        lambda r, s: r.phone_number.find_matches(value=s.phone, limit=20),
+    ),
+    PlanCase(
+        "phone_number.find_matches[suffix]",
+        lambda r, s: r.phone_number.find_matches(suffix=s.phone[-7:], limit=20),
+    ),
+    # Facets aggregate over the whole filtered set by design.
+    PlanCase(
+        "occupation.count_organizations",
+        lambda r, s: r.occupation.count_organizations(
+            r.organization.filtered_ids_select(bounds=s.viewport),
+        ),
+        hot=False,
+    ),
+    PlanCase(
+        "phone_number.count_organizations_by_type",
+        lambda r, s: r.phone_number.count_organizations_by_type(
+            r.organization.filtered_ids_select(bounds=s.viewport),
+        ),
+        hot=False,
+    ),
+    PlanCase(
+        "organization.count_filtered",
+        lambda r, s: r.organization.count_filtered(query="а"),
+        hot=False,
+    ),
+]
+
+
+def repositories(session) -> SimpleNamespace:
+    return SimpleNamespace(
+        organization=OrganizationRepository(session),
+        building=BuildingRepository(session),
+        occupation=OccupationRepository(session),
+        phone_number=PhoneNumberRepository(session),
+    )
+
+
+async def seed(organizations: int, rng: random.Random) -> None:
+    async with Session() as session:
+        if await database_has_data(session):
+            print("Database already has data, skipping seed")
+            return
+        repos = repositories(session)
+
+        for root_index in range(20):
+            root = Occupation(name=f"Раздел {root_index}")
+            session.add(root)
+            for child_index in range(10):
+                child = Occupation(name=f"Раздел {root_index}.{child_index}", parent=root)
+                session.add(child)
+                for leaf_index in range(5):
+                    session.add(Occupation(
+                        name=f"Раздел {root_index}.{child_index}.{leaf_index}",
+                        parent=child,
+                    ))
+            await session.flush()
+        leaf_ids = list(await session.scalars(
+            select(Occupation.id).where(~Occupation.children.any())
+        ))
+
+        for start in range(0, organizations, BATCH_SIZE):
+            end = min(start + BATCH_SIZE, organizations)
+            ids = await repos.organization.upsert_many([
+                f"{rng.choice(WORDS)} {rng.choice(WORDS).lower()} №{index}"
+                for index in range(start, end)
+            ])
+            buildings = []
+            phones = []
+            links = []
+            for organization_id in ids:
+                city, latitude, longitude = rng.choice(CITIES)
+                buildings.append({
+                    "organization_id": organization_id,
+                    "address": f"г. {city}, ул. {rng.choice(WORDS)}, {rng.randint(1, 200)}",
+                    "latitude": latitude + rng.uniform(-0.3, 0.3),
+                    "longitude": longitude + rng.uniform(-0.5, 0.5),
+                })
+                for phone_index in range(rng.randint(1, 3)):
+                    phones.append({
+                        "organization_id": organization_id,
+                        "value": f"+7{rng.randrange(10 ** 9, 10 ** 10)}",
+                        "is_primary": phone_index == 0,
+                        "type": rng.choice(list(PhoneNumberType)),
+                        "comment": None,
+                    })
+                links.extend(
+                    (organization_id, occupation_id)
+                    for occupation_id in set(rng.sample(leaf_ids, rng.randint(1, 2)))
+                )
+            await repos.building.upsert_many(buildings)
+            await repos.phone_number.replace_for_organizations(ids, phones)
+            await repos.organization.replace_occupation_links(ids, links)
+            await session.commit()
+            print(f"Seeded {end}/{organizations} organizations", end="\r", flush=True)
+        print()
+
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("ANALYZE"))
+
+
+async def sample_parameters(session) -> SimpleNamespace:
+    building = (await session.scalars(select(Building).order_by(Building.id).limit(1))).one()
+    root_occupation_id = (await session.scalars(
+        select(Occupation.id)
+        .where(Occupation.parent_id.is_(None))
+        .order_by(Occupation.id)
+        .limit(1)
+    )).one()
+    leaf_occupation_id = (await session.scalars(
+        select(Occupation.id).where(~Occupation.children.any()).order_by(Occupation.id).limit(1)
+    )).one()
+    phone = (await session.scalars(
+        select(PhoneNumber.value).order_by(PhoneNumber.id).limit(1)
+    )).one()
+    organization_ids = list(await session.scalars(
+        select(Building.organization_id).order_by(func.random()).limit(20)
+    ))
+    # Seeded names end with a unique number, so this matches one name.
+    rare_name = (await session.scalars(
+        select(Organization.name).order_by(Organization.id.desc()).limit(1)
+    )).one()
+    viewport = {
+        "min_latitude": building.latitude - 0.01,
+        "max_latitude": building.latitude + 0.01,
+        "min_longitude": building.longitude - 0.02,
+        "max_longitude": building.longitude + 0.02,
+    }
+    return SimpleNamespace(
+        organization_id=building.organization_id,
+        organization_ids=organization_ids,
+        building_id=building.id,
+        root_occupation_id=root_occupation_id,
+        leaf_occupation_id=leaf_occupation_id,
+        name_query="аптека",
+        rare_name=rare_name,
+        phone=phone,
+        center=(building.latitude, building.longitude),
+        viewport=viewport,
+        geohash_prefixes=[building.geohash[:5]],
+    )
+
+
+def seq_scans(plan: dict[str, Any]) -> Iterator[str]:
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from seq_scans(child)
+
+
+async def audit(seq_scan_rows: int, max_cost: float) -> bool:
+    statements: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not executemany and not conn.get_execution_options().get(SKIP_OPTION):
+            statements.append((statement, parameters))
+
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(**{SKIP_OPTION: True})
+        table_rows = {
+            row.relname: row.reltuples
+            for row in await connection.execute(
+                text("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')")
+            )
+        }
+
+        async with Session() as session:
+            parameters = await sample_parameters(session)
+        event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+        ok = True
+        try:
+            for case in CASES:
+                statements.clear()
+                async with Session() as session:
+                    await case.run(repositories(session), parameters)
+                    await session.rollback()
+                budget = case.max_cost if case.max_cost is not None else max_cost
+                for index, (statement, statement_parameters) in enumerate(statements):
+                    if not statement.lstrip("( ").upper().startswith(("SELECT", "WITH")):
+                        continue
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {statement}",
+                        statement_parameters,
+                    )
+                    plan = result.scalar_one()
+                    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+                    problems = []
+                    if case.hot:
+                        problems.extend(
+                            f"seq scan on {relation}"
+                            for relation in sorted(set(seq_scans(plan)))
+                            if table_rows.get(relation, 0) > seq_scan_rows
+                        )
+                        if plan["Total Cost"] > budget:
+                            problems.append(f"cost {plan['Total Cost']:.0f} > {budget:.0f}")
+                    ok = ok and not problems
+                    status = "FAIL" if problems else "ok" if case.hot else "info"
+                    label = case.name if index == 0 else f"{case.name} #{index}"
+                    print(
+                        f"{status:>4}  {label:<45} cost {plan['Total Cost']:>12.1f}"
+                        f"  {'; '.join(problems)}"
+                    )
+                await connection.rollback()
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return ok
+
+
+async def run(args: argparse.Namespace) -> bool:
+    if not args.skip_seed:
+        await seed(args.organizations, random.Random(args.seed))
+    try:
+        return await audit(args.seq_scan_rows, args.max_cost)
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--organizations", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--seq-scan-rows", type=int, default=10_000)
+    parser.add_argument("--max-cost", type=float, default=5_000)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare payload size and encode time of the JSON and columnar area responses.
+
+Run from the repository root:
+
+    PYTHONPATH=app python benchmarks/response_formats.py --points 20000
+"""
+import argparse
+import json
+import random
+import timeit
+
+from pydantic import TypeAdapter
+
+from core.columnar import encode_area
+from enums.phone_number import PhoneNumberType
+from schemas.organization import (
+    BuildingResponseSchema,
+    OrganizationAreaResponseSchema,
+    OrganizationResponseSchema,
+    OccupationResponseSchema,
+    PhoneNumberResponseSchema,
+)
+
+
+def build_area(points: int) -> OrganizationAreaResponseSchema:
+    rng = random.Random(42)
+    buildings = []
+    organizations = []
+    for index in range(1, points + 1):
+        building = BuildingResponseSchema(
+            id=index,
+            address=f"г. Москва, ул. Тверская, {index}",
+            latitude=55.5 + rng.random(),
+            longitude=37.3 + rng.random(),
+            organization_id=index,
+        )
+        buildings.append(building)
+        organizations.append(
+            OrganizationResponseSchema(
+                id=index,
+                name=f"Организация {index}",
+                building=building,
+                occupations=[
+                    OccupationResponseSchema(id=2, name="Кофейни", parent_id=1),
+                ],
+                phones=[
+                    PhoneNumberResponseSchema(
+                        id=index,
+                        value=f"+7495{index:07d}",
+                        is_primary=True,
+                        type=PhoneNumberType.WORK,
+                        comment=None,
+                    ),
+                ],
+            )
+        )
+    return OrganizationAreaResponseSchema(
+        organizations=organizations,
+        buildings=buildings,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    area = build_area(args.points)
+    adapter = TypeAdapter(OrganizationAreaResponseSchema)
+
+    def encode_json() -> bytes:
+        # Mirrors FastAPI: serialize the response model, then json.dumps it.
+        content = adapter.dump_python(area, mode="json", by_alias=True)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def encode_columnar() -> bytes:
+        return encode_area(area)
+
+    print(f"points: {args.points}")
+    for name, encoder in (("json", encode_json), ("columnar", encode_columnar)):
+        size = len(encoder())
+        seconds = min(timeit.repeat(encoder, number=1, repeat=args.repeat))
+        print(f"{name:>9}: {size / 1024:10.1f} KiB  {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""change feed
+
+Revision ID: 3b9d52e0c6a1
+Revises: f81e7743a94d
+Create Date: 2026-10-19 15:02:18.930147
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d52e0c6a1'
+down_revision: Union[str, None] = 'f81e7743a94d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = 'pg_current_xact_id()::text::bigint'
+
+UPDATED_AT_TABLES = ('organizations', 'occupations', 'buildings', 'phone_numbers')
+
+# child table -> column referencing the affected organizations
+TOUCH_TABLES = {
+    'buildings': 'organization_id',
+    'phone_numbers': 'organization_id',
+    'organization_occupations': 'org_id',
+    'occupations': 'id',
+}
+
+
+def upgrade() -> None:
+    for table in ('organizations', 'occupations', 'buildings'):
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        )
+    op.add_column(
+        'organizations',
+        sa.Column('change_xid', sa.BigInteger(), server_default=sa.text(CURRENT_XID), nullable=False),
+    )
+    op.create_index(op.f('ix_organizations_change_xid'), 'organizations', ['change_xid'], unique=False)
+
+    op.create_table('organization_tombstones',
+    sa.Column('organization_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('change_xid', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('organization_id')
+    )
+    op.create_index(
+        op.f('ix_organization_tombstones_change_xid'),
+        'organization_tombstones',
+        ['change_xid'],
+        unique=False,
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table in UPDATED_AT_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_set_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+        """)
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION set_change_xid() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_xid := {CURRENT_XID};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER organizations_set_change_xid
+        BEFORE INSERT OR UPDATE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION set_change_xid()
+    """)
+
+    # Changes to child rows bump the owning organizations, which re-stamps
+    # their change_xid through organizations_set_change_xid.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION touch_organizations() RETURNS trigger AS $$
+        DECLARE
+            key_column text := TG_ARGV[0];
+            keys_query text;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                keys_query := format('SELECT %I FROM new_rows', key_column);
+            ELSIF TG_OP = 'UPDATE' THEN
+                keys_query := format(
+                    'SELECT %1$I FROM new_rows UNION SELECT %1$I FROM old_rows',
+                    key_column
+                );
+            ELSE
+                keys_query := format('SELECT %I FROM old_rows', key_column);
+            END IF;
+
+            IF TG_TABLE_NAME = 'occupations' THEN
+                keys_query := 'SELECT org_id FROM organization_occupations '
+                    'WHERE occupation_id IN (' || keys_query || ')';
+            END IF;
+
+            EXECUTE 'UPDATE organizations SET updated_at = now() '
+                'WHERE id IN (' || keys_query || ')';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table, key_column in TOUCH_TABLES.items():
+        op.execute(f"""
+            CREATE TRIGGER {table}_touch_insert
+            AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION touch_organizations('{key_column}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_touch_update
+            AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION touch_organizations('{key_column}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_touch_delete
+            AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION touch_organizations('{key_column}')
+        """)
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION record_organization_tombstones() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO organization_tombstones (organization_id, change_xid)
+                SELECT id, {CURRENT_XID} FROM old_rows
+                ON CONFLICT (organization_id) DO UPDATE
+                SET change_xid = EXCLUDED.change_xid, deleted_at = now();
+            ELSE
+                DELETE FROM organization_tombstones
+                WHERE organization_id IN (SELECT id FROM new_rows);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER organizations_tombstone_delete
+        AFTER DELETE ON organizations
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_organization_tombstones()
+    """)
+    op.execute("""
+        CREATE TRIGGER organizations_tombstone_insert
+        AFTER INSERT ON organizations
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_organization_tombstones()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS organizations_tombstone_insert ON organizations")
+    op.execute("DROP TRIGGER IF EXISTS organizations_tombstone_delete ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS record_organization_tombstones()")
+    for table in TOUCH_TABLES:
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_touch_{event} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS touch_organizations()")
+    op.execute("DROP TRIGGER IF EXISTS organizations_set_change_xid ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS set_change_xid()")
+    for table in UPDATED_AT_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_set_updated_at ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
+
+    op.drop_index(op.f('ix_organization_tombstones_change_xid'), table_name='organization_tombstones')
+    op.drop_table('organization_tombstones')
+    op.drop_index(op.f('ix_organizations_change_xid'), table_name='organizations')
+    op.drop_column('organizations', 'change_xid')
+    for table in ('buildings', 'occupations', 'organizations'):
+        op.drop_column(table, 'updated_at')
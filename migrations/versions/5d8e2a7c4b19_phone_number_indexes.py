@@ -0,0 +1,33 @@
+"""phone number indexes
+
+Revision ID: 5d8e2a7c4b19
+Revises: 3b9d52e0c6a1
+Create Date: 2026-10-19 16:41:07.263815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e2a7c4b19'
+down_revision: Union[str, None] = '3b9d52e0c6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_phone_numbers_value'), 'phone_numbers', ['value'], unique=False)
+    op.create_index(
+        'ix_phone_numbers_value_reversed',
+        'phone_numbers',
+        [sa.text('reverse(value) COLLATE "C"')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_phone_numbers_value_reversed', table_name='phone_numbers')
+    op.drop_index(op.f('ix_phone_numbers_value'), table_name='phone_numbers')
@@ -0,0 +1,69 @@
+"""building geohash
+
+Revision ID: 7c0662436004
+Revises: 704426a55150
+Create Date: 2026-10-19 10:12:40.518311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.geo import GEOHASH_PRECISION, encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c0662436004'
+down_revision: Union[str, None] = '704426a55150'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column(
+        'buildings',
+        sa.Column('geohash', sa.String(length=GEOHASH_PRECISION, collation='C'), nullable=True),
+    )
+
+    buildings = sa.table(
+        'buildings',
+        sa.column('id', sa.Integer()),
+        sa.column('latitude', sa.Float()),
+        sa.column('longitude', sa.Float()),
+        sa.column('geohash', sa.String()),
+    )
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(buildings.c.id, buildings.c.latitude, buildings.c.longitude)
+            .where(buildings.c.id > last_id)
+            .order_by(buildings.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            buildings.update()
+            .where(buildings.c.id == sa.bindparam('building_id'))
+            .values(geohash=sa.bindparam('building_geohash')),
+            [
+                {
+                    'building_id': row.id,
+                    'building_geohash': encode_geohash(row.latitude, row.longitude),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.alter_column('buildings', 'geohash', nullable=False)
+    op.create_index(op.f('ix_buildings_geohash'), 'buildings', ['geohash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_buildings_geohash'), table_name='buildings')
+    op.drop_column('buildings', 'geohash')
@@ -0,0 +1,89 @@
+"""organization search vector
+
+Revision ID: 9a4f6c2e8d31
+Revises: 5d8e2a7c4b19
+Create Date: 2026-10-19 17:20:53.804412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f6c2e8d31'
+down_revision: Union[str, None] = '5d8e2a7c4b19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_CONTEXT = """
+    concat_ws(
+        ' ',
+        (SELECT address FROM buildings WHERE organization_id = {id}),
+        (
+            SELECT string_agg(occupations.name, ' ' ORDER BY occupations.id)
+            FROM organization_occupations
+            JOIN occupations ON occupations.id = organization_occupations.occupation_id
+            WHERE organization_occupations.org_id = {id}
+        )
+    )
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        'organizations',
+        sa.Column('search_context', sa.Text(), server_default='', nullable=False),
+    )
+
+    # Building, occupation and link changes already update the owning
+    # organizations through touch_organizations, so recomputing the context
+    # on every organization write keeps it current.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION set_organization_search_context() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_context := {SEARCH_CONTEXT.format(id='NEW.id')};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER organizations_set_search_context
+        BEFORE INSERT OR UPDATE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION set_organization_search_context()
+    """)
+    op.execute(
+        "UPDATE organizations SET search_context = "
+        + SEARCH_CONTEXT.format(id='organizations.id')
+    )
+
+    op.add_column(
+        'organizations',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('russian', coalesce(name, '')), 'A')"
+                " || setweight(to_tsvector('russian', search_context), 'B')",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_organizations_search_vector',
+        'organizations',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_organizations_search_vector', table_name='organizations')
+    op.drop_column('organizations', 'search_vector')
+    op.execute("DROP TRIGGER IF EXISTS organizations_set_search_context ON organizations")
+    op.execute("DROP FUNCTION IF EXISTS set_organization_search_context()")
+    op.drop_column('organizations', 'search_context')
@@ -0,0 +1,123 @@
+"""search context on source change
+
+Revision ID: b4d1f7c3e9a2
+Revises: e3b8d6f1a2c7
+Create Date: 2026-10-19 21:06:37.412958
+
+Moves the search_context refresh from a BEFORE UPDATE trigger on
+organizations into touch_organizations. The old trigger re-ran the address
+and occupation subqueries on every organization write, including every
+touch from a phone change and every change-feed bump, although only
+building addresses, occupation links and occupation names feed the context.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d1f7c3e9a2'
+down_revision: Union[str, None] = 'e3b8d6f1a2c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_CONTEXT = """
+    concat_ws(
+        ' ',
+        (SELECT address FROM buildings WHERE organization_id = {id}),
+        (
+            SELECT string_agg(occupations.name, ' ' ORDER BY occupations.id)
+            FROM organization_occupations
+            JOIN occupations ON occupations.id = organization_occupations.occupation_id
+            WHERE organization_occupations.org_id = {id}
+        )
+    )
+"""
+
+KEYS_QUERY = """
+            IF TG_OP = 'INSERT' THEN
+                keys_query := format('SELECT %I FROM new_rows', key_column);
+            ELSIF TG_OP = 'UPDATE' THEN
+                keys_query := format(
+                    'SELECT %1$I FROM new_rows UNION SELECT %1$I FROM old_rows',
+                    key_column
+                );
+            ELSE
+                keys_query := format('SELECT %I FROM old_rows', key_column);
+            END IF;
+
+            IF TG_TABLE_NAME = 'occupations' THEN
+                keys_query := 'SELECT org_id FROM organization_occupations '
+                    'WHERE occupation_id IN (' || keys_query || ')';
+            END IF;
+"""
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER organizations_set_search_context ON organizations")
+    op.execute("DROP FUNCTION set_organization_search_context()")
+
+    # Each branch is planned only when reached, so it may name columns
+    # that only its own table's transition tables have. EXCEPT hashes the
+    # transition tables, which have no statistics for a join to use.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION touch_organizations() RETURNS trigger AS $$
+        DECLARE
+            key_column text := TG_ARGV[0];
+            keys_query text;
+            refresh_context boolean := true;
+        BEGIN
+            {KEYS_QUERY}
+            IF TG_TABLE_NAME = 'phone_numbers' THEN
+                refresh_context := false;
+            ELSIF TG_TABLE_NAME = 'buildings' AND TG_OP = 'UPDATE' THEN
+                refresh_context := EXISTS (
+                    SELECT id, address FROM new_rows EXCEPT SELECT id, address FROM old_rows
+                );
+            ELSIF TG_TABLE_NAME = 'occupations' AND TG_OP = 'UPDATE' THEN
+                refresh_context := EXISTS (
+                    SELECT id, name FROM new_rows EXCEPT SELECT id, name FROM old_rows
+                );
+            END IF;
+
+            IF refresh_context THEN
+                EXECUTE 'UPDATE organizations SET updated_at = now(), search_context = '
+                    || $context${SEARCH_CONTEXT.format(id='organizations.id')}$context$
+                    || ' WHERE id IN (' || keys_query || ')';
+            ELSE
+                EXECUTE 'UPDATE organizations SET updated_at = now() '
+                    'WHERE id IN (' || keys_query || ')';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade() -> None:
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION touch_organizations() RETURNS trigger AS $$
+        DECLARE
+            key_column text := TG_ARGV[0];
+            keys_query text;
+        BEGIN
+            {KEYS_QUERY}
+            EXECUTE 'UPDATE organizations SET updated_at = now() '
+                'WHERE id IN (' || keys_query || ')';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION set_organization_search_context() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_context := {SEARCH_CONTEXT.format(id='NEW.id')};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER organizations_set_search_context
+        BEFORE INSERT OR UPDATE ON organizations
+        FOR EACH ROW EXECUTE FUNCTION set_organization_search_context()
+    """)
@@ -0,0 +1,52 @@
+"""query plan indexes
+
+Revision ID: c1e5b7a9d2f4
+Revises: 9a4f6c2e8d31
+Create Date: 2026-10-19 18:05:31.447209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e5b7a9d2f4'
+down_revision: Union[str, None] = '9a4f6c2e8d31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The primary key leads with org_id, so occupation filters scanned it.
+    op.create_index(
+        op.f('ix_organization_occupations_occupation_id'),
+        'organization_occupations',
+        ['occupation_id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_buildings_latitude_longitude',
+        'buildings',
+        ['latitude', 'longitude'],
+        unique=False,
+    )
+    # Substring name search uses ILIKE '%q%', which only a trigram index serves.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_organizations_name_trgm',
+        'organizations',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_organizations_name_trgm', table_name='organizations')
+    op.drop_index('ix_buildings_latitude_longitude', table_name='buildings')
+    op.drop_index(
+        op.f('ix_organization_occupations_occupation_id'),
+        table_name='organization_occupations',
+    )
@@ -0,0 +1,102 @@
+"""one building per organization
+
+Revision ID: d7a3c5e1b9f8
+Revises: b4d1f7c3e9a2
+Create Date: 2026-10-19 23:12:05.218440
+
+A partitioned buildings table cannot have a unique index on
+organization_id alone, because partitioned unique keys must contain the
+region. uq_buildings_organization_region only keeps one building per
+organization within a region. This adds building_organizations, a plain
+table keyed by organization_id that triggers keep in step with buildings,
+so its primary key rejects a second building of the same organization in
+another region. An unpartitioned table keeps its unique index on
+organization_id and does not get the table.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3c5e1b9f8'
+down_revision: Union[str, None] = 'b4d1f7c3e9a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    relkind = op.get_bind().scalar(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = 'buildings'::regclass")
+    )
+    if relkind != 'p':
+        return
+
+    op.execute("""
+        CREATE TABLE building_organizations (
+            organization_id integer NOT NULL,
+            region varchar(1) COLLATE "C" NOT NULL,
+            CONSTRAINT uq_buildings_organization PRIMARY KEY (organization_id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO building_organizations (organization_id, region)
+        SELECT organization_id, region FROM buildings
+    """)
+
+    # Probing every partition for each written organization would cost an
+    # index lookup per partition and row; the primary key costs one insert.
+    # Updates only rewrite the organizations whose building moved.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION sync_building_organizations() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO building_organizations (organization_id, region)
+                SELECT organization_id, region FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM building_organizations
+                WHERE organization_id IN (SELECT organization_id FROM old_rows);
+            ELSE
+                DELETE FROM building_organizations
+                WHERE organization_id IN (
+                    SELECT organization_id FROM (
+                        SELECT id, organization_id, region FROM old_rows
+                        EXCEPT SELECT id, organization_id, region FROM new_rows
+                    ) AS moved
+                );
+                INSERT INTO building_organizations (organization_id, region)
+                SELECT organization_id, region FROM (
+                    SELECT id, organization_id, region FROM new_rows
+                    EXCEPT SELECT id, organization_id, region FROM old_rows
+                ) AS moved;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER buildings_sync_organizations_insert
+        AFTER INSERT ON buildings
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION sync_building_organizations()
+    """)
+    op.execute("""
+        CREATE TRIGGER buildings_sync_organizations_update
+        AFTER UPDATE ON buildings
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION sync_building_organizations()
+    """)
+    op.execute("""
+        CREATE TRIGGER buildings_sync_organizations_delete
+        AFTER DELETE ON buildings
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION sync_building_organizations()
+    """)
+
+
+def downgrade() -> None:
+    for event in ('insert', 'update', 'delete'):
+        op.execute(f"DROP TRIGGER IF EXISTS buildings_sync_organizations_{event} ON buildings")
+    op.execute("DROP FUNCTION IF EXISTS sync_building_organizations()")
+    op.execute("DROP TABLE IF EXISTS building_organizations")
@@ -0,0 +1,180 @@
+"""building regions
+
+Revision ID: e3b8d6f1a2c7
+Revises: c1e5b7a9d2f4
+Create Date: 2026-10-19 19:24:52.613904
+
+Adds buildings.region, the first geohash character of the building. Run
+with ``alembic -x partition_buildings=true upgrade head`` to also rebuild
+buildings as a table LIST-partitioned by region, one partition per geohash
+character. The rebuild copies every row under an exclusive lock, so run it
+in a maintenance window. Partitioned unique keys must include region: the
+primary key becomes (id, region) and one building per organization is kept
+by the repositories rather than by a unique index on organization_id.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from core.geo import GEOHASH_ALPHABET
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8d6f1a2c7'
+down_revision: Union[str, None] = 'c1e5b7a9d2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REGION_PRECISION = 1
+
+COLUMNS = (
+    'id', 'address', 'latitude', 'longitude', 'geohash', 'region',
+    'organization_id', 'created_at', 'updated_at',
+)
+
+# Triggers of earlier revisions, recreated when the table is rebuilt.
+TRIGGERS = (
+    """
+    CREATE TRIGGER buildings_set_updated_at
+    BEFORE UPDATE ON buildings
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+    """,
+    """
+    CREATE TRIGGER buildings_touch_insert
+    AFTER INSERT ON buildings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION touch_organizations('organization_id')
+    """,
+    """
+    CREATE TRIGGER buildings_touch_update
+    AFTER UPDATE ON buildings
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION touch_organizations('organization_id')
+    """,
+    """
+    CREATE TRIGGER buildings_touch_delete
+    AFTER DELETE ON buildings
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION touch_organizations('organization_id')
+    """,
+    """
+    CREATE TRIGGER buildings_notify_insert
+    AFTER INSERT ON buildings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_data_change('organization_id')
+    """,
+    """
+    CREATE TRIGGER buildings_notify_update
+    AFTER UPDATE ON buildings
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_data_change('organization_id')
+    """,
+    """
+    CREATE TRIGGER buildings_notify_delete
+    AFTER DELETE ON buildings
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_data_change('organization_id')
+    """,
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'buildings',
+        sa.Column('region', sa.String(length=REGION_PRECISION, collation='C'), nullable=True),
+    )
+    op.execute(f"UPDATE buildings SET region = left(geohash, {REGION_PRECISION})")
+    op.alter_column('buildings', 'region', nullable=False)
+    op.create_check_constraint(
+        'ck_buildings_region',
+        'buildings',
+        f'region = left(geohash, {REGION_PRECISION})',
+    )
+    op.create_unique_constraint(
+        'uq_buildings_organization_region',
+        'buildings',
+        ['organization_id', 'region'],
+    )
+
+    options = context.get_x_argument(as_dictionary=True)
+    if options.get('partition_buildings', '').lower() in ('1', 'true', 'yes'):
+        _rebuild_buildings(partitioned=True)
+
+
+def downgrade() -> None:
+    if _is_partitioned():
+        _rebuild_buildings(partitioned=False)
+    op.drop_constraint('uq_buildings_organization_region', 'buildings', type_='unique')
+    op.drop_constraint('ck_buildings_region', 'buildings', type_='check')
+    op.drop_column('buildings', 'region')
+
+
+def _is_partitioned() -> bool:
+    relkind = op.get_bind().scalar(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = 'buildings'::regclass")
+    )
+    return relkind == 'p'
+
+
+def _rebuild_buildings(partitioned: bool) -> None:
+    # Index-backed constraints are added after the old table is dropped,
+    # because their index names are unique per schema.
+    op.execute("ALTER SEQUENCE buildings_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE buildings RENAME TO buildings_previous")
+    op.execute(f"""
+        CREATE TABLE buildings (
+            id integer NOT NULL DEFAULT nextval('buildings_id_seq'),
+            address varchar(200) NOT NULL,
+            latitude double precision NOT NULL,
+            longitude double precision NOT NULL,
+            geohash varchar(12) COLLATE "C" NOT NULL,
+            region varchar({REGION_PRECISION}) COLLATE "C" NOT NULL,
+            organization_id integer NOT NULL
+                REFERENCES organizations (id) ON DELETE CASCADE,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            updated_at timestamp without time zone NOT NULL DEFAULT now(),
+            CONSTRAINT ck_lat_range CHECK (latitude  >= -90  AND latitude  <= 90),
+            CONSTRAINT ck_lon_range CHECK (longitude >= -180 AND longitude <= 180),
+            CONSTRAINT ck_buildings_region CHECK (region = left(geohash, {REGION_PRECISION}))
+        ) {'PARTITION BY LIST (region)' if partitioned else ''}
+    """)
+    if partitioned:
+        for region in GEOHASH_ALPHABET:
+            op.execute(
+                f"CREATE TABLE buildings_{region} PARTITION OF buildings FOR VALUES IN ('{region}')"
+            )
+
+    # Copied before the triggers exist, so no change notifications are sent.
+    columns = ', '.join(COLUMNS)
+    op.execute(f"INSERT INTO buildings ({columns}) SELECT {columns} FROM buildings_previous")
+    op.execute("DROP TABLE buildings_previous")
+    op.execute("ALTER SEQUENCE buildings_id_seq OWNED BY buildings.id")
+
+    op.create_primary_key(
+        'buildings_pkey',
+        'buildings',
+        ['id', 'region'] if partitioned else ['id'],
+    )
+    op.create_unique_constraint(
+        'uq_buildings_organization_region',
+        'buildings',
+        ['organization_id', 'region'],
+    )
+    if not partitioned:
+        op.create_index(
+            op.f('ix_buildings_organization_id'),
+            'buildings',
+            ['organization_id'],
+            unique=True,
+        )
+    op.create_index(op.f('ix_buildings_geohash'), 'buildings', ['geohash'], unique=False)
+    op.create_index(
+        'ix_buildings_latitude_longitude',
+        'buildings',
+        ['latitude', 'longitude'],
+        unique=False,
+    )
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+    op.execute("ANALYZE buildings")
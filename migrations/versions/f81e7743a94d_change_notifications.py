@@ -0,0 +1,94 @@
+"""change notifications
+
+Revision ID: f81e7743a94d
+Revises: 7c0662436004
+Create Date: 2026-10-19 13:41:07.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f81e7743a94d'
+down_revision: Union[str, None] = '7c0662436004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANNEL = 'organization_search_changes'
+# NOTIFY payloads are limited to 8000 bytes; larger id lists are sent as null.
+MAX_PAYLOAD_BYTES = 7900
+
+# table -> column whose values identify the affected cache entries
+NOTIFY_TABLES = {
+    'organizations': 'id',
+    'buildings': 'organization_id',
+    'phone_numbers': 'organization_id',
+    'organization_occupations': 'org_id',
+    'occupations': 'id',
+}
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_data_change() RETURNS trigger AS $$
+        DECLARE
+            key_column text := TG_ARGV[0];
+            ids jsonb;
+            payload text;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                EXECUTE format('SELECT jsonb_agg(DISTINCT %I) FROM new_rows', key_column)
+                    INTO ids;
+            ELSIF TG_OP = 'UPDATE' THEN
+                EXECUTE format(
+                    'SELECT jsonb_agg(DISTINCT key) FROM ('
+                    'SELECT %1$I AS key FROM new_rows UNION SELECT %1$I FROM old_rows'
+                    ') AS changed',
+                    key_column
+                ) INTO ids;
+            ELSE
+                EXECUTE format('SELECT jsonb_agg(DISTINCT %I) FROM old_rows', key_column)
+                    INTO ids;
+            END IF;
+
+            IF ids IS NULL THEN
+                RETURN NULL;
+            END IF;
+
+            payload := json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'ids', ids)::text;
+            IF octet_length(payload) > {MAX_PAYLOAD_BYTES} THEN
+                payload := json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'ids', NULL)::text;
+            END IF;
+            PERFORM pg_notify('{CHANNEL}', payload);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table, key_column in NOTIFY_TABLES.items():
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_insert
+            AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_data_change('{key_column}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_update
+            AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_data_change('{key_column}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_delete
+            AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_data_change('{key_column}')
+        """)
+
+
+def downgrade() -> None:
+    for table in NOTIFY_TABLES:
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_{event} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_data_change()")
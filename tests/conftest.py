@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+# Settings are read on import; the engine they configure is never connected.
+os.environ.setdefault('JWT_KEY', 'test')
+os.environ.setdefault('POSTGRES_PASSWORD', 'test')
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from asgi.admission import AdaptiveLimiter
+
+
+def make_limiter(**overrides) -> AdaptiveLimiter:
+    options = dict(
+        initial_limit=2,
+        min_limit=1,
+        max_limit=10,
+        queue_size=1,
+        latency_target=0.1,
+    )
+    options.update(overrides)
+    return AdaptiveLimiter(**options)
+
+
+def test_initial_limit_is_clamped():
+    assert make_limiter(initial_limit=50).limit == 10
+    assert make_limiter(initial_limit=0).limit == 1
+
+
+def test_acquire_queues_and_rejects_when_queue_is_full():
+    async def scenario():
+        limiter = make_limiter()
+        assert await limiter.acquire(0.1)
+        assert await limiter.acquire(0.1)
+        waiting = asyncio.create_task(limiter.acquire(1.0))
+        await asyncio.sleep(0)
+        # The one queue slot is taken.
+        assert not await limiter.acquire(0.1)
+        limiter.release(0.01)
+        assert await waiting
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
+
+
+def test_acquire_times_out_and_leaves_the_queue():
+    async def scenario():
+        limiter = make_limiter(initial_limit=1)
+        assert await limiter.acquire(0.1)
+        assert not await limiter.acquire(0.01)
+        assert not limiter._waiters
+        limiter.release(0.01)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    async def scenario():
+        limiter = make_limiter(initial_limit=1)
+        assert await limiter.acquire(0.1)
+        waiting = asyncio.create_task(limiter.acquire(1.0))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        limiter.release(0.01)
+        assert limiter.in_flight == 0
+        assert await limiter.acquire(0.1)
+
+    asyncio.run(scenario())
+
+
+def test_limit_grows_additively_under_target():
+    async def scenario():
+        limiter = make_limiter(initial_limit=2)
+        for _ in range(2):
+            assert await limiter.acquire(0.1)
+        limiter.release(0.01)
+        assert limiter.limit == pytest.approx(2.5)
+
+    asyncio.run(scenario())
+
+
+def test_limit_backs_off_once_per_target_interval(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr("asgi.admission.monotonic", lambda: now)
+
+    async def scenario():
+        nonlocal now
+        limiter = make_limiter(initial_limit=10, backoff_ratio=0.5)
+        for _ in range(3):
+            assert await limiter.acquire(0.1)
+        limiter.release(1.0)
+        assert limiter.limit == 5
+        limiter.release(1.0, failed=True)
+        assert limiter.limit == 5
+        now += 0.2
+        limiter.release(1.0)
+        assert limiter.limit == 2.5
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_limit_does_not_drop_below_minimum():
+    async def scenario():
+        limiter = make_limiter(initial_limit=1, min_limit=1, backoff_ratio=0.1)
+        assert await limiter.acquire(0.1)
+        limiter.release(1.0, failed=True)
+        assert limiter.limit == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+from core.cache import TTLCache
+
+
+def test_set_drops_value_read_before_invalidation():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.invalidate(["organization:1"])
+    cache.set(1, "stale", ["organization:1"], generation=generation)
+    assert cache.get(1) is None
+
+
+def test_set_keeps_value_when_other_tags_were_invalidated():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.invalidate(["organization:2"])
+    cache.set(1, "fresh", ["organization:1"], generation=generation)
+    assert cache.get(1) == "fresh"
+
+
+def test_set_drops_value_read_before_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.clear()
+    cache.set(1, "stale", ["organization:1"], generation=generation)
+    assert cache.get(1) is None
+
+
+def test_set_drops_value_when_its_invalidation_was_forgotten():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation()
+    cache.invalidate(["organization:1"])
+    cache.invalidate(["organization:2", "organization:3"])
+    cache.set(1, "stale", ["organization:1"], generation=generation)
+    assert cache.get(1) is None
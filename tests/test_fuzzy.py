@@ -0,0 +1,59 @@
+import itertools
+
+from core.fuzzy import bounded_distance, grams
+from snapshot import format as snapshot_format
+from snapshot.builder import _fuzzy_columns
+from snapshot.format import Snapshot, write_snapshot
+
+
+def build_snapshot(tmp_path, names: list[tuple[str, int]]) -> Snapshot:
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(path, 1, _fuzzy_columns(names))
+    return Snapshot(path)
+
+
+def test_transposition_counts_as_one_edit():
+    assert bounded_distance("кфае", "кафе", 1) == 1
+    assert bounded_distance("кфае", "кафе", 0) == 1
+
+
+def test_transposition_can_destroy_every_gram():
+    assert not grams("кфае") & grams("кафе")
+
+
+def test_fuzzy_match_with_transposition_in_short_word(tmp_path):
+    snapshot = build_snapshot(tmp_path, [("Кафе", 1), ("Кофейня", 2)])
+    assert snapshot.fuzzy_name_matches("кафе", limit=5) == [1]
+    assert snapshot.fuzzy_name_matches("кфае", limit=5) == [1]
+
+
+def test_fuzzy_match_with_two_transpositions(tmp_path):
+    snapshot = build_snapshot(tmp_path, [("Пекарня", 1), ("Типография", 2)])
+    assert snapshot.fuzzy_name_matches("тпиогарфия", limit=5) == [2]
+
+
+def test_fuzzy_match_of_repetitive_word(tmp_path):
+    snapshot = build_snapshot(tmp_path, [("Аааа", 1), ("Абабабаб", 2), ("Бета", 3)])
+    assert snapshot.fuzzy_name_matches("ааа", limit=5) == []
+    assert snapshot.fuzzy_name_matches("аааб", limit=5) == [1]
+    assert snapshot.fuzzy_name_matches("аааа", limit=5) == [1]
+    assert snapshot.fuzzy_name_matches("абабабаб", limit=5) == [2]
+    # Too few distinct grams to bound the search, so only exact matches.
+    assert snapshot.fuzzy_name_matches("бабабааб", limit=5) == []
+
+
+def test_repetitive_query_does_not_scan_words_of_similar_length(tmp_path, monkeypatch):
+    words = ("".join(letters) for letters in itertools.product("абвгдежзиклм", repeat=4))
+    names = [(word, index) for index, word in enumerate(words)]
+    snapshot = build_snapshot(tmp_path, names)
+    calls = 0
+
+    def counting_distance(first: str, second: str, limit: int) -> int:
+        nonlocal calls
+        calls += 1
+        return bounded_distance(first, second, limit)
+
+    monkeypatch.setattr(snapshot_format, "bounded_distance", counting_distance)
+    for query in ("аааа", "ааааааа", "аааа аааа аааа аааа"):
+        snapshot.fuzzy_name_matches(query, limit=5)
+    assert calls <= 10
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from core.geo import (
+    encode_geohash,
+    geohash_cells_covering,
+    geohash_prefixes_covering,
+    geohash_region,
+    tile_bounds,
+)
+
+
+def test_encode_geohash_known_points():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert encode_geohash(42.6, -5.6, 5) == "ezs42"
+    assert encode_geohash(-90.0, -180.0, 4) == "0000"
+    assert geohash_region(encode_geohash(55.75, 37.62)) == "u"
+
+
+def test_encode_geohash_prefixes_agree_across_precisions():
+    geohash = encode_geohash(55.75, 37.62, 12)
+    for precision in range(1, 12):
+        assert encode_geohash(55.75, 37.62, precision) == geohash[:precision]
+
+
+@pytest.mark.parametrize("bounds", [
+    {"min_latitude": 55.70, "max_latitude": 55.80, "min_longitude": 37.50, "max_longitude": 37.70},
+    {"min_latitude": -0.05, "max_latitude": 0.05, "min_longitude": -0.05, "max_longitude": 0.05},
+    {"min_latitude": 44.9, "max_latitude": 45.1, "min_longitude": 179.8, "max_longitude": 180.0},
+])
+def test_geohash_cells_covering_contains_every_point(bounds):
+    rng = random.Random(1)
+    for precision in (4, 5, 6):
+        cells = set(geohash_cells_covering(bounds, precision))
+        for _ in range(500):
+            latitude = rng.uniform(bounds["min_latitude"], bounds["max_latitude"])
+            longitude = rng.uniform(bounds["min_longitude"], bounds["max_longitude"])
+            assert encode_geohash(latitude, longitude, precision) in cells
+        corners = {
+            encode_geohash(latitude, longitude, precision)
+            for latitude in (bounds["min_latitude"], bounds["max_latitude"])
+            for longitude in (bounds["min_longitude"], bounds["max_longitude"])
+        }
+        assert corners <= cells
+
+
+def test_geohash_prefixes_covering_is_bounded():
+    bounds = {"min_latitude": 55.0, "max_latitude": 56.0, "min_longitude": 37.0, "max_longitude": 38.0}
+    prefixes = geohash_prefixes_covering(bounds, max_prefixes=16)
+    assert 0 < len(prefixes) <= 16
+    assert any(encode_geohash(55.5, 37.5).startswith(prefix) for prefix in prefixes)
+
+
+def test_tile_bounds():
+    world = tile_bounds(0, 0, 0)
+    assert world["min_longitude"] == -180.0
+    assert world["max_longitude"] == 180.0
+    assert world["max_latitude"] == pytest.approx(85.0511, abs=1e-4)
+    assert world["min_latitude"] == pytest.approx(-85.0511, abs=1e-4)
+
+    north_east = tile_bounds(1, 1, 0)
+    assert north_east["min_latitude"] == pytest.approx(0.0, abs=1e-9)
+    assert north_east["min_longitude"] == 0.0
+    assert north_east["max_longitude"] == 180.0
+
+    tile = tile_bounds(10, 619, 320)
+    assert tile["min_latitude"] < 55.75 < tile["max_latitude"]
+    assert tile["min_longitude"] < 37.62 < tile["max_longitude"]
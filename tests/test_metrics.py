@@ -0,0 +1,23 @@
+import asyncio
+import json
+
+from core.metrics import LOOP_STALLS_TOTAL, MetricsStore, local_state, render_metrics
+
+
+def test_collect_sums_workers_and_keeps_retired_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr(LOOP_STALLS_TOTAL, "value", 2)
+    other_worker = local_state()
+    other_worker[LOOP_STALLS_TOTAL.name] = [3]
+    (tmp_path / "1.json").write_text(json.dumps(other_worker))
+
+    store = MetricsStore(tmp_path, interval=60)
+    asyncio.run(store.start())
+    assert store.collect()[LOOP_STALLS_TOTAL.name] == [5]
+
+    asyncio.run(store.stop())
+    monkeypatch.setattr(LOOP_STALLS_TOTAL, "value", 0)
+    assert MetricsStore(tmp_path, interval=60).collect()[LOOP_STALLS_TOTAL.name] == [5]
+
+
+def test_metrics_have_no_worker_label():
+    assert "worker=" not in render_metrics()